@@ -0,0 +1,120 @@
+"""
+    Group: TAMUSA Notepad Experts (TNE)
+    Authors: Joshua Ludolf & Luis Morales
+    Class: CSCI 3366 - Programming Languages
+
+    Auto-save scheduling module for the TAMUSA Notepad application.
+    Decides when auto-save should run from typing activity, the cost of the
+    last save and the size of the document.
+"""
+
+import time
+
+# Default thresholds, in seconds unless noted otherwise
+IDLE_DELAY = 0.75          # Wait for this much keyboard idle time before saving
+MIN_INTERVAL = 1.0         # Never save more often than this
+MAX_INTERVAL = 30.0        # Never back off further than this
+MAX_STALENESS = 10.0       # Save even while typing once changes are this old
+COST_FACTOR = 20.0         # Keep saving under 1/20th of the time (5% duty cycle)
+BYTES_PER_SECOND = 4 * 1024 * 1024  # Add 1 s of interval per 4 MB of document
+
+
+class AutoSaveScheduler:
+    """
+    An adaptive auto-save scheduler.
+
+    Saves are debounced until the keyboard has been idle for idle_delay, and
+    spaced by an effective interval that grows with the measured save cost and
+    the document size. Unsaved changes are never left older than max_staleness,
+    even during a long typing burst.
+
+    Attributes:
+        idle_delay, min_interval, max_interval, max_staleness, cost_factor,
+        bytes_per_second: The thresholds, see the module constants
+        last_cost: Duration of the last save in seconds
+        document_size: Size of the document at the last save, in characters
+    """
+
+    def __init__(self, idle_delay=IDLE_DELAY, min_interval=MIN_INTERVAL, max_interval=MAX_INTERVAL,
+                 max_staleness=MAX_STALENESS, cost_factor=COST_FACTOR,
+                 bytes_per_second=BYTES_PER_SECOND, clock=time.monotonic):
+        self.idle_delay = idle_delay
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.max_staleness = max_staleness
+        self.cost_factor = cost_factor
+        self.bytes_per_second = bytes_per_second
+        self.clock = clock
+        self.last_cost = 0.0
+        self.document_size = 0
+        self.last_activity = None  # Time of the last key press
+        self.dirty_since = None    # Time of the first change not saved yet
+        self.last_save = clock()
+
+    def configure(self, **thresholds):
+        """Change one or more thresholds, e.g. configure(idle_delay=2.0)"""
+        for name, value in thresholds.items():
+            if not hasattr(self, name) or name in ("clock", "last_cost", "document_size"):
+                raise AttributeError(f"Unknown auto-save threshold: {name}")
+            setattr(self, name, value)
+
+    def note_activity(self):
+        """Record a key press"""
+        self.last_activity = self.clock()
+
+    def note_dirty(self):
+        """Record that the document has unsaved changes"""
+        if self.dirty_since is None:
+            self.dirty_since = self.clock()
+
+    def note_saved(self, cost, document_size=None):
+        """Record a save, its cost on the main loop in seconds and the document size"""
+        self.last_save = self.clock()
+        self.last_cost = cost
+        if document_size is not None:
+            self.document_size = document_size
+        self.dirty_since = None
+
+    def note_write_latency(self, latency):
+        """
+        Record how long the write queued by the last save took on the writer thread.
+
+        The write finishes after note_saved(), the next note_saved() replaces
+        the cost again, so a latency only counts for the save that caused it.
+        """
+        self.last_cost = max(self.last_cost, latency)
+
+    def effective_interval(self):
+        """Return the current minimum spacing between two saves, in seconds"""
+        interval = max(self.min_interval,
+                       self.last_cost * self.cost_factor,
+                       self.document_size / self.bytes_per_second)
+        return min(interval, self.max_interval)
+
+    def _due_at(self):
+        """Return the time the pending changes should be saved at"""
+        debounced = max(self.last_save + self.effective_interval(),
+                        (self.last_activity or 0.0) + self.idle_delay)
+        return min(debounced, self.dirty_since + self.max_staleness)
+
+    def should_save(self):
+        """Return True if there are unsaved changes and a save is due now"""
+        return self.dirty_since is not None and self.clock() >= self._due_at()
+
+    def next_delay(self):
+        """Return how long to wait before checking again, in seconds"""
+        if self.dirty_since is None:
+            return self.min_interval
+        delay = self._due_at() - self.clock()
+        return min(max(delay, 0.05), self.max_interval)
+
+    def status(self):
+        """Return the scheduler state for the debug/status surface"""
+        now = self.clock()
+        return {
+            "interval": self.effective_interval(),
+            "last_cost": self.last_cost,
+            "document_size": self.document_size,
+            "pending_for": 0.0 if self.dirty_since is None else now - self.dirty_since,
+            "idle_for": None if self.last_activity is None else now - self.last_activity,
+        }
@@ -0,0 +1,293 @@
+"""
+    Group: TAMUSA Notepad Experts (TNE)
+    Authors: Joshua Ludolf & Luis Morales
+    Class: CSCI 3366 - Programming Languages
+
+    Directory scanning module for the TAMUSA Notepad application.
+    Lists directories and stats their files on a pool of worker threads, so
+    slow disks and network mounts never block the file tree. Results are
+    queued for the Tk loop to pick up. Listings are cached and reused while
+    the directory's modification time is unchanged.
+"""
+
+import os
+import queue
+import threading
+import time
+from collections import OrderedDict, namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 4
+CANCEL_CHECK = 256  # Entries listed between two checks for cancellation
+CACHE_ENTRIES = 256  # Directory listings kept by ListingCache
+PAGE_SIZE = 500  # Entries the file tree inserts at a time
+REFRESH_INTERVAL = 5.0  # Seconds between two refreshes of the expanded directories
+RACY_WINDOW_NS = 2 * 10**9  # Listings of directories modified this recently are not cached
+
+# One directory entry, as shown by the file tree. size is None for directories.
+Entry = namedtuple("Entry", ["name", "path", "is_dir", "size"])
+
+
+class ScanCancelled(Exception):
+    """Raised by scan_directory() when the scan was cancelled"""
+
+
+def path_key(path):
+    """Return the key a path is indexed and cached under"""
+    return os.path.normcase(os.path.abspath(path))
+
+
+def sort_key(entry):
+    """Directories first, then case-insensitive by name"""
+    return (not entry.is_dir, entry.name.lower())
+
+
+def scan_directory(path, cancel_event=None):
+    """
+    List a directory and stat its files.
+
+    Args:
+        path (str): The directory to list.
+        cancel_event (threading.Event): Stops the scan when set.
+
+    Returns:
+        list: Entry tuples, directories first, then sorted by name. Entries that
+            vanish or cannot be stat'ed while listing are skipped.
+
+    Raises:
+        ScanCancelled: If cancel_event was set during the scan.
+        OSError: If the directory cannot be listed.
+    """
+    entries = []
+    with os.scandir(path) as listing:
+        for count, dir_entry in enumerate(listing):
+            if cancel_event is not None and count % CANCEL_CHECK == 0 and cancel_event.is_set():
+                raise ScanCancelled(path)
+            try:
+                if dir_entry.is_dir():
+                    entries.append(Entry(dir_entry.name, dir_entry.path, True, None))
+                elif dir_entry.is_file():
+                    entries.append(Entry(dir_entry.name, dir_entry.path, False, dir_entry.stat().st_size))
+            except OSError:
+                continue
+    entries.sort(key=sort_key)
+    return entries
+
+
+class ListingCache:
+    """
+    Sorted directory listings keyed by path, least recently used first out.
+
+    A listing is valid while its directory's mtime is unchanged. That mtime
+    changes when entries are created, removed or renamed (which includes
+    atomic saves), not when a file is written in place, so cached sizes of
+    files appended to are only updated by cached_listing(restat=True). Safe
+    to use from several threads.
+
+    Attributes:
+        max_entries: Number of listings kept, 0 disables the cache
+        hits: Number of listings served from the cache
+        misses: Number of lookups that had to list the directory
+    """
+
+    def __init__(self, max_entries=CACHE_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._listings = OrderedDict()  # path -> (mtime_ns, entries)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._listings)
+
+    def get(self, path, mtime_ns):
+        """Return the cached entries of a directory, or None if they are missing or stale"""
+        path = path_key(path)
+        with self._lock:
+            cached = self._listings.get(path)
+            if cached is None or cached[0] != mtime_ns:
+                self.misses += 1
+                return None
+            self._listings.move_to_end(path)
+            self.hits += 1
+            return cached[1]
+
+    def put(self, path, mtime_ns, entries):
+        """Cache the entries of a directory listed when its mtime was mtime_ns"""
+        if self.max_entries <= 0:
+            return
+        path = path_key(path)
+        with self._lock:
+            self._listings[path] = (mtime_ns, tuple(entries))
+            self._listings.move_to_end(path)
+            while len(self._listings) > self.max_entries:
+                self._listings.popitem(last=False)
+
+    def invalidate(self, path=None):
+        """Forget one directory's listing, or every listing if path is None"""
+        with self._lock:
+            if path is None:
+                self._listings.clear()
+            else:
+                self._listings.pop(path_key(path), None)
+
+
+def restat_files(entries, cancel_event=None):
+    """
+    Stat the files of a listing again, for sizes changed by writes in place.
+
+    Args:
+        entries (tuple): Entry tuples of one directory.
+        cancel_event (threading.Event): Stops the scan when set.
+
+    Returns:
+        tuple: entries itself if no size changed, otherwise a copy with the new
+            sizes. Files that vanished keep their entry, the directory's mtime
+            changed and its next listing drops them.
+
+    Raises:
+        ScanCancelled: If cancel_event was set during the scan.
+    """
+    updated = None
+    for index, entry in enumerate(entries):
+        if cancel_event is not None and index % CANCEL_CHECK == 0 and cancel_event.is_set():
+            raise ScanCancelled(os.path.dirname(entry.path))
+        if entry.is_dir:
+            continue
+        try:
+            size = os.stat(entry.path).st_size
+        except OSError:
+            continue
+        if size != entry.size:
+            if updated is None:
+                updated = list(entries)
+            updated[index] = entry._replace(size=size)
+    return entries if updated is None else tuple(updated)
+
+
+def cached_listing(path, cache, cancel_event=None, scan_func=scan_directory, restat=False):
+    """
+    Return a directory's entries from the cache, listing and caching it if needed.
+
+    Args:
+        path (str): The directory to list.
+        cache (ListingCache): The cache to read through.
+        cancel_event (threading.Event): Stops the scan when set.
+        scan_func (callable): Lists the directory on a cache miss.
+        restat (bool): Stat the files of a cached listing again, so sizes
+            of files written in place are current.
+
+    Returns:
+        tuple: Entry tuples, sorted like scan_directory(). A cached listing
+            is returned as the same object while nothing in it changed.
+    """
+    mtime_ns = os.stat(path).st_mtime_ns
+    entries = cache.get(path, mtime_ns)
+    if entries is not None and restat:
+        restated = restat_files(entries, cancel_event)
+        if restated is not entries:
+            cache.put(path, mtime_ns, restated)
+            entries = restated
+    if entries is None:
+        entries = scan_func(path, cancel_event)
+        # Entries added within the filesystem's timestamp granularity may not
+        # move the mtime, so only listings of settled directories are trusted
+        if time.time_ns() - mtime_ns > RACY_WINDOW_NS:
+            cache.put(path, mtime_ns, entries)
+    return tuple(entries)
+
+
+class DirectoryScanner:
+    """
+    Runs directory scans on a thread pool.
+
+    Finished scans are put on a queue and handed out by poll(), which the
+    caller runs from the Tk loop, so the tree is only touched from the Tk thread.
+
+    Attributes:
+        cache: The ListingCache scans read through, None to always list
+        scans_started: Number of scans submitted
+        scans_cancelled: Number of scans cancelled before their result was delivered
+    """
+
+    def __init__(self, max_workers=MAX_WORKERS, scan_func=scan_directory, cache=None):
+        self.scan_func = scan_func
+        self.cache = cache
+        self.scans_started = 0
+        self.scans_cancelled = 0
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tne-scan")
+        self._results = queue.Queue()
+        self._cancel_events = {}  # token -> threading.Event of scans not delivered yet
+        self._lock = threading.Lock()
+
+    def submit(self, token, path, restat=False):
+        """
+        Start listing a directory.
+
+        Args:
+            token: Identifies the scan in poll() results and for cancel(), must be unique.
+            path (str): The directory to list.
+            restat (bool): Stat the files again if the listing comes from the cache.
+        """
+        event = threading.Event()
+        with self._lock:
+            self._cancel_events[token] = event
+            self.scans_started += 1
+        self._pool.submit(self._scan, token, path, event, restat)
+
+    def _scan(self, token, path, event, restat=False):
+        try:
+            if self.cache is not None:
+                entries = cached_listing(path, self.cache, event, self.scan_func, restat)
+            else:
+                entries = self.scan_func(path, event)
+            error = None
+        except ScanCancelled:
+            return
+        except Exception as e:
+            entries, error = None, e
+        if not event.is_set():
+            self._results.put((token, path, entries, error))
+
+    def cancel(self, token):
+        """Cancel a scan, its result will not be delivered"""
+        with self._lock:
+            event = self._cancel_events.pop(token, None)
+            if event is not None:
+                event.set()
+                self.scans_cancelled += 1
+
+    def cancel_all(self):
+        with self._lock:
+            tokens = list(self._cancel_events)
+        for token in tokens:
+            self.cancel(token)
+
+    def pending(self):
+        """Return the number of scans whose result was not delivered yet"""
+        with self._lock:
+            return len(self._cancel_events)
+
+    def poll(self, max_results=8):
+        """
+        Return up to max_results finished scans.
+
+        Returns:
+            list: (token, path, entries, error) tuples, entries is None if error is set.
+        """
+        results = []
+        while len(results) < max_results:
+            try:
+                token, path, entries, error = self._results.get_nowait()
+            except queue.Empty:
+                break
+            with self._lock:
+                if self._cancel_events.pop(token, None) is None:
+                    continue  # Cancelled after it finished
+            results.append((token, path, entries, error))
+        return results
+
+    def shutdown(self):
+        """Cancel every scan and stop the worker threads"""
+        self.cancel_all()
+        self._pool.shutdown(wait=False)  # Cancelled scans still queued return at once
@@ -0,0 +1,515 @@
+"""
+    Group: TAMUSA Notepad Experts (TNE)
+    Authors: Joshua Ludolf & Luis Morales
+    Class: CSCI 3366 - Programming Languages
+
+    Document loading module for the TAMUSA Notepad application.
+    Reads a file once, detects its encoding and line-ending style on the
+    in-memory bytes, and remembers both so a save writes the file back the
+    way it was found. Gzip, bzip2 and xz files are recognized by their magic
+    bytes and decompressed as a stream.
+"""
+
+import bz2
+import codecs
+import gzip
+import io
+import lzma
+import os
+import queue
+import struct
+import tempfile
+import threading
+
+# Checked longest first, the UTF-32 LE BOM starts with the UTF-16 LE one.
+# UTF-16/32 are recorded with their byte order so a file is saved back in it
+BOMS = [
+    (codecs.BOM_UTF32_LE, 'utf-32-le'),
+    (codecs.BOM_UTF32_BE, 'utf-32-be'),
+    (codecs.BOM_UTF8, 'utf-8-sig'),
+    (codecs.BOM_UTF16_LE, 'utf-16-le'),
+    (codecs.BOM_UTF16_BE, 'utf-16-be'),
+]
+
+# The byte order marks the codecs of these names neither read nor write, utf-8-sig handles its own
+EXPLICIT_BOMS = {encoding: bom for bom, encoding in BOMS if encoding != 'utf-8-sig'}
+
+# Tried in order on files without a BOM, latin-1 maps every byte so it never fails
+ENCODINGS = ['utf-8', 'latin-1']
+
+PROBE_SIZE = 64 * 1024  # Bytes decoded to rule out an encoding before decoding the whole file
+
+NEWLINE_NAMES = {'\n': "LF", '\r\n': "CRLF", '\r': "CR", None: "LF"}
+
+# Compression formats by magic bytes, and the stream class reading and writing each
+COMPRESSIONS = [
+    (b"\x1f\x8b", 'gzip', gzip.GzipFile),
+    (b"BZh", 'bz2', bz2.BZ2File),
+    (b"\xfd7zXZ\x00", 'xz', lzma.LZMAFile),
+]
+COMPRESSION_EXTENSIONS = {'.gz': 'gzip', '.bz2': 'bz2', '.xz': 'xz'}
+STREAM_CHUNK = 1024 * 1024  # Decompressed bytes decoded at a time
+# Decompressed copies of files too large for the editor, not the system temp directory (often in RAM)
+DECOMPRESS_DIR = os.path.join(os.path.expanduser("~"), ".tne_cache", "decompressed")
+
+BINARY_SNIFF_SIZE = 8 * 1024  # Bytes checked for NULs and control characters
+BINARY_CONTROL_RATIO = 0.1    # Above this share of control characters a file is binary
+# Control bytes that do appear in text: backspace, tab, line feed, form feed, carriage return, escape
+TEXT_CONTROLS = b"\b\t\n\f\r\x1b"
+CONTROL_BYTES = bytes(byte for byte in range(32) if byte not in TEXT_CONTROLS) + b"\x7f"
+
+
+class DocumentTooLarge(ValueError):
+    """Raised by read_document() when a compressed file decompresses past max_size"""
+
+
+class DecompressCancelled(Exception):
+    """Raised by decompress_to_temp() when the caller cancels it"""
+
+
+class DocumentInfo:
+    """
+    Format details of the open document, used to write it back unchanged.
+
+    Attributes:
+        encoding: The codec the file was decoded with
+        newline: The line-ending style ('\\n', '\\r\\n' or '\\r'), or None for
+            the platform default. The editor always holds '\\n', the value is
+            passed to open() to translate them back on save.
+        size: Bytes of the file the editor holds exactly, or None once the
+            text was edited (used to resume reading a growing file)
+        compression: 'gzip', 'bz2' or 'xz' for a compressed file, saved back
+            through the same compressor, or None
+    """
+
+    def __init__(self, encoding='utf-8', newline=None, compression=None):
+        self.encoding = encoding
+        self.newline = newline
+        self.compression = compression
+        self.size = None
+
+    def reset(self):
+        """Forget the details of the previous document"""
+        self.encoding = 'utf-8'
+        self.newline = None
+        self.compression = None
+        self.size = None
+
+    def describe(self):
+        """Return a short description for the status bar, e.g. "UTF-8 | CRLF" """
+        description = f"{self.encoding.upper()} | {NEWLINE_NAMES.get(self.newline, 'LF')}"
+        if self.compression is not None:
+            description += f" | {self.compression.upper()}"
+        return description
+
+
+def detect_compression(prefix):
+    """Return the compression format announced by a file's first bytes, or None"""
+    for magic, compression, _ in COMPRESSIONS:
+        if prefix.startswith(magic):
+            return compression
+    return None
+
+
+def compression_for_path(path):
+    """Return the compression format implied by a file name's extension, or None"""
+    return COMPRESSION_EXTENSIONS.get(os.path.splitext(path)[1].lower())
+
+
+def sniff_compression(path):
+    """Return the compression format of a file, or None"""
+    with open(path, 'rb') as f:
+        return detect_compression(f.read(8))
+
+
+def wrap_stream(fileobj, compression, mode='rb'):
+    """Wrap a binary file object in a (de)compressing stream, closing it leaves fileobj open"""
+    if compression == 'gzip':
+        return gzip.GzipFile(fileobj=fileobj, mode=mode)
+    for _, name, stream_class in COMPRESSIONS:
+        if name == compression:
+            return stream_class(fileobj, mode=mode)
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def open_stream(path, compression):
+    """Open a compressed file for reading its decompressed bytes"""
+    for _, name, stream_class in COMPRESSIONS:
+        if name == compression:
+            return stream_class(path, 'rb')
+    raise ValueError(f"Unknown compression: {compression}")
+
+
+def decompressed_size_hint(path, compression):
+    """
+    Return a lower bound of a compressed file's decompressed size, without decompressing it.
+
+    Only gzip records the size, modulo 4 GB, in its last 4 bytes. For a file of
+    several gzip members it is the last member's size, so never more than the
+    real size. Returns 0 when nothing is known.
+    """
+    if compression != 'gzip':
+        return 0
+    try:
+        with open(path, 'rb') as f:
+            f.seek(-4, os.SEEK_END)
+            return struct.unpack("<I", f.read(4))[0]
+    except (OSError, struct.error):
+        return 0
+
+
+def decompress_to_temp(path, compression, chunk_size=STREAM_CHUNK, cancel_event=None, progress=None,
+                       directory=None):
+    """
+    Decompress a file into a temporary file, chunk by chunk.
+
+    Used to page a compressed file that is too large for the editor in the
+    memory-mapped viewer. The caller deletes the temporary file.
+
+    Args:
+        cancel_event (threading.Event): Stops the decompression when set.
+        progress (callable): Called as progress(fraction) after each chunk, the
+            share of the compressed file read so far.
+        directory (str): Where the temporary file goes, DECOMPRESS_DIR by default.
+
+    Returns:
+        str: The path of the temporary file.
+
+    Raises:
+        DecompressCancelled: If cancel_event was set, the temporary file is removed.
+    """
+    directory = DECOMPRESS_DIR if directory is None else directory
+    os.makedirs(directory, exist_ok=True)
+    fd, temp_path = tempfile.mkstemp(prefix="tne-", suffix=".decompressed", dir=directory)
+    try:
+        total = os.path.getsize(path) or 1
+        with os.fdopen(fd, 'wb') as out, open(path, 'rb') as raw, wrap_stream(raw, compression) as stream:
+            while True:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise DecompressCancelled(path)
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                out.write(chunk)
+                if progress is not None:
+                    progress(min(raw.tell() / total, 1.0))
+    except BaseException:
+        os.remove(temp_path)
+        raise
+    return temp_path
+
+
+class Decompressor:
+    """
+    Decompresses a file into a temporary file on a background thread.
+
+    Like lineindex.IndexBuilder, the result is handed back through a queue and
+    delivered by poll(), which the caller runs from the Tk event loop.
+
+    Attributes:
+        path: The compressed file
+        compression: Its compression format
+        fraction: Share of the compressed file read so far, from 0.0 to 1.0
+    """
+
+    def __init__(self, path, compression, callback, directory=None):
+        """
+        Args:
+            path (str): The file to decompress.
+            compression (str): 'gzip', 'bz2' or 'xz'.
+            callback (callable): Called as callback(temp_path, error) by poll() once
+                done. The callback owns the temporary file and deletes it.
+            directory (str): Where the temporary file goes, DECOMPRESS_DIR by default.
+        """
+        self.path = path
+        self.compression = compression
+        self.callback = callback
+        self.directory = directory
+        self.fraction = 0.0
+        self._results = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="TNE-Decompress", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            temp_path = decompress_to_temp(self.path, self.compression, cancel_event=self._cancel,
+                                           progress=self._progress, directory=self.directory)
+            self._results.put((temp_path, None))
+        except DecompressCancelled:
+            pass
+        except Exception as e:
+            self._results.put((None, e))
+        if self._cancel.is_set():
+            self._discard()  # Cancelled while the last chunk was written
+
+    def _progress(self, fraction):
+        self.fraction = fraction
+
+    def done(self):
+        """Return True once the thread finished"""
+        return not self._thread.is_alive()
+
+    def poll(self):
+        """Deliver the result if it is ready, returns True once it was delivered"""
+        if self._cancel.is_set():
+            self._discard()
+            return False
+        try:
+            temp_path, error = self._results.get_nowait()
+        except queue.Empty:
+            return False
+        self.callback(temp_path, error)
+        return True
+
+    def cancel(self):
+        """Stop decompressing, the callback is not called and the temporary file is removed"""
+        self._cancel.set()
+        self._discard()
+
+    def _discard(self):
+        """Remove the temporary file of a result that will not be delivered"""
+        while True:
+            try:
+                temp_path, _ = self._results.get_nowait()
+            except queue.Empty:
+                return
+            if temp_path is not None:
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+
+
+def detect_bom(data):
+    """Return the encoding announced by a byte order mark, or None"""
+    for bom, encoding in BOMS:
+        if data.startswith(bom):
+            return encoding
+    return None
+
+
+def encoding_bom(encoding):
+    """Return the byte order mark to skip when reading and to write when saving, b"" if the codec does it"""
+    return EXPLICIT_BOMS.get(encoding, b"")
+
+
+def _probe(data, encoding, probe_size):
+    """Return False if the first probe_size bytes cannot be decoded with encoding"""
+    decoder = codecs.getincrementaldecoder(encoding)()
+    try:
+        # final=False so a multi-byte character cut by the probe boundary is fine
+        decoder.decode(data[:probe_size], final=False)
+        return True
+    except UnicodeDecodeError:
+        return False
+
+
+def sniff_encoding(prefix):
+    """
+    Guess the encoding of a file from its first bytes only.
+
+    Used for files too large to decode whole. The guess may be wrong if the
+    first non-UTF-8 byte comes after the prefix, decoding then uses errors='replace'.
+
+    Args:
+        prefix (bytes): The start of the file.
+
+    Returns:
+        str: The encoding name.
+    """
+    encoding = detect_bom(prefix)
+    if encoding is not None:
+        return encoding
+    for encoding in ENCODINGS:
+        if _probe(prefix, encoding, len(prefix)):
+            return encoding
+    return 'utf-8'
+
+
+def is_ascii_compatible(encoding):
+    """Return True if line breaks are single b'\\n' bytes in this encoding"""
+    return not codecs.lookup(encoding).name.startswith(('utf-16', 'utf-32'))
+
+
+def is_binary(prefix):
+    """
+    Return True if a file's first bytes look like binary data rather than text.
+
+    Text in UTF-16/32 is full of NUL bytes, so files with those byte order
+    marks are text. Otherwise any NUL, or too many other control characters,
+    means binary.
+    """
+    if not prefix:
+        return False
+    encoding = detect_bom(prefix)
+    if encoding is not None:
+        return False
+    if b"\x00" in prefix:
+        return True
+    controls = len(prefix) - len(prefix.translate(None, CONTROL_BYTES))
+    return controls / len(prefix) > BINARY_CONTROL_RATIO
+
+
+def sniff_binary(path, sniff_size=BINARY_SNIFF_SIZE):
+    """Return True if a file looks binary, compressed files are judged by their content"""
+    with open(path, 'rb') as f:
+        prefix = f.read(sniff_size)
+    compression = detect_compression(prefix)
+    if compression is not None:
+        try:
+            with open_stream(path, compression) as stream:
+                prefix = stream.read(sniff_size)
+        except (OSError, EOFError, lzma.LZMAError):
+            return True  # Looks compressed but is not, treat it as binary
+    return is_binary(prefix)
+
+
+def decode_bytes(data, probe_size=PROBE_SIZE):
+    """
+    Decode file contents, trying each candidate encoding on the in-memory buffer.
+
+    Args:
+        data (bytes): The raw file contents.
+        probe_size (int): Prefix size checked before attempting a full decode.
+
+    Returns:
+        tuple: (text, encoding)
+    """
+    encoding = detect_bom(data)
+    if encoding is not None:
+        return data[len(encoding_bom(encoding)):].decode(encoding, errors='replace'), encoding
+    for encoding in ENCODINGS:
+        if not _probe(data, encoding, probe_size):
+            continue
+        try:
+            return data.decode(encoding), encoding
+        except UnicodeDecodeError:
+            continue  # Failed past the probed prefix
+    return data.decode('utf-8', errors='replace'), 'utf-8'
+
+
+def detect_newline(text):
+    """Return the line-ending style of the first line break, or None if there is none"""
+    lf = text.find('\n')
+    cr = text.find('\r')
+    if cr == -1:
+        return '\n' if lf != -1 else None
+    if lf == cr + 1:
+        return '\r\n'
+    if lf == -1 or cr < lf:
+        return '\r'
+    return '\n'
+
+
+def normalize_newlines(text):
+    """Convert every line ending, '\\r\\n', '\\r' or '\\n', to the '\\n' the Text widget uses"""
+    if '\r' not in text:
+        return text
+    return text.replace('\r\n', '\n').replace('\r', '\n')
+
+
+def _decode_stream(path, compression, encoding, errors, max_size, chunk_size):
+    """
+    Decompress and decode a file chunk by chunk.
+
+    Returns:
+        tuple: (chunks of text with '\\n' line endings, line-ending style, decompressed size)
+    """
+    decoder = codecs.getincrementaldecoder(encoding)(errors=errors)
+    # Keeps a '\r' ending a chunk until it knows whether a '\n' follows
+    newlines = io.IncrementalNewlineDecoder(None, translate=True)
+    pieces = []
+    newline = None
+    tail = ""  # The last character decoded, while the line-ending style is not known
+    with open_stream(path, compression) as stream:
+        size = len(stream.read(len(encoding_bom(encoding))))
+        while True:
+            chunk = stream.read(chunk_size)
+            final = not chunk
+            size += len(chunk)
+            if max_size is not None and size > max_size:
+                raise DocumentTooLarge(f"{path} decompresses to more than {max_size} bytes")
+            text = decoder.decode(chunk, final=final)
+            if newline is None and (text or final):
+                probe = tail + text
+                newline = detect_newline(probe)
+                if newline == '\r' and probe.find('\r') == len(probe) - 1 and not final:
+                    newline = None  # May be the first half of a '\r\n'
+                tail = probe[-1:]
+            text = newlines.decode(text, final=final)
+            if text:
+                pieces.append(text)
+            if final:
+                return pieces, newline, size
+
+
+def read_compressed(path, compression, max_size=None, chunk_size=STREAM_CHUNK):
+    """
+    Decompress and decode a compressed file without holding the decompressed bytes.
+
+    The encoding is chosen on the first decompressed chunk like for plain files.
+    If a later chunk fails to decode, the stream is read again with the next encoding.
+    The text is returned in the decoded chunks, never joined into one string.
+
+    Returns:
+        tuple: (chunks of text with '\\n' line endings, encoding, line-ending style, decompressed size)
+    """
+    with open_stream(path, compression) as stream:
+        prefix = stream.read(PROBE_SIZE)
+    encoding = detect_bom(prefix)
+    if encoding is not None:
+        candidates = [(encoding, 'replace')]
+    else:
+        candidates = [(encoding, 'strict') for encoding in ENCODINGS if _probe(prefix, encoding, len(prefix))]
+        candidates.append(('utf-8', 'replace'))
+    for encoding, errors in candidates:
+        try:
+            pieces, newline, size = _decode_stream(path, compression, encoding, errors, max_size, chunk_size)
+            return pieces, encoding, newline, size
+        except UnicodeDecodeError:
+            continue  # Failed past the probed prefix
+
+
+def read_document(path, document=None, max_size=None, chunked=False):
+    """
+    Read a file once and decode it for the editor.
+
+    Compressed files are decompressed and decoded as a stream, the compression
+    is recorded so saving writes them back compressed. Every line ending is
+    converted to '\\n', the style of the first one is recorded for saving.
+
+    Args:
+        path (str): The file to read.
+        document (DocumentInfo): Updated with the detected encoding, line endings and compression.
+        max_size (int): For compressed files, raise DocumentTooLarge once the
+            decompressed data passes this many bytes.
+        chunked (bool): Return the text as a list of chunks, so a compressed
+            file's decoded chunks are not joined into a second copy.
+
+    Returns:
+        str: The decoded text with '\\n' line endings, or a list of str if chunked.
+    """
+    with open(path, 'rb') as f:
+        compression = detect_compression(f.read(8))
+        if compression is None:
+            f.seek(0)
+            data = f.read()
+    if compression is None:
+        size = len(data)
+        text, encoding = decode_bytes(data)
+        del data
+        newline = detect_newline(text)
+        pieces = [normalize_newlines(text)]
+        del text
+    else:
+        pieces, encoding, newline, size = read_compressed(path, compression, max_size)
+    if document is not None:
+        document.encoding = encoding
+        document.newline = newline
+        document.compression = compression
+        document.size = size if compression is None else None
+    return pieces if chunked else "".join(pieces)
@@ -4,13 +4,99 @@
     Class: CSCI 3366 - Programming Languages
 """
 import tkinter as tk
+from tkinter import messagebox
 from notepad import NotePad
+import file
+import autosave
+import journal
 import atexit
+import hashlib
+import time
 
 # Global variables
 app = None
 is_running = True
-last_content = ""  # Store the last known content
+last_content = ""  # Store the last known content, None for documents streamed on save
+last_content_length = 0  # Characters in the buffer at the last fingerprint
+is_dirty = False  # Set by the <<Modified>> event, cleared once the buffer is saved
+last_saved_fingerprint = None  # (path, fingerprint) of the last content written
+saves_performed = 0
+saves_skipped = 0
+saves_journaled = 0
+saves_deferred = 0  # Scheduler polls where no save was due yet
+save_cycle = 0  # Incremented by each scheduled save, a write only reports its latency to its own cycle
+scheduler = autosave.AutoSaveScheduler()  # Decides when the next auto-save runs
+
+def content_fingerprint(content):
+    """Return a cheap fingerprint used to detect unchanged content"""
+    return (len(content), hash(content))
+
+def buffer_fingerprint():
+    """
+    Fingerprint the buffer for the unchanged-content check.
+
+    Documents over file.STREAM_SAVE_LIMIT characters are hashed chunk by chunk
+    and not kept in last_content, the save then streams them from the widget.
+    """
+    global last_content, last_content_length
+    if file.text_length(app.message_box) <= file.STREAM_SAVE_LIMIT:
+        update_content()
+        last_content_length = len(last_content)
+        return content_fingerprint(last_content)
+    last_content = None
+    digest = hashlib.blake2b(digest_size=16)
+    length = 0
+    for chunk in file.iter_text_chunks(app.message_box):
+        digest.update(chunk.encode('utf-8', errors='surrogatepass'))
+        length += len(chunk)
+    last_content_length = length
+    return (length, digest.hexdigest())
+
+def on_modified(event=None):
+    """Record that the buffer changed and re-arm the Text widget's modified flag"""
+    global app, is_dirty
+    try:
+        if app and app.message_box.edit_modified():
+            is_dirty = True
+            scheduler.note_dirty()
+            app.message_box.edit_modified(False)
+    except tk.TclError:
+        pass  # Widget has been destroyed
+
+def autosave_stats():
+    """Return the auto-save counters and the scheduler state (effective interval, last cost, ...)"""
+    return {"performed": saves_performed, "skipped": saves_skipped,
+            "journaled": saves_journaled, "deferred": saves_deferred, "dirty": is_dirty,
+            "scheduler": scheduler.status()}
+
+def on_autosave_written(cycle, latency):
+    """Feed the latency of an auto-save's own write back to the scheduler and show the new interval"""
+    if cycle != save_cycle:
+        return  # A later auto-save already measured its own cost
+    scheduler.note_write_latency(latency)
+    try:
+        if app and hasattr(app, 'status_bar') and app.root.winfo_exists():
+            app.status_bar.config(text=f"Auto-saved ({latency * 1000:.1f} ms), "
+                                       f"next auto-save in {scheduler.effective_interval():.1f} s or more")
+    except tk.TclError:
+        pass  # Widget has been destroyed
+
+def run_scheduled_save():
+    """Run an auto-save if the scheduler says one is due, and feed its cost back"""
+    global saves_deferred, save_cycle
+    if not scheduler.should_save():
+        saves_deferred += 1  # Not a skipped save, "skipped" counts saves of a clean buffer
+        return False
+    save_cycle += 1
+    start = time.perf_counter()
+    saved = save_if_dirty()
+    # Streamed saves write on the main loop and are measured here, queued
+    # writes report their latency later through on_autosave_written()
+    cost = time.perf_counter() - start
+    scheduler.note_saved(cost, last_content_length or None)
+    if is_dirty:
+        scheduler.note_dirty()  # The save failed, retry after the back-off
+    return saved
 
 def save_notes():
     """Save notes if there's an active file"""
@@ -19,12 +105,60 @@ def save_notes():
         if (is_running and app and hasattr(app, 'current_file') and 
             app.current_file[0] and hasattr(app, 'root') and 
             app.root.winfo_exists()):
-            app.save_file(last_content)
+            cycle = save_cycle
+            app.save_file(last_content, autosave=True,
+                          on_written=lambda latency: on_autosave_written(cycle, latency))
+            return True
     except tk.TclError:
         # Widget has been destroyed, stop trying to save
         is_running = False
     except Exception as e:
         print(f"Error during auto-save: {str(e)}")
+    return False
+
+def save_if_dirty():
+    """
+    Save the buffer only when it changed since the last save.
+
+    The buffer is not copied while the document is clean. Edits are appended
+    to the document's journal while it is small, and the whole file is only
+    rewritten once the journal passes its limit. The write is skipped when the
+    content fingerprint matches the last saved one.
+
+    Returns:
+        bool: True if a save was performed or journaled, False if it was skipped.
+    """
+    global app, is_dirty, is_running, last_saved_fingerprint, saves_performed, saves_skipped, saves_journaled
+    if not is_dirty:
+        saves_skipped += 1
+        return False
+    if not (app and app.current_file[0]):
+        saves_skipped += 1
+        return False
+    if app.is_read_only():
+        is_dirty = False  # Paging the large file viewer is not an edit
+        saves_skipped += 1
+        return False
+    if is_running and app.journal_autosave():
+        is_dirty = False
+        saves_journaled += 1
+        return True
+    try:
+        fingerprint = (app.current_file[0], buffer_fingerprint())
+    except tk.TclError:
+        is_running = False  # Widget has been destroyed
+        return False
+    is_dirty = False
+    if fingerprint == last_saved_fingerprint:
+        app.discard_journal()  # The file already holds this content
+        saves_skipped += 1
+        return False
+    if save_notes():
+        last_saved_fingerprint = fingerprint
+        saves_performed += 1
+        return True
+    is_dirty = True  # Keep the changes pending so the next cycle retries
+    return False
 
 def update_content():
     """Update the last known content"""
@@ -32,28 +166,53 @@ def update_content():
     try:
         if (is_running and app and hasattr(app, 'message_box') and 
             hasattr(app, 'root') and app.root.winfo_exists()):
-            last_content = app.message_box.get('1.0', tk.END)
+            last_content = app.message_box.get('1.0', 'end-1c')
     except tk.TclError:
         # Widget has been destroyed
         is_running = False
     except Exception:
         pass  # Ignore errors during content update
 
+def offer_recovery(app):
+    """Offer to replay the journal of a document left unsaved by a crashed session"""
+    for doc_path, swap_path in journal.find_leftover_journals():
+        try:
+            header, records = journal.read_journal(swap_path)
+        except (OSError, ValueError):
+            journal.remove_leftover(doc_path)
+            continue
+        message = f"Unsaved changes to {doc_path} were found ({len(records)} edits).\n"
+        if not journal.base_matches(doc_path, header):
+            message += "The file was modified since, replaying may not give the expected result.\n"
+        message += "\nRecover them? Choose No to discard them, Cancel to decide later."
+        answer = messagebox.askyesnocancel("Recover unsaved changes", message, parent=app.root)
+        if answer is None:
+            continue
+        if answer:
+            app.recover_journal(doc_path, swap_path)
+            return  # Only one document can be open
+        journal.remove_leftover(doc_path)
+
 def cleanup():
     """Handle cleanup when the application exits"""
     global app, is_running
     is_running = False
     try:
-        save_notes()
+        if is_dirty:
+            save_notes()
+        if app:
+            app.close()
     except Exception as e:
         print(f"Error during cleanup: {str(e)}")
 
 def on_closing(root):
     """Handle window closing event"""
     global is_running
+    on_modified()  # Pick up an edit whose <<Modified>> event is still queued
+    save_if_dirty()  # Capture and save the final content
     is_running = False
-    update_content()  # Capture the final content
-    save_notes()
+    if app:
+        app.close()  # Wait for the background writer before the window goes away
     root.destroy()
 
 def main():
@@ -74,15 +233,24 @@ def main():
     root.configure(bg="#1e1e1e")
     app = NotePad(root)
 
+    # Track edits through the Text widget's modified flag
+    app.message_box.edit_modified(False)
+    app.message_box.bind("<<Modified>>", on_modified, add="+")
+
+    # Typing postpones auto-save until the keyboard is idle
+    app.message_box.bind("<KeyPress>", lambda event: scheduler.note_activity(), add="+")
+
+    # Replay the journal of a session that did not exit cleanly
+    offer_recovery(app)
+
     def auto_save():
         """Recursive function to handle auto-saving"""
         global is_running
         if is_running:
             try:
-                update_content()  # Update content before saving
-                save_notes()
+                run_scheduled_save()  # Skips the buffer copy and the write when clean
                 if is_running:  # Check again in case status changed during save
-                    root.after(1000, auto_save)
+                    root.after(int(scheduler.next_delay() * 1000), auto_save)
             except tk.TclError:
                 # Widget destroyed, stop auto-save
                 is_running = False
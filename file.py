@@ -5,13 +5,24 @@
 """
 import tkinter as tk
 from tkinter import filedialog
+import saver
+import document as document_loader
+import viewer
+
+STREAM_SAVE_LIMIT = 8 * 1024 * 1024  # Larger documents are streamed from the widget when saved
+STREAM_CHUNK_LINES = 4096            # Lines copied out of the widget at a time
 
 """
     This module provides functions to create, open, and save files using a Tkinter-based text editor.
         new_file(message_box, current_file): Clears the content of the message box and resets the current file reference.
-        save_file(message_box, current_file): Saves the content of the message box to the specified file.
-        save_file_as(message_box, current_file): Prompts the user to save the content of a message box to a file.
-        open_file(message_box, current_file): Opens a file dialog to select a file, reads its contents, and displays the contents in the provided message box.
+        save_file(message_box, current_file, content=None, writer=None): Saves the content of the message box to the specified file.
+        text_length(message_box): Returns the number of characters in the message box without copying them.
+        iter_text_chunks(message_box, lines_per_chunk=STREAM_CHUNK_LINES): Yields the content of the message box in line-range chunks.
+        stream_save(message_box, path, writer=None, callback=None, **options): Writes the message box to a file chunk by chunk.
+        save_file_as(message_box, current_file, target_path=None, writer=None): Prompts the user to save the content of a message box to a file.
+        insert_content(message_box, content): Replaces the content of the message box in a single insert.
+        open_file(message_box, current_file, file_path=None, document=None, insert_func=insert_content, large_file_func=None, binary_func=None): Opens a file dialog to select a file, reads its contents, and displays the contents in the provided message box.
+        load_path(message_box, current_file, file_path, document=None, insert_func=insert_content, large_file_func=None, binary_func=None): Loads a file like open_file, raising errors to the caller.
 """
 
 def new_file(message_box, current_file):
@@ -25,29 +36,112 @@ def new_file(message_box, current_file):
     message_box.delete("1.0", "end")
     current_file[0] = None
 
-def save_file(message_box, current_file, content=None):
+def text_length(message_box):
+    """
+    Count the characters in the message box without copying its text.
+
+    Args:
+        message_box (tk.Text): The text widget to measure.
+
+    Returns:
+        int: The number of characters, the widget's final newline excluded.
+    """
+    count = message_box.count("1.0", "end-1c", "chars")
+    if not count:
+        return 0  # Tk returns nothing for an empty range
+    return int(count[0]) if isinstance(count, tuple) else int(count)
+
+def iter_text_chunks(message_box, lines_per_chunk=STREAM_CHUNK_LINES):
+    """
+    Yield the content of the message box in line-range chunks.
+
+    Joined together the chunks equal message_box.get("1.0", "end-1c"), but only
+    one chunk is held at a time.
+
+    Args:
+        message_box (tk.Text): The text widget to read.
+        lines_per_chunk (int): Lines copied out of the widget per chunk.
+    """
+    last_line = int(message_box.index("end-1c").split('.')[0])
+    for first in range(1, last_line + 1, lines_per_chunk):
+        following = first + lines_per_chunk
+        end = f"{following}.0" if following <= last_line else "end-1c"
+        yield message_box.get(f"{first}.0", end)
+
+def save_file(message_box, current_file, content=None, writer=None, callback=None, fsync=saver.SAVE_FSYNC,
+              document=None):
     """
     Saves the content of the message box to the specified file.
 
     Args:
         message_box (tk.Text): The text widget containing the message to be saved.
         current_file (list): A list where the first element is the path to the current file.
-        content (str): The content to be saved. If None, the content of the message box will be used.
+        content (str): The content to be saved. If None, the content of the message box will be used;
+            documents over STREAM_SAVE_LIMIT characters are then streamed to disk in chunks
+            on the calling thread instead of being copied into one string.
+        writer (saver.BackgroundWriter): If given, the write is queued on the writer thread instead
+            of blocking the caller.
+        callback (callable): Called as callback(path, error, latency) once the write finished.
+        fsync (str): The durability policy, see saver.FSYNC_POLICIES.
+        document (document.DocumentInfo): If given, the file is written back in the document's
+            encoding and line-ending style (and compression) instead of UTF-8 with '\\n'.
 
     Returns:
-        bool: True if the file was saved successfully, False otherwise.
+        bool: True if the file was saved (or queued) successfully, False otherwise.
     """
     try:
+        encoding = document.encoding if document is not None else 'utf-8'
+        newline = document.newline if document is not None else ''
+        compression = document.compression if document is not None else None
+        if content is None and text_length(message_box) > STREAM_SAVE_LIMIT:
+            return stream_save(message_box, current_file[0], writer, callback, encoding=encoding,
+                               newline=newline, fsync=fsync, compression=compression)
         if content is None:
             content = message_box.get("1.0", "end-1c")
-        with open(current_file[0], 'w', encoding='utf-8', newline='') as f:
-            f.write(content)
+        if writer is not None:
+            writer.submit(current_file[0], content, callback, encoding=encoding, newline=newline, fsync=fsync,
+                          compression=compression)
+        else:
+            saver.atomic_write(current_file[0], content, encoding=encoding, newline=newline, fsync=fsync,
+                               compression=compression)
         return True
     except Exception as e:
         print(f"Error saving file: {e}")
         return False
 
-def save_file_as(message_box, current_file, target_path=None):
+def stream_save(message_box, path, writer=None, callback=None, **options):
+    """
+    Write the message box to a file chunk by chunk, encoding each chunk as it goes.
+
+    The widget can only be read from the Tk thread, so the write happens here
+    rather than on the writer thread.
+
+    Args:
+        message_box (tk.Text): The text widget to save.
+        path (str): The file to write.
+        writer (saver.BackgroundWriter): Drained first, so an older queued snapshot
+            cannot land on top of this save.
+        callback (callable): Called as callback(path, error, latency) once written.
+        **options: encoding, newline, fsync and compression, passed to saver.atomic_write_chunks.
+
+    Returns:
+        bool: True if the file was saved.
+    """
+    if writer is not None:
+        writer.flush()
+    try:
+        latency = saver.atomic_write_chunks(path, iter_text_chunks(message_box), **options)
+    except Exception as e:
+        if callback is None:
+            raise
+        callback(path, e, None)
+        return False
+    if callback is not None:
+        callback(path, None, latency)
+    return True
+
+def save_file_as(message_box, current_file, target_path=None, writer=None, callback=None,
+                 fsync=saver.SAVE_FSYNC, document=None):
     """
     Save the current file as a new file
 
@@ -55,6 +149,10 @@ def save_file_as(message_box, current_file, target_path=None):
         message_box (tk.Text): The text widget containing the message to be saved.
         current_file (list): A list containing the current file path as its first element.
         target_path (str): The path to save the file. If None, a file dialog will be opened.
+        writer (saver.BackgroundWriter): If given, the write is queued on the writer thread.
+        callback (callable): Passed to the writer, called as callback(path, error, latency) once the write finished.
+        fsync (str): The durability policy, see saver.FSYNC_POLICIES.
+        document (document.DocumentInfo): The encoding and line endings to write with.
 
     Returns:
         bool: True if the file was saved successfully, False otherwise.
@@ -65,15 +163,28 @@ def save_file_as(message_box, current_file, target_path=None):
                                                     filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
         if target_path:
             current_file[0] = target_path
-            content = message_box.get("1.0", "end-1c")
-            with open(target_path, 'w', encoding='utf-8', newline='') as f:
-                f.write(content)
-            return True
+            if document is not None:
+                # Compress only if the new name asks for it
+                document.compression = document_loader.compression_for_path(target_path)
+            return save_file(message_box, current_file, writer=writer, callback=callback, fsync=fsync,
+                             document=document)
     except Exception as e:
         print(f"Error saving file: {e}")
     return False
 
-def open_file(message_box, current_file, file_path=None):
+def insert_content(message_box, content):
+    """
+    Replace the content of the message box in a single insert.
+
+    Args:
+        message_box (tk.Text): The text widget to fill.
+        content (str or list): The text to display, or its chunks in order.
+    """
+    message_box.delete("1.0", tk.END)
+    message_box.insert("1.0", content if isinstance(content, str) else "".join(content))
+
+def open_file(message_box, current_file, file_path=None, document=None, insert_func=insert_content,
+              large_file_func=None, binary_func=None):
     """
     Open a file and load its contents into the text box
 
@@ -81,6 +192,15 @@ def open_file(message_box, current_file, file_path=None):
         message_box (tk.Text): The text widget where the file contents will be displayed.
         current_file (list): A list where the first element will store the path to the opened file.
         file_path (str): The path to the file to be opened. If None, a file dialog will be opened.
+        document (document.DocumentInfo): Updated with the detected encoding, line endings and compression.
+        insert_func (callable): Called as insert_func(message_box, content) to display the
+            text, e.g. to stream large files in progressively. content is the list of
+            chunks the text was decoded in, see document.read_document(chunked=True).
+        large_file_func (callable): Called as large_file_func(file_path) instead of reading
+            files of viewer.LARGE_FILE_THRESHOLD or more (compressed files: once decompressed).
+            Returns False to fall back to a normal load.
+        binary_func (callable): Called as binary_func(file_path) instead of decoding files
+            that look binary (see document.sniff_binary). Returns False to decode anyway.
 
     Returns:
         bool: True if the file was opened successfully, False otherwise.
@@ -89,29 +209,43 @@ def open_file(message_box, current_file, file_path=None):
         if file_path is None:
             file_path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
         if file_path:
-            current_file[0] = file_path
-            
-            # Try different encodings
-            content = None
-            encodings = ['utf-8', 'latin-1', 'cp1252', 'ascii', 'utf-16']
-            
-            for encoding in encodings:
-                try:
-                    with open(file_path, 'r', encoding=encoding, newline='') as f:
-                        content = f.read()
-                    break
-                except UnicodeDecodeError:
-                    continue
-            
-            # If all text encodings fail, read as binary and decode with error replacement
-            if content is None:
-                with open(file_path, 'rb') as f:
-                    raw_content = f.read()
-                    content = raw_content.decode('utf-8', errors='replace')
-            
-            message_box.delete("1.0", tk.END)
-            message_box.insert("1.0", content)
+            load_path(message_box, current_file, file_path, document, insert_func, large_file_func, binary_func)
             return True
     except Exception as e:
         print(f"Error opening file: {e}")
     return False
+
+def _announces_large_file(file_path):
+    """Return True if a compressed file's header or trailer says it decompresses past the viewer threshold"""
+    compression = document_loader.sniff_compression(file_path)
+    if compression is None:
+        return False
+    return document_loader.decompressed_size_hint(file_path, compression) >= viewer.LARGE_FILE_THRESHOLD
+
+def load_path(message_box, current_file, file_path, document=None, insert_func=insert_content,
+              large_file_func=None, binary_func=None):
+    """
+    Load a file into the text box, or hand it to binary_func or large_file_func.
+
+    Same arguments as open_file(), but errors are raised to the caller.
+    """
+    if binary_func is not None and document_loader.sniff_binary(file_path):
+        if binary_func(file_path):
+            current_file[0] = file_path
+            return
+    if large_file_func is not None and (viewer.is_large_file(file_path) or _announces_large_file(file_path)):
+        if large_file_func(file_path):
+            current_file[0] = file_path
+            return
+    try:
+        # Read once, detect the encoding and line endings on the bytes in memory
+        max_size = viewer.LARGE_FILE_THRESHOLD if large_file_func is not None else None
+        content = document_loader.read_document(file_path, document, max_size=max_size, chunked=True)
+    except document_loader.DocumentTooLarge:
+        # A compressed file that only turned out too large while decompressing
+        if large_file_func(file_path):
+            current_file[0] = file_path
+            return
+        content = document_loader.read_document(file_path, document, chunked=True)
+    current_file[0] = file_path
+    insert_func(message_box, content)
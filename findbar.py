@@ -0,0 +1,437 @@
+"""
+    Group: TAMUSA Notepad Experts (TNE)
+    Authors: Joshua Ludolf & Luis Morales
+    Class: CSCI 3366 - Programming Languages
+
+    Find and replace module for the TAMUSA Notepad application.
+    A find bar under the editor that searches as you type. Matches are
+    highlighted only in the visible lines plus a margin, and Replace All
+    rewrites the buffer in a single edit, so very large documents stay
+    responsive.
+"""
+
+import contextlib
+import re
+import time
+import tkinter as tk
+import findfiles
+import textwatch
+
+CHUNK_LINES = 10000      # Lines fetched from the widget at a time while searching
+HIGHLIGHT_MARGIN = 100   # Lines highlighted above and below the visible ones
+WATCH_INTERVAL = 150     # Milliseconds between two checks for a scrolled view
+
+MATCH_TAG = "find_match"
+CURRENT_TAG = "find_current"
+
+
+def line_col(text, offset, first_line=1):
+    """
+    Return the Text widget index ("line.column") of a character offset in text.
+
+    text starts at column 0 of first_line. The column is in Tk index units,
+    which differ from Python offsets after an emoji on Tk 8.6.
+    """
+    line = first_line + text.count("\n", 0, offset)
+    line_start = text.rfind("\n", 0, offset) + 1
+    return f"{line}.{textwatch.tk_length(text[line_start:offset])}"
+
+
+def first_match(pattern, text, start=0, end=None):
+    """Return the first non-empty match of pattern in text[start:end], or None"""
+    for match in pattern.finditer(text, start, len(text) if end is None else end):
+        if match.end() > match.start():
+            return match
+    return None
+
+
+def last_match(pattern, text, end=None):
+    """Return the last non-empty match of pattern ending at or before end, or None"""
+    end = len(text) if end is None else end
+    found = None
+    for match in pattern.finditer(text, 0, end):
+        if match.end() > match.start():
+            found = match
+    return found
+
+
+def replace_span(pattern, text, replacement, regex=False):
+    """
+    Replace every match of pattern in text, as one edit.
+
+    Only the part of text from the first to the last match changes, so the
+    edit is that span rather than the whole buffer.
+
+    Args:
+        replacement (str): The replacement, with \\1-style group references if regex is True.
+
+    Returns:
+        tuple: (start, end, new_text, replacements) where text[start:end] becomes
+            new_text, and replacements lists (offset from start, old, new) per match.
+            None if nothing matched.
+    """
+    pieces = []
+    replacements = []
+    start = position = None
+    for match in pattern.finditer(text):
+        if match.end() == match.start():
+            continue  # Empty matches are not found by the find bar either
+        if start is None:
+            start = match.start()
+        else:
+            pieces.append(text[position:match.start()])
+        new = match.expand(replacement) if regex else replacement
+        pieces.append(new)
+        replacements.append((match.start() - start, match.group(), new))
+        position = match.end()
+    if start is None:
+        return None
+    # Matched against the whole text, so anchors and lookarounds see the real context
+    return start, position, "".join(pieces), replacements
+
+
+def tk_replacements(text, start, replacements):
+    """Return replace_span()'s replacements with their offsets in Tk index units"""
+    converted = []
+    position = start
+    offset = 0
+    for match_offset, old, new in replacements:
+        offset += textwatch.tk_length(text[position:start + match_offset])
+        converted.append((offset, old, new))
+        offset += textwatch.tk_length(old)
+        position = start + match_offset + len(old)
+    return converted
+
+
+class FindBar:
+    """
+    An incremental find and replace bar for a Text widget.
+
+    Attributes:
+        text: The searched Text widget
+        visible: True while the bar is shown
+    """
+
+    def __init__(self, parent, text, status_func, read_only_func=None, undo_manager=None):
+        """
+        Args:
+            parent (tk.Widget): The widget the bar is packed into, under the text.
+            text (tk.Text): The widget to search.
+            status_func (callable): Shows a message, e.g. in the status bar.
+            read_only_func (callable): Returns True when replacing is not allowed.
+            undo_manager (undo.UndoManager): Records Replace All as its replacements only.
+        """
+        self.text = text
+        self.undo_manager = undo_manager
+        self.status_func = status_func
+        self.read_only_func = read_only_func or (lambda: False)
+        self.visible = False
+        self._anchor = "1.0"    # Where typing searches from, so the match grows in place
+        self._search_id = None
+        self._watch_id = None
+        self._highlighted = None  # (first line, pattern, region text) last highlighted
+        self.text.tag_configure(MATCH_TAG, background="#3e4451")
+        self.text.tag_configure(CURRENT_TAG, background="#c9a227", foreground="#1e1e1e")
+        self.text.tag_raise(CURRENT_TAG, MATCH_TAG)
+        self.frame = tk.Frame(parent, bg="#2d2d2d")
+        self._pack_before = getattr(text, "frame", text)  # A ScrolledText is packed by its frame
+        self.create_widgets()
+
+    def create_widgets(self):
+        entry_options = dict(font=("Cascadia Code", 10), bg="#1e1e1e", fg="#d4d4d4",
+                             insertbackground="#23c4a4", relief=tk.FLAT, bd=4)
+        button_options = dict(font=("Cascadia Code", 9), bg="#2d2d2d", fg="#23c4a4",
+                              activebackground="#3e3e3e", relief=tk.FLAT)
+        check_options = dict(font=("Cascadia Code", 9), bg="#2d2d2d", fg="#d4d4d4",
+                             selectcolor="#1e1e1e", activebackground="#3e3e3e",
+                             command=self._schedule_search)
+
+        self.find_var = tk.StringVar()
+        self.replace_var = tk.StringVar()
+        self.regex_var = tk.BooleanVar(value=False)
+        self.case_var = tk.BooleanVar(value=False)
+
+        tk.Label(self.frame, text="Find:", bg="#2d2d2d", fg="#d4d4d4",
+                 font=("Cascadia Code", 9)).grid(row=0, column=0, sticky="w", padx=(8, 4), pady=2)
+        self.find_entry = tk.Entry(self.frame, textvariable=self.find_var, **entry_options)
+        self.find_entry.grid(row=0, column=1, sticky="ew", pady=2)
+        tk.Button(self.frame, text="Next", command=self.find_next, **button_options).grid(row=0, column=2, padx=2)
+        tk.Button(self.frame, text="Previous", command=self.find_previous, **button_options).grid(row=0, column=3, padx=2)
+        tk.Checkbutton(self.frame, text="Regex", variable=self.regex_var, **check_options).grid(row=0, column=4)
+        tk.Checkbutton(self.frame, text="Match case", variable=self.case_var, **check_options).grid(row=0, column=5)
+        tk.Button(self.frame, text="✕", command=self.hide, **button_options).grid(row=0, column=6, padx=(2, 8))
+
+        tk.Label(self.frame, text="Replace:", bg="#2d2d2d", fg="#d4d4d4",
+                 font=("Cascadia Code", 9)).grid(row=1, column=0, sticky="w", padx=(8, 4), pady=2)
+        self.replace_entry = tk.Entry(self.frame, textvariable=self.replace_var, **entry_options)
+        self.replace_entry.grid(row=1, column=1, sticky="ew", pady=2)
+        tk.Button(self.frame, text="Replace", command=self.replace_one, **button_options).grid(row=1, column=2, padx=2)
+        tk.Button(self.frame, text="Replace All", command=self.replace_all, **button_options).grid(row=1, column=3, padx=2)
+        self.frame.grid_columnconfigure(1, weight=1)
+
+        self.find_var.trace_add('write', self._schedule_search)
+        for entry in (self.find_entry, self.replace_entry):
+            entry.bind("<Escape>", self.hide)
+        self.find_entry.bind("<Return>", self.find_next)
+        self.find_entry.bind("<Shift-Return>", self.find_previous)
+        self.replace_entry.bind("<Return>", self.replace_one)
+
+    def show(self, replace=False):
+        """Show the bar and focus its find (or replace) field, starting from the selection"""
+        try:
+            selected = self.text.get(tk.SEL_FIRST, tk.SEL_LAST)
+        except tk.TclError:
+            selected = ""  # Nothing selected
+        if selected and "\n" not in selected:
+            self.find_var.set(selected)
+        if not self.visible:
+            self.frame.pack(side=tk.BOTTOM, fill=tk.X, before=self._pack_before)
+            self.visible = True
+            self._watch_view()
+        self._anchor = self.text.index(tk.INSERT)
+        entry = self.replace_entry if replace else self.find_entry
+        entry.focus_set()
+        entry.select_range(0, tk.END)
+        return "break"
+
+    def hide(self, event=None):
+        """Hide the bar and remove the highlights"""
+        for after_id in (self._search_id, self._watch_id):
+            if after_id is not None:
+                self.text.after_cancel(after_id)
+        self._search_id = self._watch_id = None
+        self.text.tag_remove(MATCH_TAG, "1.0", tk.END)
+        self.text.tag_remove(CURRENT_TAG, "1.0", tk.END)
+        self._highlighted = None
+        if self.visible:
+            self.frame.pack_forget()
+            self.visible = False
+        self.text.focus_set()
+        return "break"
+
+    def pattern(self, quiet=False):
+        """Return the compiled pattern for the find field, or None if it is empty or invalid"""
+        query = self.find_var.get()
+        if not query:
+            return None
+        try:
+            # Compiled patterns are cached, retyping a query does not compile it again
+            return findfiles.compile_query(query, self.regex_var.get(), self.case_var.get())
+        except re.error as e:
+            if not quiet:
+                self.status_func(f"Invalid regular expression: {e}")
+            return None
+
+    def _schedule_search(self, *args):
+        """Search once typing pauses for a moment, not on every keystroke"""
+        if self._search_id is not None:
+            self.text.after_cancel(self._search_id)
+        self._search_id = self.text.after(30, self.search_incremental)
+
+    def search_incremental(self):
+        """Find the query from where the search started, so the match grows as you type"""
+        self._search_id = None
+        self._select(self._run_search(self._anchor))
+
+    def find_next(self, event=None):
+        """Find the next match after the current one, wrapping at the end"""
+        start = self._current_end() or self.text.index(tk.INSERT)
+        found = self._run_search(start)
+        if found is not None:
+            self._anchor = found[0]
+        self._select(found)
+        return "break"
+
+    def find_previous(self, event=None):
+        """Find the match before the current one, wrapping at the start"""
+        ranges = self.text.tag_ranges(CURRENT_TAG)
+        start = str(ranges[0]) if ranges else self.text.index(tk.INSERT)
+        found = self._run_search(start, backwards=True)
+        if found is not None:
+            self._anchor = found[0]
+        self._select(found)
+        return "break"
+
+    def _current_end(self):
+        ranges = self.text.tag_ranges(CURRENT_TAG)
+        return str(ranges[1]) if ranges else None
+
+    def _run_search(self, start, backwards=False):
+        """Search and report the time taken, returns (start index, end index) or None"""
+        pattern = self.pattern()
+        if pattern is None:
+            self._select(None)
+            return None
+        started = time.perf_counter()
+        found = self.find(pattern, start, backwards)
+        elapsed = (time.perf_counter() - started) * 1000
+        query = self.find_var.get()
+        if found is None:
+            self.status_func(f'No matches for "{query}" ({elapsed:.1f} ms)')
+        else:
+            line = found[0].split(".")[0]
+            self.status_func(f'Found "{query}" at line {line} ({elapsed:.1f} ms)')
+        return found
+
+    def find(self, pattern, start, backwards=False):
+        """
+        Find the first match after (or the last one before) a widget index, wrapping around.
+
+        The buffer is fetched CHUNK_LINES lines at a time, so a match near the
+        start never costs a copy of the whole document. A regex match spanning
+        a chunk boundary is not found.
+
+        Returns:
+            tuple: (start index, end index) of the match, or None.
+        """
+        text = self.text
+        last_line = int(text.index("end-1c").split(".")[0])
+        start = text.index(start)
+        start_line, start_column = map(int, start.split("."))
+        start_offset = len(text.get(f"{start_line}.0", start))  # The start column as a Python offset
+        if not backwards:
+            # From start to the end, then wrap from the top back to start
+            for first, column, stop, wrap in ((start_line, start_offset, last_line + 1, False),
+                                              (1, 0, start_line + 1, True)):
+                for line in range(first, stop, CHUNK_LINES):
+                    chunk_end = min(line + CHUNK_LINES, stop)
+                    chunk = text.get(f"{line}.0", f"{chunk_end}.0")
+                    limit = None
+                    if wrap and chunk_end == stop:
+                        limit = len(text.get(f"{line}.0", start))
+                    match = first_match(pattern, chunk, column if line == first else 0, limit)
+                    if match is not None:
+                        return line_col(chunk, match.start(), line), line_col(chunk, match.end(), line)
+            return None
+
+        # From start back to the top, then wrap from the end back to start
+        for first, column, lowest, wrap in ((start_line, start_column, 1, False),
+                                            (last_line, None, start_line, True)):
+            for line in range(first, lowest - 1, -CHUNK_LINES):
+                chunk_start = max(line - CHUNK_LINES + 1, lowest)
+                end = f"{line}.{column}" if line == first and column is not None else f"{line + 1}.0"
+                chunk = text.get(f"{chunk_start}.0", end)
+                floor = 0
+                if wrap and chunk_start == lowest:
+                    floor = len(text.get(f"{chunk_start}.0", start))
+                match = last_match(pattern, chunk)
+                if match is not None and match.start() >= floor:
+                    return line_col(chunk, match.start(), chunk_start), line_col(chunk, match.end(), chunk_start)
+        return None
+
+    def _select(self, found):
+        """Make a match the current one, or clear it"""
+        text = self.text
+        text.tag_remove(CURRENT_TAG, "1.0", tk.END)
+        if found is not None:
+            text.tag_add(CURRENT_TAG, *found)
+            text.mark_set(tk.INSERT, found[1])
+            text.see(found[0])
+        self._highlighted = None
+        self.highlight_visible()
+
+    def highlight_visible(self):
+        """Tag the matches in the visible lines plus HIGHLIGHT_MARGIN, in one widget call"""
+        text = self.text
+        pattern = self.pattern(quiet=True)
+        first = max(1, int(text.index("@0,0").split(".")[0]) - HIGHLIGHT_MARGIN)
+        last = int(text.index(f"@0,{text.winfo_height()}").split(".")[0]) + HIGHLIGHT_MARGIN
+        region = text.get(f"{first}.0", f"{last + 1}.0") if pattern is not None else ""
+        # Unchanged view, query and text, the tags are still right
+        if self._highlighted == (first, pattern, region):
+            return
+        self._highlighted = (first, pattern, region)
+        text.tag_remove(MATCH_TAG, "1.0", tk.END)
+        if pattern is None:
+            return
+        indices = []
+        for match in pattern.finditer(region):
+            if match.end() > match.start():
+                indices.append(line_col(region, match.start(), first))
+                indices.append(line_col(region, match.end(), first))
+        if indices:
+            text.tag_add(MATCH_TAG, *indices)
+
+    def _watch_view(self):
+        """Highlight again when the view scrolled, while the bar is shown"""
+        self._watch_id = None
+        if not self.visible:
+            return
+        try:
+            self.highlight_visible()
+            self._watch_id = self.text.after(WATCH_INTERVAL, self._watch_view)
+        except tk.TclError:
+            pass  # Widget has been destroyed
+
+    def replace_one(self, event=None):
+        """Replace the current match and find the next one"""
+        if self.read_only_func():
+            self.status_func("This document is read-only")
+            return "break"
+        ranges = self.text.tag_ranges(CURRENT_TAG)
+        pattern = self.pattern()
+        if ranges and pattern is not None:
+            start, end = str(ranges[0]), str(ranges[1])
+            # Matched in its whole lines, as find() does, so lookarounds see their context
+            first_line = start.split(".")[0]
+            chunk = self.text.get(f"{first_line}.0", f"{end} lineend")
+            offset = len(self.text.get(f"{first_line}.0", start))
+            match = pattern.match(chunk, offset)
+            if match is not None and match.end() == len(self.text.get(f"{first_line}.0", end)):
+                replacement = self.replace_var.get()
+                if self.regex_var.get():
+                    replacement = match.expand(replacement)
+                self.text.delete(start, end)
+                self.text.insert(start, replacement)
+                self.text.mark_set(tk.INSERT, f"{start}+{textwatch.tk_length(replacement)}c")
+                self.text.tag_remove(CURRENT_TAG, "1.0", tk.END)
+                self._select(self._run_search(tk.INSERT))
+                return "break"
+        self.find_next()
+        return "break"
+
+    def replace_all(self, event=None):
+        """
+        Replace every match as a single edit.
+
+        The span from the first to the last match is rewritten with one delete
+        and one insert, instead of one pair of widget calls per match. Undo
+        records only the replaced matches, not the span, and reverts them in
+        one step.
+
+        Returns:
+            int: The number of replacements.
+        """
+        if self.read_only_func():
+            self.status_func("This document is read-only")
+            return 0
+        pattern = self.pattern()
+        if pattern is None:
+            return 0
+        text = self.text
+        started = time.perf_counter()
+        content = text.get("1.0", "end-1c")
+        result = replace_span(pattern, content, self.replace_var.get(), self.regex_var.get())
+        if result is None:
+            self.status_func(f'No matches for "{self.find_var.get()}"')
+            return 0
+        start, end, new_text, replacements = result
+        count = len(replacements)
+        start_index, end_index = line_col(content, start), line_col(content, end)
+        if self.undo_manager is not None:
+            recording = self.undo_manager.replacing(start_index,
+                                                    tk_replacements(content, start, replacements))
+        else:
+            recording = contextlib.nullcontext()
+        del content, replacements
+        view = text.yview()[0]
+        with recording:
+            text.delete(start_index, end_index)
+            text.insert(start_index, new_text)
+        text.yview_moveto(view)
+        text.tag_remove(CURRENT_TAG, "1.0", tk.END)
+        self._highlighted = None
+        self.highlight_visible()
+        elapsed = (time.perf_counter() - started) * 1000
+        self.status_func(f"Replaced {count} matches ({elapsed:.1f} ms)")
+        return count
@@ -0,0 +1,465 @@
+"""
+    Group: TAMUSA Notepad Experts (TNE)
+    Authors: Joshua Ludolf & Luis Morales
+    Class: CSCI 3366 - Programming Languages
+
+    Find in files module for the TAMUSA Notepad application.
+    Searches every text file under a folder on a pool of worker processes and
+    streams the matching lines back in batches while the search runs.
+"""
+
+import functools
+import multiprocessing
+import os
+import queue
+import re
+import threading
+import time
+import tkinter as tk
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from tkinter import Toplevel
+import document
+import quickopen
+
+MAX_FILE_SIZE = 16 * 1024 * 1024  # Larger files are skipped
+BATCH_FILES = 32                  # Files searched per task sent to a worker
+MAX_HITS = 10000                  # The search stops once this many lines matched
+MAX_HITS_PER_FILE = 1000
+MAX_LINE_LENGTH = 200             # Matching lines are cut to this many characters
+
+# One matching line. line and column are 1-based.
+Hit = namedtuple("Hit", ["path", "line", "column", "text"])
+
+
+@functools.lru_cache(maxsize=16)
+def compile_query(query, regex=False, match_case=False):
+    """
+    Compile what the user searches for.
+
+    Raises:
+        re.error: If regex is True and query is not a valid regular expression.
+    """
+    flags = re.MULTILINE if match_case else re.MULTILINE | re.IGNORECASE
+    return re.compile(query if regex else re.escape(query), flags)
+
+
+def _may_contain(data, query, encoding, match_case):
+    """Return False if a literal query cannot be in data, checked on the raw bytes"""
+    if not document.is_ascii_compatible(encoding) or not (match_case or query.isascii()):
+        return True
+    try:
+        needle = query.encode(encoding)
+    except UnicodeEncodeError:
+        return False  # Not representable, so not in the file
+    if match_case:
+        return needle in data
+    # bytes.lower() only folds ASCII, which is all an ASCII query can match
+    # (but for the odd non-ASCII letter that folds to an ASCII one, like the Kelvin sign)
+    return needle.lower() in data.lower()
+
+
+def search_file(path, query, regex=False, match_case=False, max_size=MAX_FILE_SIZE,
+                max_hits=MAX_HITS_PER_FILE):
+    """
+    Find the lines of one file matching a query.
+
+    Binary files and files over max_size are skipped. The encoding is
+    detected like when a document is opened. A literal query is first looked
+    for in the raw bytes, so files without it are never decoded.
+
+    Returns:
+        list: Hit tuples, or None if the file was skipped.
+    """
+    with open(path, 'rb') as f:
+        data = f.read(max_size + 1)
+    if len(data) > max_size or document.is_binary(data[:document.BINARY_SNIFF_SIZE]):
+        return None
+    encoding = document.sniff_encoding(data[:document.PROBE_SIZE])
+    if not regex and not _may_contain(data, query, encoding, match_case):
+        return []
+    text = data[len(document.encoding_bom(encoding)):].decode(encoding, errors='replace')
+    del data
+    if "\r\n" in text:
+        text = text.replace("\r\n", "\n")  # So '$' matches before a CRLF too
+
+    hits = []
+    line, line_start, last_line = 1, 0, 0
+    for match in compile_query(query, regex, match_case).finditer(text):
+        position = match.start()
+        newlines = text.count("\n", line_start, position)
+        if newlines:
+            line += newlines
+            line_start = text.rfind("\n", 0, position) + 1
+        if line == last_line:
+            continue  # One hit per line
+        last_line = line
+        line_end = text.find("\n", position)
+        line_text = text[line_start:line_end if line_end != -1 else len(text)]
+        hits.append(Hit(path, line, position - line_start + 1, line_text[:MAX_LINE_LENGTH]))
+        if len(hits) >= max_hits:
+            break
+    return hits
+
+
+def search_batch(paths, query, regex, match_case, max_size):
+    """
+    Search several files, run in a worker process.
+
+    Returns:
+        list: (path, hits, error) per file, hits is None for skipped files.
+    """
+    results = []
+    for path in paths:
+        try:
+            results.append((path, search_file(path, query, regex, match_case, max_size), None))
+        except (OSError, ValueError) as e:
+            results.append((path, None, str(e)))
+    return results
+
+
+def iter_files(root, max_size=MAX_FILE_SIZE, cancel_event=None, skipped=None):
+    """
+    Yield the files under root that are small enough to search.
+
+    Hidden directories and the directories quick open ignores are not entered.
+
+    Args:
+        skipped (list): Gets the paths of files over max_size appended.
+    """
+    stack = [root]
+    while stack:
+        if cancel_event is not None and cancel_event.is_set():
+            return
+        directory = stack.pop()
+        try:
+            with os.scandir(directory) as listing:
+                entries = sorted(listing, key=lambda entry: entry.name)
+        except OSError:
+            continue
+        subdirs = []
+        for entry in entries:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith(".") and entry.name not in quickopen.IGNORED_DIRS:
+                        subdirs.append(entry.path)
+                elif entry.is_file():
+                    if entry.stat().st_size > max_size:
+                        if skipped is not None:
+                            skipped.append(entry.path)
+                    else:
+                        yield entry.path
+            except OSError:
+                continue
+        stack.extend(reversed(subdirs))
+
+
+class FileSearch:
+    """
+    Searches the files under a folder on a process pool.
+
+    A coordinator thread walks the folder and keeps a bounded number of
+    batches in flight, so cancelling stops the search within one batch per
+    worker. Hits are queued as batches finish and handed out by poll(),
+    which the caller runs from the Tk loop.
+
+    Attributes:
+        root: The folder searched
+        files_searched: Number of files searched so far
+        files_skipped: Number of binary, too large or unreadable files
+        hits_found: Number of matching lines so far
+        finished: True once every hit was handed out by poll()
+        cancelled: True if cancel() stopped the search
+    """
+
+    def __init__(self, root, query, regex=False, match_case=False, max_size=MAX_FILE_SIZE,
+                 max_workers=None, batch_files=BATCH_FILES, max_hits=MAX_HITS):
+        """
+        Raises:
+            re.error: If regex is True and query is not a valid regular expression.
+        """
+        compile_query(query, regex, match_case)  # Fail here, not in every worker
+        self.root = root
+        self.query = query
+        self.regex = regex
+        self.match_case = match_case
+        self.max_size = max_size
+        self.max_workers = max_workers or min(os.cpu_count() or 1, 8)
+        self.batch_files = batch_files
+        self.max_hits = max_hits
+        self.files_searched = 0
+        self.files_skipped = 0
+        self.hits_found = 0
+        self.finished = False
+        self.cancelled = False
+        self.started = None
+        self._results = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="TNE-FindInFiles", daemon=True)
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def _batches(self, skipped):
+        batch = []
+        for path in iter_files(self.root, self.max_size, self._cancel, skipped):
+            batch.append(path)
+            if len(batch) >= self.batch_files:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def _run(self):
+        # Spawned workers do not inherit the Tk process's threads and locks
+        pool = ProcessPoolExecutor(max_workers=self.max_workers,
+                                   mp_context=multiprocessing.get_context("spawn"))
+        in_flight = set()
+        skipped = []
+        try:
+            for batch in self._batches(skipped):
+                while len(in_flight) >= self.max_workers * 2:
+                    done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                    self._collect(done)
+                if self._cancel.is_set():
+                    break
+                in_flight.add(pool.submit(search_batch, batch, self.query, self.regex,
+                                          self.match_case, self.max_size))
+            while in_flight and not self._cancel.is_set():
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                self._collect(done)
+        except Exception as e:
+            self._results.put(("error", e))
+        finally:
+            for future in in_flight:
+                future.cancel()
+            pool.shutdown(wait=False)
+            self._results.put(("skipped", len(skipped)))
+            self._results.put(("done", None))
+
+    def _collect(self, futures):
+        for future in futures:
+            if future.cancelled() or self._cancel.is_set():
+                continue
+            try:
+                results = future.result()
+            except Exception as e:
+                self._results.put(("error", e))
+                continue
+            hits = []
+            for path, file_hits, error in results:
+                hits.extend(file_hits or ())
+            self._results.put(("files", results))
+            if hits:
+                self._results.put(("hits", hits))
+                self.hits_found += len(hits)
+                if self.hits_found >= self.max_hits:
+                    self._cancel.set()  # Enough, stop without marking it cancelled
+
+    def poll(self, max_hits=500):
+        """
+        Return the hits found since the last call, at most about max_hits.
+
+        Returns:
+            list: Hit tuples in the order their batches finished.
+        """
+        hits = []
+        while len(hits) < max_hits:
+            try:
+                kind, value = self._results.get_nowait()
+            except queue.Empty:
+                break
+            if kind == "hits":
+                if not self.cancelled:
+                    hits.extend(value)
+            elif kind == "files":
+                self.files_searched += sum(1 for _, file_hits, _ in value if file_hits is not None)
+                self.files_skipped += sum(1 for _, file_hits, _ in value if file_hits is None)
+            elif kind == "skipped":
+                self.files_skipped += value
+            elif kind == "error":
+                print(f"Error searching files: {value}")
+            elif kind == "done":
+                self.finished = True
+        return hits
+
+    def cancel(self):
+        """Stop the search, hits not handed out yet are dropped"""
+        self.cancelled = True
+        self._cancel.set()
+
+
+class FindInFilesDialog:
+    """A window that searches the files under the file tree's folder and lists the matching lines"""
+
+    def __init__(self, parent, root_func, open_callback):
+        """
+        Args:
+            parent (tk.Tk): The main window.
+            root_func (callable): Returns the folder to search.
+            open_callback (callable): Called as open_callback(path, line) for a chosen hit.
+        """
+        self.root_func = root_func
+        self.open_callback = open_callback
+        self.search = None
+        self.hits = []
+        self._poll_id = None
+        self.window = Toplevel(parent)
+        self.window.title("Find in Files")
+        self.window.geometry("800x500")
+        self.window.configure(bg="#1e1e1e")
+        self.window.transient(parent)
+        self.window.geometry("+%d+%d" % (parent.winfo_rootx() + 50, parent.winfo_rooty() + 50))
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.create_widgets()
+
+    def create_widgets(self):
+        search_frame = tk.Frame(self.window, bg="#1e1e1e")
+        search_frame.pack(fill=tk.X, padx=10, pady=(10, 5))
+
+        self.search_var = tk.StringVar()
+        self.search_entry = tk.Entry(
+            search_frame,
+            textvariable=self.search_var,
+            font=("Cascadia Code", 11),
+            bg="#2d2d2d",
+            fg="#d4d4d4",
+            insertbackground="#23c4a4",
+            relief=tk.FLAT,
+            bd=5
+        )
+        self.search_entry.pack(side=tk.LEFT, fill=tk.X, expand=True)
+
+        self.regex_var = tk.BooleanVar(value=False)
+        self.case_var = tk.BooleanVar(value=False)
+        for text, variable in [("Regex", self.regex_var), ("Match case", self.case_var)]:
+            tk.Checkbutton(
+                search_frame,
+                text=text,
+                variable=variable,
+                font=("Cascadia Code", 9),
+                bg="#1e1e1e",
+                fg="#d4d4d4",
+                selectcolor="#2d2d2d",
+                activebackground="#3e3e3e",
+                activeforeground="#23c4a4"
+            ).pack(side=tk.LEFT, padx=(8, 0))
+
+        self.find_button = tk.Button(
+            search_frame,
+            text="Find",
+            command=self.toggle,
+            font=("Cascadia Code", 10),
+            bg="#2d2d2d",
+            fg="#23c4a4",
+            activebackground="#3e3e3e",
+            relief=tk.FLAT
+        )
+        self.find_button.pack(side=tk.LEFT, padx=(8, 0))
+
+        list_frame = tk.Frame(self.window, bg="#1e1e1e")
+        list_frame.pack(fill=tk.BOTH, expand=True, padx=10)
+        self.listbox = tk.Listbox(
+            list_frame,
+            font=("Cascadia Code", 10),
+            bg="#1e1e1e",
+            fg="#d4d4d4",
+            selectbackground="#264f78",
+            selectforeground="#ffffff",
+            relief=tk.FLAT,
+            activestyle="none"
+        )
+        scrollbar = tk.Scrollbar(list_frame, command=self.listbox.yview)
+        self.listbox.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.listbox.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+
+        self.status_label = tk.Label(self.window, text="", font=("Cascadia Code", 9),
+                                     bg="#1e1e1e", fg="#858585", anchor=tk.W)
+        self.status_label.pack(fill=tk.X, padx=10, pady=(2, 8))
+
+        self.search_entry.bind("<Return>", lambda e: self.start())
+        self.listbox.bind("<Double-1>", self.choose)
+        self.listbox.bind("<Return>", self.choose)
+        self.window.bind("<Escape>", lambda e: self.stop())
+        self.search_entry.focus_set()
+
+    def toggle(self):
+        if self.search is not None and not self.search.finished:
+            self.stop()
+        else:
+            self.start()
+
+    def start(self):
+        """Start a search, replacing the results of the previous one"""
+        self.stop()
+        query = self.search_var.get()
+        root = self.root_func()
+        if not query or not root:
+            return
+        try:
+            self.search = FileSearch(root, query, regex=self.regex_var.get(),
+                                     match_case=self.case_var.get()).start()
+        except re.error as e:
+            self.status_label.config(text=f"Invalid regular expression: {e}")
+            return
+        self.hits = []
+        self.listbox.delete(0, tk.END)
+        self.find_button.config(text="Stop")
+        self.status_label.config(text=f"Searching {root}…")
+        self._poll_id = self.window.after(50, self._poll)
+
+    def _poll(self):
+        """Show the hits that arrived since the last poll"""
+        self._poll_id = None
+        search = self.search
+        if search is None:
+            return
+        try:
+            hits = search.poll()
+            if hits:
+                self.listbox.insert(tk.END, *(f"{os.path.relpath(hit.path, search.root)}:{hit.line}: {hit.text}"
+                                              for hit in hits))
+                self.hits.extend(hits)
+            if search.finished:
+                self._finish()
+            else:
+                self.status_label.config(text=f"{len(self.hits)} matches in {search.files_searched} files…")
+                self._poll_id = self.window.after(50, self._poll)
+        except tk.TclError:
+            pass  # Window has been closed
+
+    def _finish(self):
+        search = self.search
+        elapsed = time.perf_counter() - search.started
+        if search.cancelled:
+            state = "stopped"
+        elif search.hits_found >= search.max_hits:
+            state = f"stopped at {search.max_hits} matches"
+        else:
+            state = "done"
+        self.status_label.config(text=f"{len(self.hits)} matches in {search.files_searched} files, "
+                                      f"{search.files_skipped} skipped ({state}, {elapsed:.1f}s)")
+        self.find_button.config(text="Find")
+
+    def stop(self):
+        """Cancel the running search, the hits listed so far stay"""
+        if self.search is not None and not self.search.finished:
+            self.search.cancel()
+
+    def choose(self, event=None):
+        """Open the file of the selected hit at its line"""
+        current = self.listbox.curselection()
+        if current:
+            hit = self.hits[current[0]]
+            self.open_callback(hit.path, hit.line)
+        return "break"
+
+    def close(self):
+        self.stop()
+        if self._poll_id is not None:
+            self.window.after_cancel(self._poll_id)
+            self._poll_id = None
+        self.window.destroy()
@@ -0,0 +1,119 @@
+"""
+    Group: TAMUSA Notepad Experts (TNE)
+    Authors: Joshua Ludolf & Luis Morales
+    Class: CSCI 3366 - Programming Languages
+
+    Follow mode module for the TAMUSA Notepad application.
+    Watches a growing file (typically a log) and reads only the bytes appended
+    since the last check, like tail -F. Truncation, log rotation and files
+    rewritten in place are detected from the file's size, identity and mtime.
+"""
+
+import codecs
+import io
+import os
+import document
+
+FOLLOW_INTERVAL = 0.5            # Seconds between two checks of the file
+MAX_READ = 4 * 1024 * 1024       # Bytes read per check, the rest waits for the next one
+
+
+class TailReader:
+    """
+    Reads what was appended to a file since the last call to read_new().
+
+    Decoding is incremental, so a multi-byte character or a CRLF pair split
+    across two reads comes out whole. Line endings are translated to '\\n'.
+
+    Attributes:
+        path: The followed file
+        encoding: The encoding the file is decoded with
+        offset: Bytes of the current file read so far
+        rotations: Number of times the file was replaced (log rotation)
+        truncations: Number of times the file shrank or was rewritten in place
+    """
+
+    def __init__(self, path, offset=0, encoding='utf-8'):
+        """
+        Args:
+            path (str): The file to follow.
+            offset (int): Bytes already shown, reading starts there.
+            encoding (str): The file's encoding.
+        """
+        self.path = path
+        self.encoding = encoding
+        self.rotations = 0
+        self.truncations = 0
+        self._file = None
+        self._identity = None
+        self._open(offset)
+
+    def _open(self, offset):
+        """(Re)open the file at a byte offset with a fresh decoder"""
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, 'rb')
+        st = os.fstat(self._file.fileno())
+        self._identity = (st.st_dev, st.st_ino)
+        # Past the byte order mark, the byte-ordered codecs would decode it as text
+        self.offset = min(max(offset, len(document.encoding_bom(self.encoding))), st.st_size)
+        # The mtime of the bytes read so far, None until everything up to a known size was read
+        self._mtime_ns = st.st_mtime_ns if self.offset == st.st_size else None
+        self._decoder = io.IncrementalNewlineDecoder(
+            codecs.getincrementaldecoder(self.encoding)(errors='replace'), translate=True)
+        self._file.seek(self.offset)
+
+    def _current_identity(self):
+        try:
+            st = os.stat(self.path)
+            return (st.st_dev, st.st_ino), st.st_size, st.st_mtime_ns
+        except OSError:
+            return None, None, None  # Between a rotation's rename and the new file's creation
+
+    def read_new(self, max_read=MAX_READ):
+        """
+        Read the text appended since the last call.
+
+        Returns:
+            tuple: (text, reset, more). reset is True if the file was truncated or
+                rewritten and the text replaces everything shown so far, more is True if max_read
+                was reached and more bytes are waiting.
+        """
+        identity, size, mtime_ns = self._current_identity()
+        reset = False
+        text = ""
+        if identity is not None and identity != self._identity:
+            # Rotated: finish the old file, max_read bytes per call, then
+            # continue with the new one from its start
+            start = self.offset
+            text, more = self._read(max_read)
+            if more:
+                return text, False, True
+            text += self._decoder.decode(b"", final=True)
+            max_read -= self.offset - start
+            self.rotations += 1
+            self._open(0)
+            identity, size, mtime_ns = self._current_identity()
+        elif size is not None and (size < self.offset or (
+                size == self.offset and self._mtime_ns is not None and mtime_ns != self._mtime_ns)):
+            # Shrank, or rewritten without changing size: show it again from the top
+            self.truncations += 1
+            self._open(0)
+            reset = True
+        new_text, more = self._read(max_read)
+        if size is not None and self.offset == size and identity == self._identity:
+            self._mtime_ns = mtime_ns
+        else:
+            self._mtime_ns = None  # Changed while reading, the mtime is not the one of what was read
+        return text + new_text, reset, more
+
+    def _read(self, max_read):
+        data = self._file.read(max_read)
+        self.offset += len(data)
+        more = len(data) == max_read
+        return self._decoder.decode(data, final=False), more
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
@@ -0,0 +1,79 @@
+"""
+    Group: TAMUSA Notepad Experts (TNE)
+    Authors: Joshua Ludolf & Luis Morales
+    Class: CSCI 3366 - Programming Languages
+
+    Hex view module for the TAMUSA Notepad application.
+    Shows binary files as read-only offset/hex/ASCII rows, rendered from a
+    memory map of the file only for the rows around the viewport.
+"""
+
+import tkinter as tk
+import viewer
+
+BYTES_PER_ROW = 16
+WINDOW_ROWS = 512   # Rows kept in the Text widget (8 KB of the file)
+
+# Printable ASCII stays, everything else shows as a dot
+ASCII_TABLE = bytes(byte if 32 <= byte < 127 else ord(".") for byte in range(256))
+
+
+def format_row(offset, data):
+    """Return one row of the hex view, e.g. "00000010  48 65 6c 6c ...  |Hell...|" """
+    first, second = data[:8].hex(" "), data[8:].hex(" ")
+    return f"{offset:08x}  {first:<23}  {second:<23}  |{data.translate(ASCII_TABLE).decode('ascii')}|"
+
+
+class HexView(viewer.LargeFileView):
+    """
+    A read-only, paged hex/ASCII view of a memory-mapped binary file.
+
+    Works like the large file viewer with fixed BYTES_PER_ROW rows instead of
+    lines, so positions are computed rather than searched for.
+
+    Attributes:
+        path: The file being viewed
+        size: The file size in bytes
+    """
+
+    def __init__(self, text_widget, scrollbar, path, on_scroll=None, mute=None):
+        super().__init__(text_widget, scrollbar, path, on_scroll=on_scroll, mute=mute)
+        self._saved_wrap = text_widget.cget("wrap")
+        text_widget.configure(wrap=tk.NONE)  # Keep each row on one line
+
+    def _detect_encoding(self):
+        return 'ascii'  # Rows are rendered, not decoded
+
+    def line_start(self, offset):
+        """Return the offset of the row containing offset"""
+        offset = min(max(offset, 0), max(self.size - 1, 0))
+        return offset - offset % BYTES_PER_ROW
+
+    def lines_back(self, offset, count):
+        """Return the offset of the row count rows before the one at offset"""
+        return max(0, self.line_start(offset) - count * BYTES_PER_ROW)
+
+    def window_lines(self):
+        return WINDOW_ROWS
+
+    def _scan_window(self, start):
+        end = min(self.size, start + WINDOW_ROWS * BYTES_PER_ROW)
+        return list(range(start, end, BYTES_PER_ROW)), end
+
+    def _render(self, start, end):
+        data = self._map[start:end]
+        return "\n".join(format_row(start + position, data[position:position + BYTES_PER_ROW])
+                         for position in range(0, len(data), BYTES_PER_ROW))
+
+    def goto_line(self, line):
+        raise RuntimeError("Go to line is not available in the hex view")
+
+    def current_line(self):
+        return None
+
+    def close(self):
+        try:
+            self.text_widget.configure(wrap=self._saved_wrap)
+        except tk.TclError:
+            pass  # Widget has been destroyed
+        super().close()
@@ -0,0 +1,450 @@
+"""
+    Group: TAMUSA Notepad Experts (TNE)
+    Authors: Joshua Ludolf & Luis Morales
+    Class: CSCI 3366 - Programming Languages
+
+    Syntax highlighting module for the TAMUSA Notepad application.
+    Colors Python, JSON, YAML and log files with Text tags. Lexers work one
+    line at a time and pass a state to the next line (e.g. an open triple
+    quoted string), so an edit only retokenizes the lines it touched until
+    the state carried forward matches the one from the previous pass. The
+    visible lines are highlighted first, the rest in short idle-time slices.
+"""
+
+import os
+import re
+import time
+import tkinter as tk
+import document
+import textwatch
+
+SLICE_SECONDS = 0.008   # Work done per idle callback, so key presses are never kept waiting
+BATCH_LINES = 200       # Lines fetched from the widget and tagged at a time
+PAUSE_MS = 100          # Delay before checking again while the document is loading
+
+# Tag name -> foreground color
+TAG_COLORS = {
+    "syntax_keyword": "#c586c0",
+    "syntax_builtin": "#4ec9b0",
+    "syntax_definition": "#dcdcaa",
+    "syntax_string": "#ce9178",
+    "syntax_number": "#b5cea8",
+    "syntax_comment": "#6a9955",
+    "syntax_constant": "#569cd6",
+    "syntax_key": "#9cdcfe",
+    "syntax_error": "#f44747",
+    "syntax_warning": "#cca700",
+    "syntax_info": "#75beff",
+}
+
+UNKNOWN = object()  # State of a line not tokenized since it was inserted
+
+
+class Lexer:
+    """
+    Splits lines into tagged tokens with one regular expression.
+
+    Subclasses list their rules as (tag, regex) pairs, tried in order at each
+    position. A rule whose tag is in MULTILINE opens a construct that may run
+    past the end of the line, it maps to the regex that closes it.
+
+    Attributes:
+        name: The language's name
+        initial_state: The state of the first line
+    """
+
+    name = "Plain text"
+    initial_state = None
+    rules = []
+    MULTILINE = {}  # Opening rule tag -> (tag of the construct, closing regex)
+
+    def __init__(self):
+        self._tags = {}
+        parts = []
+        for number, (tag, regex) in enumerate(self.rules):
+            group = f"g{number}"
+            self._tags[group] = tag
+            parts.append(f"(?P<{group}>{regex})")
+        self._pattern = re.compile("|".join(parts)) if parts else None
+        self._closers = {opener: (tag, re.compile(closer))
+                         for opener, (tag, closer) in self.MULTILINE.items()}
+
+    def tokenize_line(self, line, state):
+        """
+        Tokenize one line.
+
+        Args:
+            line (str): The line, without its newline.
+            state: The state at the start of the line, initial_state or what the
+                previous line returned.
+
+        Returns:
+            tuple: (tokens, state) where tokens is a list of (start column, end column, tag)
+                and state the state at the start of the next line.
+        """
+        tokens = []
+        position = 0
+        if state is not None:
+            tag, closer = self._closers[state]
+            match = closer.match(line)
+            if match is None:
+                return [(0, len(line), tag)] if line else [], state
+            tokens.append((0, match.end(), tag))
+            position = match.end()
+        if self._pattern is None:
+            return tokens, None
+        for match in self._pattern.finditer(line, position):
+            tag = self._tags[match.lastgroup]
+            if tag in self._closers:
+                # Opened and not closed on this line, the rest of it belongs to the construct
+                tokens.append((match.start(), len(line), self._closers[tag][0]))
+                return tokens, tag
+            tokens.append((match.start(), match.end(), tag))
+        return tokens, None
+
+
+def _words(words):
+    return r"\b(?:" + "|".join(words.split()) + r")\b"
+
+
+class PythonLexer(Lexer):
+    name = "Python"
+    _prefix = r"(?i:[rbuf]{0,2})"
+    rules = [
+        ("syntax_comment", r"#.*"),
+        ("syntax_string", _prefix + r"'''(?:[^\\]|\\.)*?'''"),
+        ("syntax_string", _prefix + r'"""(?:[^\\]|\\.)*?"""'),
+        ("triple_single", _prefix + r"'''"),
+        ("triple_double", _prefix + r'"""'),
+        ("syntax_string", _prefix + r"'(?:[^'\\]|\\.)*'?"),
+        ("syntax_string", _prefix + r'"(?:[^"\\]|\\.)*"?'),
+        ("syntax_definition", r"(?:(?<=\bdef )|(?<=\bclass ))\w+|@[\w.]+"),
+        ("syntax_keyword", _words(
+            "and as assert async await break class continue def del elif else except finally "
+            "for from global if import in is lambda nonlocal not or pass raise return try "
+            "while with yield match case")),
+        ("syntax_constant", _words("True False None")),
+        ("syntax_builtin", _words(
+            "self cls print len range open str int float list dict set tuple bool type "
+            "isinstance super enumerate zip min max sum sorted any all object Exception")),
+        ("syntax_number", r"\b(?i:0[xob][\da-f_]+|\d[\d_]*\.?[\d_]*(?:e[+-]?\d+)?j?)"),
+    ]
+    MULTILINE = {
+        "triple_single": ("syntax_string", r"(?:[^\\]|\\.)*?'''"),
+        "triple_double": ("syntax_string", r'(?:[^\\]|\\.)*?"""'),
+    }
+
+
+class JsonLexer(Lexer):
+    name = "JSON"
+    rules = [
+        ("syntax_key", r'"(?:[^"\\]|\\.)*"(?=\s*:)'),
+        ("syntax_string", r'"(?:[^"\\]|\\.)*"?'),
+        ("syntax_constant", _words("true false null")),
+        ("syntax_number", r"-?\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b"),
+    ]
+
+
+class YamlLexer(Lexer):
+    name = "YAML"
+    rules = [
+        ("syntax_comment", r"(?:^|(?<=\s))#.*"),
+        ("syntax_keyword", r"^(?:---|\.\.\.)(?=\s|$)"),
+        ("syntax_key", r"(?!-\s)[\w.\-/]+(?:[ \t]+[\w.\-/]+)*(?=:(?:\s|$))"),
+        ("syntax_string", r"'(?:[^']|'')*'?|\"(?:[^\"\\]|\\.)*\"?"),
+        ("syntax_builtin", r"[&*][\w\-]+|![\w!/]*"),
+        ("syntax_constant", _words("true false null yes no on off True False Null")),
+        ("syntax_number", r"-?\b\d+(?:\.\d+)?(?:[eE][+-]?\d+)?\b"),
+    ]
+
+
+class LogLexer(Lexer):
+    name = "Log"
+    rules = [
+        ("syntax_number", r"\b\d{4}-\d{2}-\d{2}[T ]\d{2}:\d{2}:\d{2}(?:[.,]\d+)?(?:Z|[+-]\d{2}:?\d{2})?"),
+        ("syntax_error", _words("ERROR FATAL CRITICAL SEVERE Traceback") + r"|\b\w*(?:Error|Exception)\b"),
+        ("syntax_warning", _words("WARN WARNING")),
+        ("syntax_info", _words("INFO DEBUG TRACE NOTICE")),
+        ("syntax_string", r'"(?:[^"\\]|\\.)*"'),
+    ]
+
+
+# File extension -> lexer class
+LEXERS = {
+    ".py": PythonLexer,
+    ".pyw": PythonLexer,
+    ".json": JsonLexer,
+    ".yaml": YamlLexer,
+    ".yml": YamlLexer,
+    ".log": LogLexer,
+}
+
+
+def lexer_for(path):
+    """Return a lexer for a file name, looking through compression extensions, or None"""
+    if not path:
+        return None
+    if document.compression_for_path(path) is not None:
+        path = os.path.splitext(path)[0]
+    lexer_class = LEXERS.get(os.path.splitext(path)[1].lower())
+    return lexer_class() if lexer_class is not None else None
+
+
+class Retokenizer:
+    """
+    Tracks which lines need tokenizing and the lexer state at the start of each line.
+
+    Edits mark lines dirty from the first edited line. Tokenizing moves
+    forward from there and stops once past the edited lines the state it
+    computed for the next line equals the stored one, since every line after
+    it is then tokenized as before. Knows nothing about Tk, the caller feeds
+    it the line text and applies the tokens.
+
+    Attributes:
+        lexer: The Lexer used
+        next_line: First line to tokenize, None when every line is up to date
+    """
+
+    def __init__(self, lexer, line_count=1):
+        self.lexer = lexer
+        self._states = [lexer.initial_state] + [UNKNOWN] * (line_count - 1)
+        self.next_line = 1
+        self._stop_line = line_count  # The sweep may stop past this line once states match
+
+    @property
+    def line_count(self):
+        return len(self._states)
+
+    def pending(self):
+        """Return True while some lines are not tokenized with their current state"""
+        return self.next_line is not None
+
+    def edit(self, line, removed, added):
+        """
+        Record an edit.
+
+        Args:
+            line (int): The line the edit started on.
+            removed (int): Number of newlines deleted.
+            added (int): Number of newlines inserted.
+        """
+        self._states[line:line + removed] = [UNKNOWN] * added
+        if self.next_line is None:
+            self.next_line, self._stop_line = line, line + added
+        else:
+            if self._stop_line > line:
+                self._stop_line = max(self._stop_line - removed, line) + added
+            self.next_line = min(self.next_line, line)
+            self._stop_line = max(self._stop_line, line + added)
+
+    def batch(self, max_lines=BATCH_LINES):
+        """Return (first line, line count) of the next lines to tokenize, or None"""
+        if self.next_line is None:
+            return None
+        return self.next_line, min(max_lines, self.line_count - self.next_line + 1)
+
+    def tokenize(self, first, lines):
+        """
+        Tokenize lines starting at next_line, storing the states they pass on.
+
+        Args:
+            first (int): The first line, must be next_line.
+            lines (list): The text of lines first, first+1, ...
+
+        Returns:
+            list: The tokens of each line tokenized, which may be fewer than
+                given when the states converged.
+        """
+        states = self._states
+        state = states[first - 1]
+        results = []
+        for number, text in enumerate(lines, first):
+            tokens, state = self.lexer.tokenize_line(text, state)
+            results.append(tokens)
+            if number >= self.line_count:
+                self.next_line = None
+                return results
+            known = states[number]
+            states[number] = state
+            if number >= self._stop_line and known is not UNKNOWN and known == state:
+                self.next_line = None  # The following lines were tokenized with this state already
+                return results
+        self.next_line = first + len(results)
+        return results
+
+    def provisional(self, first, lines):
+        """
+        Tokenize lines ahead of the sweep from the best state known, without storing anything.
+
+        Used to color the visible lines at once, the sweep corrects them when it
+        gets there if the state they start with was not known yet.
+        """
+        state = self._states[first - 1]
+        if state is UNKNOWN:
+            state = self.lexer.initial_state
+        results = []
+        for text in lines:
+            tokens, state = self.lexer.tokenize_line(text, state)
+            results.append(tokens)
+        return results
+
+
+class Highlighter:
+    """
+    Applies a lexer's tokens to a Text widget as tags, incrementally.
+
+    Edits are reported by the TextWatcher. Text replaced while the watcher
+    was muted (opening a document) is retokenized from the top. Work runs
+    in idle callbacks of at most SLICE_SECONDS, visible lines first.
+
+    Attributes:
+        text: The highlighted Text widget
+        lexer: The Lexer in use, None turns highlighting off
+        last_slice_ms: Duration of the last idle slice, for benchmarking
+    """
+
+    def __init__(self, text, watcher, paused_func=None):
+        """
+        Args:
+            text (tk.Text): The widget to highlight.
+            watcher (textwatch.TextWatcher): Reports the widget's edits.
+            paused_func (callable): Returns True while highlighting should wait,
+                e.g. while a document is streamed in.
+        """
+        self.text = text
+        self.watcher = watcher
+        self.paused_func = paused_func or (lambda: False)
+        self.lexer = None
+        self.last_slice_ms = 0.0
+        self._retokenizer = None
+        self._generation = None
+        self._work_id = None
+        self._visible_done = None  # (first, last) lines colored provisionally since the last edit
+        for tag, color in TAG_COLORS.items():
+            text.tag_configure(tag, foreground=color)
+            text.tag_lower(tag)  # Below the selection and find highlights
+        watcher.add_listener(self._on_edit)
+
+    def set_lexer(self, lexer):
+        """Highlight the whole text with a new lexer, or remove the highlighting if None"""
+        self.lexer = lexer
+        self._retokenizer = None
+        self._cancel()
+        try:
+            for tag in TAG_COLORS:
+                self.text.tag_remove(tag, "1.0", tk.END)
+        except tk.TclError:
+            return  # Widget has been destroyed
+        if lexer is not None:
+            self.refresh()
+
+    def refresh(self):
+        """Retokenize everything, after the text was replaced without notifications"""
+        if self.lexer is None:
+            return
+        line_count = int(self.watcher.index("end-1c").split(".")[0])
+        self._retokenizer = Retokenizer(self.lexer, line_count)
+        self._generation = self.watcher.generation
+        self._visible_done = None
+        self._schedule()
+
+    def pending(self):
+        """Return True while some lines still have to be highlighted"""
+        return self.lexer is not None and (self._retokenizer is None
+                                           or self._generation != self.watcher.generation
+                                           or self._retokenizer.pending())
+
+    def _on_edit(self, operation, start, end, text):
+        if self.lexer is None or self._retokenizer is None:
+            return
+        if self._generation != self.watcher.generation:
+            self.refresh()  # Missed muted edits
+            return
+        first, last = int(start.split(".")[0]), int(end.split(".")[0])
+        if operation == "insert":
+            self._retokenizer.edit(first, 0, last - first)
+        else:
+            self._retokenizer.edit(first, last - first, 0)
+        self._visible_done = None
+        self._schedule()
+
+    def _schedule(self, delay=None):
+        if self._work_id is None:
+            try:
+                if delay is None:
+                    self._work_id = self.text.after_idle(self._work)
+                else:
+                    self._work_id = self.text.after(delay, self._work)
+            except tk.TclError:
+                pass  # Widget has been destroyed
+
+    def _cancel(self):
+        if self._work_id is not None:
+            try:
+                self.text.after_cancel(self._work_id)
+            except tk.TclError:
+                pass  # Widget has been destroyed
+            self._work_id = None
+
+    def _work(self):
+        """One slice of highlighting, rescheduled until every line is done"""
+        self._work_id = None
+        if self.lexer is None:
+            return
+        if self.paused_func():
+            self._schedule(PAUSE_MS)
+            return
+        if self._generation != self.watcher.generation:
+            self.refresh()
+            return
+        started = time.perf_counter()
+        try:
+            self.highlight_visible()
+            retokenizer = self._retokenizer
+            while retokenizer.pending() and time.perf_counter() - started < SLICE_SECONDS:
+                first, count = retokenizer.batch()
+                lines = self._get_lines(first, count)
+                self._apply(first, lines, retokenizer.tokenize(first, lines))
+        except tk.TclError:
+            return  # Widget has been destroyed
+        self.last_slice_ms = (time.perf_counter() - started) * 1000
+        if self._retokenizer.pending():
+            self._schedule()
+
+    def highlight_visible(self):
+        """Color the visible lines the sweep has not reached yet, from the best state known"""
+        retokenizer = self._retokenizer
+        if not retokenizer.pending():
+            return
+        first = int(self.text.index("@0,0").split(".")[0])
+        last = int(self.text.index(f"@0,{self.text.winfo_height()}").split(".")[0])
+        first = max(first, retokenizer.next_line)
+        if first > last or self._visible_done == (first, last):
+            return
+        self._visible_done = (first, last)
+        lines = self._get_lines(first, last - first + 1)
+        self._apply(first, lines, retokenizer.provisional(first, lines))
+
+    def _get_lines(self, first, count):
+        return self.watcher.call("get", f"{first}.0", f"{first + count - 1}.end").split("\n")
+
+    def _apply(self, first, lines, results):
+        """Retag lines with their tokens, one tag_remove and one tag_add per tag"""
+        if not results:
+            return
+        indices = {}
+        for number, (line, tokens) in enumerate(zip(lines, results), first):
+            # Token columns are Python offsets, Tk counts some characters (emoji) as two
+            wide = textwatch.tk_length(line) != len(line)
+            for start, end, tag in tokens:
+                if end > start:
+                    if wide:
+                        start, end = textwatch.tk_length(line[:start]), textwatch.tk_length(line[:end])
+                    pairs = indices.setdefault(tag, [])
+                    pairs.append(f"{number}.{start}")
+                    pairs.append(f"{number}.{end}")
+        end = f"{first + len(results) - 1}.end"
+        for tag in TAG_COLORS:
+            self.text.tag_remove(tag, f"{first}.0", end)
+        for tag, pairs in indices.items():
+            self.text.tag_add(tag, *pairs)
@@ -0,0 +1,278 @@
+"""
+    Group: TAMUSA Notepad Experts (TNE)
+    Authors: Joshua Ludolf & Luis Morales
+    Class: CSCI 3366 - Programming Languages
+
+    Edit journal module for the TAMUSA Notepad application.
+    Auto-save appends compact insert/delete records to a swap file beside the
+    document instead of rewriting the whole file. The document itself is only
+    rewritten on an explicit save or once the journal grows past a threshold.
+
+    Swap file layout:
+        TNEJ1 <base size> <base mtime_ns> <document path>\\n
+        I <index> <byte count>\\n<utf-8 text>\\n      (insert)
+        D <start> <end>\\n                           (delete)
+"""
+
+import os
+import tempfile
+
+MAGIC = b"TNEJ1"
+JOURNAL_LIMIT = 1024 * 1024  # Rewrite the document once the journal passes 1 MB
+RECOVERY_INDEX = os.path.join(os.path.expanduser("~"), ".tne_recovery")
+
+
+def swap_path_for(doc_path):
+    """Return the swap file path used for a document"""
+    directory, name = os.path.split(os.path.abspath(doc_path))
+    return os.path.join(directory, f".{name}.tne-swp")
+
+
+def _read_index():
+    try:
+        with open(RECOVERY_INDEX, 'r', encoding='utf-8') as f:
+            return [line.rstrip("\n") for line in f if line.strip()]
+    except OSError:
+        return []
+
+
+def _write_index(paths):
+    try:
+        if paths:
+            with open(RECOVERY_INDEX, 'w', encoding='utf-8') as f:
+                f.write("".join(f"{path}\n" for path in paths))
+        elif os.path.exists(RECOVERY_INDEX):
+            os.remove(RECOVERY_INDEX)
+    except OSError as e:
+        print(f"Error updating recovery index: {e}")
+
+
+def register(doc_path):
+    """Remember that a document has a live journal"""
+    paths = _read_index()
+    if doc_path not in paths:
+        _write_index(paths + [doc_path])
+
+
+def unregister(doc_path):
+    """Forget a document's journal"""
+    paths = _read_index()
+    if doc_path in paths:
+        _write_index([path for path in paths if path != doc_path])
+
+
+def find_leftover_journals():
+    """
+    Find journals left behind by a session that did not exit cleanly.
+
+    Returns:
+        list: (document path, swap path) tuples for every journal still on disk.
+    """
+    leftovers = []
+    for doc_path in _read_index():
+        swap_path = swap_path_for(doc_path)
+        if os.path.exists(swap_path):
+            leftovers.append((doc_path, swap_path))
+        else:
+            unregister(doc_path)
+    return leftovers
+
+
+def remove_leftover(doc_path):
+    """Delete a leftover journal the user chose not to recover"""
+    try:
+        os.remove(swap_path_for(doc_path))
+    except FileNotFoundError:
+        pass
+    unregister(doc_path)
+
+
+def _stat_base(doc_path):
+    try:
+        st = os.stat(doc_path)
+        return st.st_size, st.st_mtime_ns
+    except OSError:
+        return 0, 0
+
+
+def read_journal(swap_path):
+    """
+    Parse a swap file.
+
+    A record cut short by a crash ends the journal, everything before it is kept.
+
+    Returns:
+        tuple: (header, records) where header is a dict with "size", "mtime_ns" and
+            "path", and records is a list of ("insert", index, text) or
+            ("delete", start, end) tuples.
+    """
+    with open(swap_path, 'rb') as f:
+        data = f.read()
+    newline = data.find(b"\n")
+    parts = data[:newline].split(b" ", 3) if newline >= 0 else []
+    if len(parts) != 4 or parts[0] != MAGIC:
+        raise ValueError(f"Not a journal file: {swap_path}")
+    header = {"size": int(parts[1]), "mtime_ns": int(parts[2]),
+              "path": parts[3].decode('utf-8', errors='surrogateescape')}
+    return header, parse_records(data, newline + 1)
+
+
+def parse_records(data, pos=0):
+    """Decode the records stored in data starting at pos"""
+    records = []
+    while pos < len(data):
+        newline = data.find(b"\n", pos)
+        if newline < 0:
+            break
+        fields = data[pos:newline].decode('ascii').split(" ")
+        pos = newline + 1
+        if fields[0] == "I" and len(fields) == 3:
+            size = int(fields[2])
+            if pos + size + 1 > len(data):
+                break  # Truncated by a crash
+            records.append(("insert", fields[1], data[pos:pos + size].decode('utf-8', errors='surrogatepass')))
+            pos += size + 1
+        elif fields[0] == "D" and len(fields) == 3:
+            records.append(("delete", fields[1], fields[2]))
+        else:
+            break
+    return records
+
+
+def replay(text_widget, records):
+    """Apply journal records to a Text widget holding the base document"""
+    for operation, first, second in records:
+        if operation == "insert":
+            text_widget.insert(first, second)
+        else:
+            text_widget.delete(first, second)
+
+
+def base_matches(doc_path, header):
+    """Return True if the document is still the one the journal was written against"""
+    return _stat_base(doc_path) == (header["size"], header["mtime_ns"])
+
+
+class EditJournal:
+    """
+    An append-only journal of the edits made to one document.
+
+    Records are buffered in memory and appended to the swap file by flush(). A
+    save takes a checkpoint() before the snapshot is queued, and commit() drops
+    the records that snapshot covers once it is safely on disk. The swap file is
+    removed as soon as no records remain.
+
+    Attributes:
+        doc_path: The document the journal belongs to
+        swap_path: The swap file beside the document
+    """
+
+    def __init__(self, doc_path):
+        self.doc_path = doc_path
+        self.swap_path = swap_path_for(doc_path)
+        self._buffer = bytearray()  # Records not yet appended to the swap file
+        self._on_disk = 0           # Bytes of records in the swap file, header excluded
+        self._started = False       # Whether the swap file was created by this journal
+        self._base = 0              # Logical offset of the first record still kept
+        self._total = 0             # Logical offset just past the last record
+
+    def _append(self, record):
+        self._buffer += record
+        self._total += len(record)
+
+    def record_insert(self, index, text):
+        """Record text inserted at a line.char index"""
+        data = text.encode('utf-8', errors='surrogatepass')
+        self._append(b"I %s %d\n" % (index.encode('ascii'), len(data)) + data + b"\n")
+
+    def record_delete(self, start, end):
+        """Record the deletion of a line.char range"""
+        self._append(b"D %s %s\n" % (start.encode('ascii'), end.encode('ascii')))
+
+    def has_records(self):
+        """Return True if edits are recorded that the document does not have yet"""
+        return self._total > self._base
+
+    def size(self):
+        """Return the size of the recorded edits in bytes"""
+        return self._total - self._base
+
+    def _header(self):
+        size, mtime_ns = _stat_base(self.doc_path)
+        return b"%s %d %d %s\n" % (MAGIC, size, mtime_ns,
+                                   self.doc_path.encode('utf-8', errors='surrogateescape'))
+
+    def _rewrite(self, records):
+        """Atomically replace the swap file with a fresh header and the given records"""
+        fd, temp_path = tempfile.mkstemp(prefix=".tne-swp.", dir=os.path.dirname(self.swap_path))
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(self._header())
+                f.write(records)
+            os.replace(temp_path, self.swap_path)
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+        self._on_disk = len(records)
+        if not self._started:
+            self._started = True
+            register(self.doc_path)
+
+    def flush(self):
+        """
+        Append the buffered records to the swap file.
+
+        Returns:
+            int: The number of bytes written.
+        """
+        if not self._buffer:
+            return 0
+        written = len(self._buffer)
+        if not self._started or not os.path.exists(self.swap_path):
+            self._started = self._started and os.path.exists(self.swap_path)
+            # The first write replaces any journal left over from an earlier session
+            self._rewrite(bytes(self._buffer))
+        else:
+            with open(self.swap_path, 'ab') as f:
+                f.write(self._buffer)
+            self._on_disk += written
+        self._buffer.clear()
+        return written
+
+    def checkpoint(self):
+        """Mark the records covered by a snapshot that is about to be saved"""
+        return self._total
+
+    def commit(self, token):
+        """Drop the records covered by a checkpoint whose snapshot is now on disk"""
+        drop = token - self._base
+        if drop <= 0:
+            return
+        self._base = token
+        if not self._started:
+            del self._buffer[:drop]
+            return
+        with open(self.swap_path, 'rb') as f:
+            f.seek(-self._on_disk, os.SEEK_END)
+            records = f.read() + bytes(self._buffer)
+        self._buffer.clear()
+        if records[drop:]:
+            self._rewrite(records[drop:])
+        else:
+            self.discard()
+
+    def discard(self):
+        """Throw the journal away, used once its edits are saved or abandoned"""
+        self._buffer.clear()
+        self._base = self._total
+        if self._started:
+            try:
+                os.remove(self.swap_path)
+            except FileNotFoundError:
+                pass
+            self._started = False
+            self._on_disk = 0
+            unregister(self.doc_path)
@@ -0,0 +1,233 @@
+"""
+    Group: TAMUSA Notepad Experts (TNE)
+    Authors: Joshua Ludolf & Luis Morales
+    Class: CSCI 3366 - Programming Languages
+
+    Line index module for the TAMUSA Notepad application.
+    Records the byte offset of every line of a file in a compact array('Q'),
+    so jumping to a line or counting lines never rescans the file. Indexes of
+    large files are cached on disk, keyed by path, size and modification time.
+"""
+
+import bisect
+import hashlib
+import os
+import queue
+import struct
+import sys
+import tempfile
+import threading
+from array import array
+from itertools import accumulate, repeat
+from operator import add
+
+CHUNK_SIZE = 16 * 1024 * 1024      # Bytes scanned per read while building
+CACHE_MIN_SIZE = 8 * 1024 * 1024   # Smaller files are indexed again rather than cached
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".tne_cache", "lineindex")
+
+# Cache file header: magic, byte order, file size, file mtime_ns, line count
+CACHE_MAGIC = b"TNEL1"
+CACHE_HEADER = struct.Struct("<5sBQQQ")
+
+
+class IndexCancelled(Exception):
+    """Raised by build() when the caller cancels it"""
+
+
+class LineIndex:
+    """
+    Byte offsets of the start of every line of a file.
+
+    Lines are numbered from 1 like in the Text widget. A file ending with a
+    line break has an empty last line, so line_count() is the number of line
+    breaks plus one.
+
+    Attributes:
+        path: The indexed file
+        size: The file size when it was indexed
+        mtime_ns: The file modification time when it was indexed
+        offsets: array('Q') of line start offsets, offsets[0] is always 0
+    """
+
+    def __init__(self, path, size, mtime_ns, offsets):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.offsets = offsets
+
+    def line_count(self):
+        """Return the number of lines in the file"""
+        return len(self.offsets)
+
+    def offset(self, line):
+        """Return the byte offset of a 1-based line, clamped to the first and last line"""
+        line = min(max(line, 1), len(self.offsets))
+        return self.offsets[line - 1]
+
+    def line_at(self, offset):
+        """Return the 1-based line containing a byte offset"""
+        return max(1, bisect.bisect_right(self.offsets, offset))
+
+    def is_current(self):
+        """Return True if the file has not changed since it was indexed"""
+        try:
+            st = os.stat(self.path)
+        except OSError:
+            return False
+        return (st.st_size, st.st_mtime_ns) == (self.size, self.mtime_ns)
+
+
+def build(path, chunk_size=CHUNK_SIZE, cancel_event=None):
+    """
+    Scan a file once and index its line starts.
+
+    Each chunk is split on b'\\n' and the offsets are accumulated by C-level
+    iterators, so there is no Python loop per line.
+
+    Args:
+        path (str): The file to index.
+        chunk_size (int): Bytes read at a time.
+        cancel_event (threading.Event): Stops the scan when set.
+
+    Returns:
+        LineIndex: The index of the file.
+
+    Raises:
+        IndexCancelled: If cancel_event was set during the scan.
+    """
+    offsets = array('Q', [0])
+    with open(path, 'rb') as f:
+        st = os.fstat(f.fileno())
+        base = 0     # File offset of the start of the current chunk
+        while True:
+            if cancel_event is not None and cancel_event.is_set():
+                raise IndexCancelled(path)
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            pieces = chunk.split(b"\n")
+            # Every piece but the last one ends with a line break, the next line
+            # starts len(piece) + 1 bytes further on
+            starts = accumulate(map(add, map(len, pieces[:-1]), repeat(1)), initial=base)
+            next(starts)  # Skip the chunk start itself, it is already indexed
+            offsets.extend(starts)
+            base += len(chunk)
+            del pieces
+    return LineIndex(path, st.st_size, st.st_mtime_ns, offsets)
+
+
+def cache_path_for(path):
+    """Return the cache file used for a file's line index"""
+    key = hashlib.sha1(os.path.abspath(path).encode('utf-8', errors='surrogateescape')).hexdigest()
+    return os.path.join(CACHE_DIR, f"{key}.idx")
+
+
+def load_cached(path):
+    """
+    Load a file's line index from the on-disk cache.
+
+    Returns:
+        LineIndex: The cached index, or None if there is none or the file changed since.
+    """
+    try:
+        st = os.stat(path)
+        with open(cache_path_for(path), 'rb') as f:
+            magic, big_endian, size, mtime_ns, count = CACHE_HEADER.unpack(f.read(CACHE_HEADER.size))
+            if (magic != CACHE_MAGIC or bool(big_endian) != (sys.byteorder == "big")
+                    or (size, mtime_ns) != (st.st_size, st.st_mtime_ns)):
+                return None
+            offsets = array('Q')
+            offsets.fromfile(f, count)
+    except (OSError, EOFError, struct.error):
+        return None
+    return LineIndex(path, size, mtime_ns, offsets)
+
+
+def save_cached(index):
+    """Write a line index to the on-disk cache, replacing it atomically"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=".idx.", dir=CACHE_DIR)
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(CACHE_HEADER.pack(CACHE_MAGIC, sys.byteorder == "big", index.size,
+                                          index.mtime_ns, len(index.offsets)))
+                index.offsets.tofile(f)
+            os.replace(temp_path, cache_path_for(index.path))
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+    except OSError as e:
+        print(f"Error caching line index: {e}")
+
+
+def get_index(path, cancel_event=None, cache=True):
+    """Return a file's line index from the cache, building and caching it if needed"""
+    index = load_cached(path) if cache else None
+    if index is None:
+        index = build(path, cancel_event=cancel_event)
+        if cache and index.size >= CACHE_MIN_SIZE:
+            save_cached(index)
+    return index
+
+
+class IndexBuilder:
+    """
+    Builds a line index on a background thread.
+
+    The result is handed back through a queue and delivered by poll(), which
+    the caller runs from the Tk event loop, so the callback runs on the Tk thread.
+
+    Attributes:
+        path: The file being indexed
+        index: The finished LineIndex, None until poll() delivered it
+    """
+
+    def __init__(self, path, callback, cache=True):
+        """
+        Args:
+            path (str): The file to index.
+            callback (callable): Called as callback(index, error) by poll() once done.
+            cache (bool): Use the on-disk cache, off for temporary files.
+        """
+        self.path = path
+        self.callback = callback
+        self.cache = cache
+        self.index = None
+        self._results = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="TNE-LineIndex", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            self._results.put((get_index(self.path, self._cancel, self.cache), None))
+        except IndexCancelled:
+            pass
+        except Exception as e:
+            self._results.put((None, e))
+
+    def done(self):
+        """Return True once the thread finished"""
+        return not self._thread.is_alive()
+
+    def poll(self):
+        """Deliver the result if it is ready, returns True once it was delivered"""
+        try:
+            index, error = self._results.get_nowait()
+        except queue.Empty:
+            return False
+        self.index = index
+        if not self._cancel.is_set():
+            self.callback(index, error)
+        return True
+
+    def cancel(self):
+        """Stop the scan, the callback is not called"""
+        self._cancel.set()
@@ -0,0 +1,139 @@
+"""
+    Group: TAMUSA Notepad Experts (TNE)
+    Authors: Joshua Ludolf & Luis Morales
+    Class: CSCI 3366 - Programming Languages
+
+    Progressive loading module for the TAMUSA Notepad application.
+    Inserts large documents into the editor in line-aligned chunks scheduled
+    with after(), so the first screenful shows at once and the window stays
+    responsive while the rest streams in.
+"""
+
+import collections
+import contextlib
+import tkinter as tk
+
+SYNC_LIMIT = 1024 * 1024   # Documents up to this many characters are inserted in one call
+FIRST_CHUNK = 64 * 1024    # Enough for the first screenful
+CHUNK_SIZE = 256 * 1024    # Characters inserted per after() step
+
+
+def text_length(content):
+    """Return the number of characters of a document given as a str or a list of str chunks"""
+    if isinstance(content, str):
+        return len(content)
+    return sum(map(len, content))
+
+
+def next_boundary(content, start, chunk_size):
+    """
+    Return the end of the chunk starting at start, just after a line break when possible.
+
+    A chunk is cut mid-line only if no line break shows up within twice the chunk size.
+    """
+    end = start + chunk_size
+    if end >= len(content):
+        return len(content)
+    newline = content.find('\n', end, end + chunk_size)
+    return newline + 1 if newline != -1 else end
+
+
+class ProgressiveLoader:
+    """
+    Streams a decoded document into a Text widget.
+
+    The widget is read-only while loading, so the user cannot edit a document
+    that is only partly there. Press Escape (bound by the caller) to cancel().
+    The document can be given as the chunks it was decoded in (see
+    document.read_document(chunked=True)), each is dropped once inserted.
+
+    Attributes:
+        text_widget: The Text widget being filled
+        content: The chunk being inserted, released once the load ends
+        total: Length of the document in characters
+        position: Number of characters inserted so far
+        active: True until the load completes or is cancelled
+    """
+
+    def __init__(self, text_widget, content, on_progress=None, on_done=None, mute=None,
+                 chunk_size=CHUNK_SIZE, first_chunk=FIRST_CHUNK):
+        """
+        Args:
+            text_widget (tk.Text): The widget to fill, it should be empty.
+            content (str or list): The text to insert, or its chunks in order.
+            on_progress (callable): Called as on_progress(fraction) after each chunk.
+            on_done (callable): Called as on_done(cancelled) once the load ends.
+            mute (callable): Returns a context manager that silences edit listeners
+                during each chunk insert (e.g. TextWatcher.muted).
+        """
+        self.text_widget = text_widget
+        self._pieces = collections.deque([content] if isinstance(content, str) else content)
+        self.total = text_length(self._pieces)
+        self.content = self._pieces.popleft() if self._pieces else ""
+        self._offset = 0  # Characters of content inserted so far
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.mute = mute or contextlib.nullcontext
+        self.chunk_size = chunk_size
+        self.first_chunk = first_chunk
+        self.position = 0
+        self.active = False
+        self._after_id = None
+        self._state = None
+
+    def start(self):
+        """Insert the first screenful now and schedule the rest"""
+        self.active = True
+        self._state = self.text_widget.cget("state")
+        self.text_widget.configure(state=tk.NORMAL)
+        self._insert_next(self.first_chunk)
+        if self.active:
+            self.text_widget.configure(state=tk.DISABLED)
+            self._after_id = self.text_widget.after(1, self._step)
+
+    def _insert_next(self, chunk_size):
+        while self._offset >= len(self.content) and self._pieces:
+            self.content = self._pieces.popleft()
+            self._offset = 0
+        end = next_boundary(self.content, self._offset, chunk_size)
+        with self.mute():
+            self.text_widget.insert("end", self.content[self._offset:end])
+        self.position += end - self._offset
+        self._offset = end
+        if self.on_progress is not None:
+            self.on_progress(self.fraction())
+        if self.position >= self.total:
+            self._finish(cancelled=False)
+
+    def _step(self):
+        self._after_id = None
+        if not self.active:
+            return
+        try:
+            self.text_widget.configure(state=tk.NORMAL)
+            self._insert_next(self.chunk_size)
+            if self.active:
+                self.text_widget.configure(state=tk.DISABLED)
+                self._after_id = self.text_widget.after(1, self._step)
+        except tk.TclError:
+            self.active = False  # Widget has been destroyed
+
+    def fraction(self):
+        """Return how much of the document is loaded, from 0.0 to 1.0"""
+        return self.position / self.total if self.total else 1.0
+
+    def cancel(self):
+        """Stop loading, the part inserted so far stays in the widget"""
+        if self.active:
+            if self._after_id is not None:
+                self.text_widget.after_cancel(self._after_id)
+                self._after_id = None
+            self._finish(cancelled=True)
+
+    def _finish(self, cancelled):
+        self.active = False
+        self.text_widget.configure(state=self._state or tk.NORMAL)
+        if self.on_done is not None:
+            self.on_done(cancelled)
+        self.content = None  # Release the decoded copy
+        self._pieces.clear()
@@ -5,8 +5,8 @@
 """
 
 import tkinter as tk
-import file, emoji, fonts, os, pathlib, re
-from tkinter import scrolledtext, Menu, ttk, messagebox, Toplevel
+import file, emoji, fonts, saver, journal, textwatch, document, loader, viewer, lineindex, follow, hexview, dirscan, quickopen, findfiles, findbar, textstats, highlight, undo, itertools, os, pathlib, re, time
+from tkinter import scrolledtext, Menu, ttk, messagebox, Toplevel, simpledialog
 from emoji import EmojiPicker
 
 
@@ -20,6 +20,8 @@ class NotePad:
         The root window of the application.
     current_file : list
         A list to hold the current file path.
+    document : DocumentInfo
+        The encoding and line-ending style of the current file.
     Methods
     -------
     __init__(root):
@@ -43,23 +45,77 @@ class NotePad:
     populate_tree(path="."):
         Populates the file tree with directories and files starting from the given path.
 
-    add_directory(parent, path, depth=0):
-        Recursively adds directories and files to the file tree view.
+    add_directory(parent, path):
+        Queues a background listing of one directory for the file tree view.
+
+    reveal_path(path):
+        Selects the tree row of a file, expanding its parent directories as needed.
+
+    reveal_current_file():
+        Reveals the open file in the file tree.
+
+    refresh_tree(event=None):
+        Lists the expanded directories again and applies only the changed rows.
+
+    on_tree_open(event=None):
+        Lists a directory the first time it is expanded.
+
+    on_tree_close(event=None):
+        Cancels the listing of a directory collapsed before it arrived.
 
     load_more(parent):
-        Loads more items in a directory when requested.
+        Shows the next page of a directory's listing.
 
     on_tree_double_click(event):
         Handles double-click events on the file tree to open files or expand directories.
 
+    open_path(full_path):
+        Opens a file from the file tree or quick open in the editor.
+
+    show_quick_open(event=None):
+        Opens the Ctrl+P dialog that finds files under the file tree's root by name.
+
+    show_find_in_files():
+        Opens the window that searches the contents of the files under the file tree's root.
+
     format_size(size):
         Formats the size of a file in a human-readable format (B, KB, MB, etc.).
 
     update_status(event=None):
-        Updates the status bar with the current cursor position and file information.
+        Marks the status bar out of date, it is refreshed once the Tk loop is idle.
+
+    flush_status():
+        Updates the status bar with the cursor position, counts and file information.
+
+    save_file(content=None, autosave=False, on_written=None):
+        Queues the current content of the text editor to be saved by the background writer.
+
+    on_save_finished(path, error, latency=None):
+        Reports the result of a background save in the status bar.
+
+    journal_autosave():
+        Appends the pending edits to the document's journal instead of rewriting the file.
 
-    save_file(content=None):
-        Saves the current content of the text editor to a file.
+    recover_journal(doc_path, swap_path):
+        Opens a document and replays the edits left in its journal by a crashed session.
+
+    open_large_file(path):
+        Shows a file too large to edit in the read-only memory-mapped viewer.
+
+    open_hex_view(path):
+        Shows a binary file as read-only hex/ASCII rows.
+
+    goto_line(event=None, line=None):
+        Moves the cursor (or the large file view) to a line number.
+
+    toggle_follow():
+        Starts or stops following the current file as it grows, like tail -F.
+
+    update_syntax():
+        Highlights the document with the lexer for its file type, if there is one.
+
+    undo(event=None) / redo(event=None):
+        Undoes or redoes the last edit, typed words and commands count as one edit each.
     """
     def __init__(self, root):
         self.root = root
@@ -72,9 +128,63 @@ class NotePad:
         except tk.TclError:
             pass  # Icon not supported on this platform
         self.current_file = [None]
+        self.document = document.DocumentInfo()
         
         # Initialize font manager (will be set after text widget is created)
         self.font_manager = None
+
+        # Saves are written by a background thread so slow disks don't block the UI
+        self.writer = saver.BackgroundWriter()
+        self._save_poll_id = None
+        self.autosave_fsync = saver.AUTOSAVE_FSYNC
+        self.save_fsync = saver.SAVE_FSYNC
+
+        # Large documents are streamed into the editor by a ProgressiveLoader
+        self.loader = None
+
+        # Files of viewer.LARGE_FILE_THRESHOLD or more are paged in read-only by a LargeFileView
+        self.viewer = None
+        self._viewer_temp = None   # Decompressed copy of a compressed file shown in the viewer
+        self.index_builder = None  # Builds the viewer's line index in the background
+        self.decompressor = None   # Decompresses a large compressed file for the viewer in the background
+        self._decompress_poll_id = None
+        self._index_poll_id = None
+
+        # Follow mode appends what a growing file (e.g. a log) gained since the last check
+        self.follower = None
+        self._follow_id = None
+        self.follow_max_lines = None  # Oldest lines are dropped past this many, None keeps all
+
+        # The file tree lists directories on worker threads, results are drained by _poll_scans
+        self.listing_cache = dirscan.ListingCache()  # max_entries sets the budget
+        self.scanner = dirscan.DirectoryScanner(cache=self.listing_cache)
+        self._scan_tokens = itertools.count()
+        self._scan_items = {}  # scan token -> (tree item, refresh)
+        self._item_scans = {}  # tree item -> scan token
+        self._scan_poll_id = None
+        self._listings = {}  # tree item -> (sorted entries, number shown)
+        self.tree_page_size = dirscan.PAGE_SIZE
+        self._stale = set()  # Listed, collapsed directories to refresh when expanded again
+        self._path_items = {}  # dirscan.path_key(path) -> tree item, for every row with a path
+        self._reveal_target = None  # Path reveal_path() is still expanding directories for
+        self.tree_refresh_interval = dirscan.REFRESH_INTERVAL  # Seconds, None turns it off
+        self._tree_refresh_id = None
+
+        # Ctrl+P searches an index of every file under the tree's root, built in the background
+        self.path_index = None
+        self.path_index_builder = None
+        self._path_index_poll_id = None
+        self.quick_open_dialog = None
+        self.find_in_files_dialog = None
+
+        # The status bar is refreshed once per idle loop, however many keys arrived
+        self._status_idle_id = None
+        self.text_stats = textstats.TextStats()  # Line/word/char counts, updated per edit
+        self._count_id = None  # Next slice of a recount of the whole document
+
+        # Edits are journaled beside the document between full saves
+        self.journal = None
+        self.journal_limit = journal.JOURNAL_LIMIT
         
         self.create_widgets()
     
@@ -114,6 +224,24 @@ class NotePad:
         )
         self.message_box.pack(fill=tk.BOTH, expand=True)
 
+        # Report every edit, typed or inserted from code, to the journal
+        self.watcher = textwatch.TextWatcher(self.message_box)
+        self.watcher.add_listener(self._journal_edit)
+        self.watcher.add_listener(self._forget_loaded_size)
+        self.watcher.add_listener(self._count_edit, needs_deleted_text=True)
+
+        # Undo history of the edits themselves, under a memory budget
+        self.undo_manager = undo.UndoManager(self.message_box, self.watcher)  # history.max_bytes sets the budget
+
+        # Syntax highlighting, retokenizes only the edited lines in idle time
+        self.highlighter = highlight.Highlighter(self.message_box, self.watcher,
+                                                 paused_func=self.is_loading)
+
+        # Find bar, shown under the editor by Ctrl+F
+        self.find_bar = findbar.FindBar(self.editor_frame, self.message_box,
+                                        lambda message: self.status_bar.config(text=message),
+                                        self.is_read_only, self.undo_manager)
+
         # Initialize font manager after text widget is created
         self.font_manager = fonts.create_font_manager(self.message_box)
 
@@ -137,6 +265,30 @@ class NotePad:
         self.message_box.bind("<KeyPress>", self.update_status)
         self.message_box.bind("<KeyRelease>", self.update_status)
         
+        # Escape cancels a document that is still loading
+        self.message_box.bind("<Escape>", self.cancel_loading)
+
+        # Quick open
+        self.message_box.bind("<Control-p>", self.show_quick_open)
+        self.message_box.bind("<Control-P>", self.show_quick_open)
+
+        # Find and replace
+        self.message_box.bind("<Control-f>", lambda e: self.find_bar.show())
+        self.message_box.bind("<Control-F>", lambda e: self.find_bar.show())
+        self.message_box.bind("<Control-h>", lambda e: self.find_bar.show(replace=True))
+        self.message_box.bind("<Control-H>", lambda e: self.find_bar.show(replace=True))
+        self.message_box.bind("<F3>", self.find_bar.find_next)
+        self.message_box.bind("<Shift-F3>", self.find_bar.find_previous)
+
+        # Undo and redo
+        self.message_box.bind("<Control-z>", self.undo)
+        self.message_box.bind("<Control-Shift-Z>", self.redo)
+        self.message_box.bind("<Control-y>", self.redo)
+
+        # Go to line
+        self.message_box.bind("<Control-g>", self.goto_line)
+        self.message_box.bind("<Control-G>", self.goto_line)
+
         # Bind emoji shortcuts
         self.message_box.bind("<Control-e>", self.show_emoji_picker)
         self.message_box.bind("<Control-E>", self.show_emoji_picker)        # Bind font shortcuts
@@ -227,156 +379,356 @@ class NotePad:
 
         # Bind double-click event
         self.tree.bind("<Double-1>", self.on_tree_double_click)
+        # Directories are listed when first expanded
+        self.tree.bind("<<TreeviewOpen>>", self.on_tree_open)
+        self.tree.bind("<<TreeviewClose>>", self.on_tree_close)
+        self.tree.bind("<F5>", self.refresh_tree)
+        self.tree.bind("<Control-p>", self.show_quick_open)
 
         # Populate tree with user's home directory
         import pathlib
         self.populate_tree(str(pathlib.Path.home()))
+        self._schedule_tree_refresh()
 
     def populate_tree(self, path="."):
+        # Stop listing and indexing the previous tree
+        self.cancel_scans()
+        if self.path_index_builder is not None:
+            self.path_index_builder.cancel()
+            self.path_index_builder = None
+
         # Clear existing items
         for item in self.tree.get_children():
             self.tree.delete(item)
+        self._path_items.clear()
+        self._reveal_target = None
 
         # Get absolute path
         abs_path = os.path.abspath(path)
         
         try:
-            # Add root directory
+            # Add root directory, its listing arrives from the scanner
             root_node = self.tree.insert("", "end", text=f"{self.folder_icon} {os.path.basename(abs_path)}",
-                                       values=("", abs_path))
+                                       values=("", abs_path), open=True)
+            self._path_items[dirscan.path_key(abs_path)] = root_node
             self.add_directory(root_node, abs_path)
         except Exception as e:
             if hasattr(self, 'status_bar'):
                 self.status_bar.config(text=f"Error accessing directory: {str(e)}")
 
-    def add_directory(self, parent, path, depth=0):
-        try:
-            # Only go 2 levels deep initially
-            if depth > 1:
-                # Add a dummy node if we're at max depth
-                self.tree.insert(parent, "end", text="...", values=("", ""))
-                return
+    def add_directory(self, parent, path):
+        """
+        Queue a listing of one directory under parent.
 
-            # Process directories first, then files
-            try:
-                entries = list(os.scandir(path))
-                dirs = sorted([e for e in entries if e.is_dir()], key=lambda e: e.name.lower())
-                files = sorted([e for e in entries if e.is_file()], key=lambda e: e.name.lower())
-            except PermissionError:
-                return
+        The directory is listed and its files stat'ed on the scanner's worker
+        threads, parent shows a "loading…" child until the result is drained.
 
-            # Add directories first
-            for entry in dirs[:50]:  # Limit to first 50 directories
-                try:
-                    node = self.tree.insert(parent, "end",
-                                          text=f"{self.folder_icon} {entry.name}",
-                                          values=("", entry.path))
-                    # Recursively add subdirectories
-                    self.add_directory(node, entry.path, depth + 1)
-                except PermissionError:
-                    continue
+        Args:
+            parent (str): The tree item of the directory.
+            path (str): The directory to list.
+        """
+        self._cancel_scan(parent)
+        self._delete_rows(self.tree.get_children(parent))
+        self._listings.pop(parent, None)
+        # Forget the pages of directories removed from the tree
+        for item in [item for item in self._listings if not self.tree.exists(item)]:
+            del self._listings[item]
+        self.tree.insert(parent, "end", text="loading…", values=("", ""), tags=("loading",))
+        self._submit_scan(parent, path, refresh=False)
 
-            # Then add files
-            for entry in files[:50]:  # Limit to first 50 files
-                try:
-                    size = self.format_size(entry.stat().st_size)
-                    self.tree.insert(parent, "end",
-                                   text=f"{self.file_icon} {entry.name}",
-                                   values=(size, entry.path))
-                except PermissionError:
-                    continue
+    def _submit_scan(self, item, path, refresh):
+        token = next(self._scan_tokens)
+        self._scan_items[token] = (item, refresh)
+        self._item_scans[item] = token
+        self.scanner.submit(token, path, restat=refresh)  # Refreshes pick up files written in place
+        self._schedule_scan_poll()
 
-            # If there are more items, add an indicator
-            if len(dirs) > 50 or len(files) > 50:
-                remaining = (len(dirs) - 50 if len(dirs) > 50 else 0) + (len(files) - 50 if len(files) > 50 else 0)
-                self.tree.insert(parent, "end", text=f"... {remaining} more items", values=("", ""))
+    def _fill_directory(self, parent, entries):
+        """Replace the loading row of a finished listing with its first page"""
+        self.tree.delete(*self.tree.get_children(parent))
+        self._listings[parent] = (entries, 0)
+        self._insert_page(parent)
 
-        except Exception as e:
-            if hasattr(self, 'status_bar'):
-                self.status_bar.config(text=f"Error reading directory: {str(e)}")
+    def _insert_page(self, parent):
+        """
+        Insert the next page of a directory's listing, ending with a row that loads the following one.
 
-    def load_more(self, parent):
-        """Load more items in a directory when requested"""
-        path = self.tree.item(parent)["values"][1]
-        if not path:  # Skip if no path stored
+        The listing was sorted once on the scanner thread, pages are slices of
+        it, so a directory with 100k entries never has them all in the tree.
+        """
+        entries, shown = self._listings[parent]
+        page = entries[shown:shown + self.tree_page_size]
+        for index, entry in enumerate(page, start=shown):  # Before the sentinel row
+            self._insert_entry(parent, index, entry)
+        self._listings[parent] = (entries, shown + len(page))
+        self._update_more_row(parent)
+
+    def _insert_entry(self, parent, index, entry):
+        """Insert the row of one listing entry, directories get listed when expanded"""
+        if entry.is_dir:
+            node = self.tree.insert(parent, index,
+                                  text=f"{self.folder_icon} {entry.name}",
+                                  values=("", entry.path))
+            self._add_placeholder(node)
+        else:
+            node = self.tree.insert(parent, index,
+                                  text=f"{self.file_icon} {entry.name}",
+                                  values=(self.format_size(entry.size), entry.path))
+        self._path_items[dirscan.path_key(entry.path)] = node
+
+    def _delete_rows(self, items):
+        """Delete rows and their subtrees from the tree and from the path index"""
+        stack = list(items)
+        while stack:
+            item = stack.pop()
+            path = self.tree.item(item)["values"][1]
+            if path:
+                self._path_items.pop(dirscan.path_key(path), None)
+            stack.extend(self.tree.get_children(item))
+        self.tree.delete(*items)
+
+    def _update_more_row(self, parent):
+        """Put the "... more items" row after the shown entries, or remove it once all are shown"""
+        for child in self.tree.get_children(parent):
+            if "more" in self.tree.item(child, "tags"):
+                self.tree.delete(child)
+        entries, shown = self._listings[parent]
+        remaining = len(entries) - shown
+        if remaining > 0:
+            self.tree.insert(parent, "end",
+                           text=f"... {remaining} more items (load next {min(remaining, self.tree_page_size)})",
+                           values=("", ""), tags=("more",))
+
+    def _merge_directory(self, parent, entries):
+        """
+        Bring a listed directory's rows up to date with a new listing.
+
+        Rows are matched by path, so only added, removed and resized entries
+        touch the tree and expanded subdirectories keep their state. The same
+        number of entries stays shown, at least one page.
+
+        Returns:
+            int: The number of rows inserted, deleted or updated.
+        """
+        old_entries, shown = self._listings[parent]
+        if entries is old_entries:
+            return 0  # Served from the listing cache, no entry or size changed
+        rows = [child for child in self.tree.get_children(parent)
+                if "more" not in self.tree.item(child, "tags")]
+        current = {entry.path: (entry, row) for entry, row in zip(old_entries, rows)}
+        shown = min(len(entries), max(shown, self.tree_page_size))
+        wanted = entries[:shown]
+        wanted_kinds = {entry.path: entry.is_dir for entry in wanted}
+        changes = 0
+
+        for path, (entry, row) in current.items():
+            if wanted_kinds.get(path) != entry.is_dir:
+                self._delete_rows([row])
+                changes += 1
+        # Both listings are sorted the same way, so kept rows are already in order
+        for index, entry in enumerate(wanted):
+            old = current.get(entry.path)
+            if old is None or old[0].is_dir != entry.is_dir:
+                self._insert_entry(parent, index, entry)
+                changes += 1
+            elif old[0].size != entry.size:
+                self.tree.item(old[1], values=(self.format_size(entry.size), entry.path))
+                changes += 1
+        self._listings[parent] = (entries, shown)
+        self._update_more_row(parent)
+        return changes
+
+    def reveal_path(self, path):
+        """
+        Select and scroll to the tree row of a file or directory.
+
+        Parent directories that are not listed yet are expanded one at a time,
+        the reveal continues as their listings arrive.
+
+        Args:
+            path (str): The file or directory to reveal.
+
+        Returns:
+            bool: True if the row was selected, False if it is still being listed
+                or the path is not under the tree's root.
+        """
+        key = dirscan.path_key(path)
+        self._reveal_target = None
+        item = self._path_items.get(key)
+        if item is not None:
+            parent = self.tree.parent(item)
+            while parent:
+                self.tree.item(parent, open=True)
+                parent = self.tree.parent(parent)
+            self.tree.see(item)
+            self.tree.selection_set(item)
+            self.tree.focus(item)
+            return True
+
+        # Walk up to the closest directory that has a row
+        child, ancestor = key, os.path.dirname(key)
+        while ancestor not in self._path_items:
+            if os.path.dirname(ancestor) == ancestor:
+                return False  # Not under the tree's root
+            child, ancestor = ancestor, os.path.dirname(ancestor)
+        item = self._path_items[ancestor]
+        self.tree.item(item, open=True)
+        if item not in self._listings:
+            if self._is_unlisted(item) or item in self._item_scans:
+                self._reveal_target = path
+                self.expand_directory(item)  # Continued by _poll_scans
+            return False
+
+        # Listed, the next step down may be on a page not shown yet
+        entries, shown = self._listings[item]
+        index = next((index for index, entry in enumerate(entries) if dirscan.path_key(entry.path) == child), None)
+        if index is None or index < shown:
+            return False  # Not in the listing, e.g. created since
+        while self._listings[item][1] <= index:
+            self._insert_page(item)
+        return self.reveal_path(path)
+
+    def reveal_current_file(self):
+        """Reveal the open file in the file tree"""
+        path = self.current_file[0]
+        if not path:
             return
+        try:
+            if not self.reveal_path(path) and self._reveal_target is None and hasattr(self, 'status_bar'):
+                self.status_bar.config(text=f"Not in the file tree: {path}")
+        except tk.TclError:
+            pass  # Widget has been destroyed
+
+    def refresh_tree(self, event=None):
+        """
+        List the expanded directories again and apply only what changed.
+
+        Unchanged directories cost one stat on a scanner thread. Listed but
+        collapsed directories are refreshed when they are expanded again.
+        """
+        for item in list(self._listings):
+            if not self.tree.exists(item):
+                del self._listings[item]
+                self._stale.discard(item)
+            elif item in self._item_scans:
+                continue  # Already being listed
+            elif self.tree.item(item, "open"):
+                self._submit_scan(item, self.tree.item(item)["values"][1], refresh=True)
+            else:
+                self._stale.add(item)
+
+    def _schedule_tree_refresh(self):
+        if self.tree_refresh_interval:
+            self._tree_refresh_id = self.root.after(int(self.tree_refresh_interval * 1000),
+                                                    self._auto_refresh_tree)
 
+    def _auto_refresh_tree(self):
+        """Pick up changes made outside the editor"""
+        self._tree_refresh_id = None
         try:
-            entries = list(os.scandir(path))
-            dirs = sorted([e for e in entries if e.is_dir()], key=lambda e: e.name.lower())
-            files = sorted([e for e in entries if e.is_file()], key=lambda e: e.name.lower())
+            self.refresh_tree()
+        except tk.TclError:
+            return  # Widget has been destroyed
+        self._schedule_tree_refresh()
 
-            # Remove existing items
-            for child in self.tree.get_children(parent):
-                self.tree.delete(child)
+    def _schedule_scan_poll(self):
+        """Drain the scanner from the Tk loop until every scan is delivered"""
+        if self._scan_poll_id is None:
+            self._scan_poll_id = self.root.after(30, self._poll_scans)
 
-            # Add all directories
-            for entry in dirs:
-                try:
-                    node = self.tree.insert(parent, "end",
-                                          text=f"{self.folder_icon} {entry.name}",
-                                          values=("", entry.path))
-                    # Add a dummy node to allow expansion
-                    self.tree.insert(node, "end", text="...", values=("", ""))
-                except PermissionError:
+    def _poll_scans(self):
+        self._scan_poll_id = None
+        try:
+            for token, path, entries, error in self.scanner.poll():
+                parent, refresh = self._scan_items.pop(token, (None, False))
+                if self._item_scans.get(parent) != token:
                     continue
+                del self._item_scans[parent]
+                if not self.tree.exists(parent):
+                    continue  # Removed while it was being listed
+                if refresh:
+                    if error is None and parent in self._listings:
+                        self._merge_directory(parent, entries)
+                    # A directory that vanished is removed by its parent's refresh
+                elif error is None:
+                    self._fill_directory(parent, entries)
+                    if self._reveal_target is not None:
+                        self.reveal_path(self._reveal_target)
+                else:
+                    self.tree.delete(*self.tree.get_children(parent))
+                    if not isinstance(error, PermissionError) and hasattr(self, 'status_bar'):
+                        self.status_bar.config(text=f"Error reading directory: {error}")
+            if self._item_scans:
+                self._schedule_scan_poll()
+        except tk.TclError:
+            pass  # Widget has been destroyed
 
-            # Add all files
-            for entry in files:
-                try:
-                    size = self.format_size(entry.stat().st_size)
-                    
-                    self.tree.insert(parent, "end",
-                                   text=f"{self.file_icon} {entry.name}",
-                                   values=(size, entry.path))
-                except PermissionError:
-                    continue
+    def _cancel_scan(self, item):
+        """Cancel the scan of a directory item, if one is running"""
+        token = self._item_scans.pop(item, None)
+        if token is not None:
+            self._scan_items.pop(token, None)
+            self.scanner.cancel(token)
 
-        except Exception as e:
-            if hasattr(self, 'status_bar'):
-                self.status_bar.config(text=f"Error loading directory contents: {str(e)}")
+    def cancel_scans(self):
+        """Cancel every directory scan, e.g. when the tree is replaced"""
+        self.scanner.cancel_all()
+        self._scan_items.clear()
+        self._item_scans.clear()
+        self._listings.clear()
+        self._stale.clear()
+
+    def scans_pending(self):
+        """Return True while directories are being listed"""
+        return bool(self._item_scans)
+
+    def _add_placeholder(self, node):
+        """Give an unlisted directory a child so the tree shows it as expandable"""
+        self.tree.insert(node, "end", text="", values=("", ""), tags=("placeholder",))
+
+    def _is_unlisted(self, item):
+        """Return True if a directory only holds its placeholder child"""
+        children = self.tree.get_children(item)
+        return len(children) == 1 and "placeholder" in self.tree.item(children[0], "tags")
+
+    def on_tree_open(self, event=None):
+        """List a directory the first time it is expanded"""
+        item = self.tree.focus()
+        if item:
+            self.expand_directory(item)
+            if item in self._stale and item not in self._item_scans:
+                self._stale.discard(item)
+                self._submit_scan(item, self.tree.item(item)["values"][1], refresh=True)
+
+    def on_tree_close(self, event=None):
+        """Cancel the listing of a directory collapsed before it arrived"""
+        item = self.tree.focus()
+        if item in self._item_scans:
+            self._cancel_scan(item)
+            if item in self._listings:
+                self._stale.add(item)  # Refreshed when reopened
+            else:
+                self.tree.delete(*self.tree.get_children(item))
+                self._add_placeholder(item)  # Listed again when reopened
+
+    def expand_directory(self, item):
+        """List a directory's contents under its node, unless that was already done"""
+        if self._is_unlisted(item):
+            self.add_directory(item, self.tree.item(item)["values"][1])
+
+    def load_more(self, parent):
+        """Show the next page of a directory's listing"""
+        if parent in self._listings:
+            self._insert_page(parent)
 
     def on_tree_double_click(self, event):
         item = self.tree.selection()[0]
         item_text = self.tree.item(item)["text"]
         
         if item_text.startswith(self.file_icon):            # Handle file opening
-            full_path = self.tree.item(item)["values"][1]
-            if hasattr(self, 'status_bar'):
-                self.status_bar.config(text=f"Opening: {full_path}")
-            
-            try:
-                # Try UTF-8 first
-                try:
-                    with open(full_path, 'r', encoding='utf-8') as file:
-                        content = file.read()
-                except UnicodeDecodeError:
-                    # If UTF-8 fails, try with different encodings
-                    encodings = ['latin-1', 'cp1252', 'ascii', 'utf-16']
-                    content = None
-                    for encoding in encodings:
-                        try:
-                            with open(full_path, 'r', encoding=encoding) as file:
-                                content = file.read()
-                            break
-                        except UnicodeDecodeError:
-                            continue
-                    
-                    if content is None:
-                        # If all text encodings fail, try reading as binary and decode
-                        with open(full_path, 'rb') as file:
-                            raw_content = file.read()
-                            content = raw_content.decode('utf-8', errors='replace')
-                
-                self.message_box.delete(1.0, tk.END)
-                self.message_box.insert(1.0, content)
-                self.current_file[0] = full_path
-                self.update_status()
-            except Exception as e:
-                if hasattr(self, 'status_bar') and self.root.winfo_exists():
-                    self.status_bar.config(text=f"Error opening file: {str(e)} | Path: {full_path}")
+            self.open_path(self.tree.item(item)["values"][1])
         elif item_text.startswith("..."):
-            # If clicking on "... more items", load the full directory
+            # If clicking on "... more items", load the next page
             parent = self.tree.parent(item)
             if parent:
                 self.load_more(parent)
@@ -385,8 +737,121 @@ class NotePad:
             if self.tree.item(item, "open"):
                 self.tree.item(item, open=False)
             else:
+                self.expand_directory(item)
                 self.tree.item(item, open=True)
 
+    def open_path(self, full_path):
+        """
+        Open a file in the editor, as a large file or hex view if needed.
+
+        Args:
+            full_path (str): The file to open.
+        """
+        if hasattr(self, 'status_bar'):
+            self.status_bar.config(text=f"Opening: {full_path}")
+
+        try:
+            self.cancel_loading()
+            self.stop_follow()
+            self.close_journal()
+            self.close_viewer()
+            file.load_path(self.message_box, self.current_file, full_path, self.document,
+                           insert_func=self.insert_document, large_file_func=self.open_large_file,
+                           binary_func=self.open_hex_view)
+            self.update_status()
+        except Exception as e:
+            if hasattr(self, 'status_bar') and self.root.winfo_exists():
+                self.status_bar.config(text=f"Error opening file: {str(e)} | Path: {full_path}")
+
+    def open_path_at(self, full_path, line):
+        """Open a file and go to a line, once the file has finished loading"""
+        self.open_path(full_path)
+        if self.is_loading():
+            on_done = self.loader.on_done
+
+            def go_to_line_when_loaded(cancelled):
+                on_done(cancelled)
+                if not cancelled:
+                    self.goto_line(line=line)
+            self.loader.on_done = go_to_line_when_loaded
+        elif self.current_file[0] == full_path:
+            self.goto_line(line=line)
+
+    def show_find_in_files(self):
+        """Open the Find in Files window for the file tree's folder"""
+        try:
+            dialog = self.find_in_files_dialog
+            if dialog is not None and dialog.window.winfo_exists():
+                dialog.window.lift()
+                dialog.search_entry.focus_set()
+            else:
+                self.find_in_files_dialog = findfiles.FindInFilesDialog(self.root, self.tree_root,
+                                                                        self.open_path_at)
+        except tk.TclError:
+            pass  # Widget has been destroyed
+
+    def tree_root(self):
+        """Return the directory shown at the top of the file tree, or None"""
+        roots = self.tree.get_children("")
+        return self.tree.item(roots[0])["values"][1] if roots else None
+
+    def show_quick_open(self, event=None):
+        """
+        Open the quick open dialog for the files under the file tree's root.
+
+        The path index is loaded from its cache or built on first use, and
+        brought up to date in the background each time the dialog opens.
+        """
+        try:
+            root = self.tree_root()
+            if root is None:
+                return "break"
+            if self.path_index is not None and self.path_index.root != root:
+                self.path_index = None  # Indexed a previous tree
+            if self.path_index_builder is None:
+                self.path_index_builder = quickopen.PathIndexBuilder(
+                    root, self._on_path_index, previous=self.path_index).start()
+                self._schedule_path_index_poll()
+            if self.quick_open_dialog is not None and self.quick_open_dialog.window.winfo_exists():
+                self.quick_open_dialog.window.lift()
+            else:
+                self.quick_open_dialog = quickopen.QuickOpenDialog(self.root, self.open_path, self.path_index)
+        except tk.TclError:
+            pass  # Widget has been destroyed
+        return "break"
+
+    def _schedule_path_index_poll(self):
+        """Poll the path index builder from the Tk loop until it finished"""
+        if self._path_index_poll_id is None:
+            self._path_index_poll_id = self.root.after(100, self._poll_path_index)
+
+    def _poll_path_index(self):
+        self._path_index_poll_id = None
+        builder = self.path_index_builder
+        if builder is None:
+            return
+        finished = builder.done()  # Checked first, a finished thread has queued its results
+        try:
+            builder.poll()
+            if finished:
+                self.path_index_builder = None
+            else:
+                self._schedule_path_index_poll()
+        except tk.TclError:
+            pass
+
+    def _on_path_index(self, index, error):
+        """Search the newest path index in the open dialog"""
+        if error is not None:
+            print(f"Error indexing files: {error}")
+            return
+        if index.root != self.tree_root():
+            return  # The tree moved on to another folder
+        self.path_index = index
+        dialog = self.quick_open_dialog
+        if dialog is not None and dialog.window.winfo_exists():
+            dialog.set_index(index)
+
     def format_size(self, size):
         for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
             if size < 1024.0:
@@ -423,10 +888,13 @@ class NotePad:
         
         # Add menu items with modern styling
         for label, command in [
-            ("New", lambda: file.new_file(self.message_box, self.current_file)),
+            ("New", lambda: self.new_file()),
             ("Save", lambda: self.save_file()),
-            ("Save As", lambda: file.save_file_as(self.message_box, self.current_file)),
-            ("Open", lambda: file.open_file(self.message_box, self.current_file))
+            ("Save As", lambda: self._save_file_as()),
+            ("Open", lambda: self.open_file()),
+            ("Quick Open... (Ctrl+P)", lambda: self.show_quick_open()),
+            ("Reveal in File Tree", lambda: self.reveal_current_file()),
+            ("Follow File (Tail)", lambda: self.toggle_follow())
         ]:
             file_menu.add_command(
                 label=label,
@@ -449,6 +917,24 @@ class NotePad:
         )
         menu_bar.add_cascade(label="Edit", menu=edit_menu)
         
+        edit_menu.add_command(
+            label="Undo (Ctrl+Z)",
+            command=self.undo,
+            font=("Cascadia Code", 11),
+            activebackground="#3e3e3e",
+            activeforeground="#23c4a4"
+        )
+
+        edit_menu.add_command(
+            label="Redo (Ctrl+Y)",
+            command=self.redo,
+            font=("Cascadia Code", 11),
+            activebackground="#3e3e3e",
+            activeforeground="#23c4a4"
+        )
+
+        edit_menu.add_separator()
+
         # Main emoji picker option
         edit_menu.add_command(
             label="Insert Emoji... (Ctrl+E)",
@@ -458,6 +944,38 @@ class NotePad:
             activeforeground="#23c4a4"
         )
         
+        edit_menu.add_command(
+            label="Find... (Ctrl+F)",
+            command=lambda: self.find_bar.show(),
+            font=("Cascadia Code", 11),
+            activebackground="#3e3e3e",
+            activeforeground="#23c4a4"
+        )
+
+        edit_menu.add_command(
+            label="Replace... (Ctrl+H)",
+            command=lambda: self.find_bar.show(replace=True),
+            font=("Cascadia Code", 11),
+            activebackground="#3e3e3e",
+            activeforeground="#23c4a4"
+        )
+
+        edit_menu.add_command(
+            label="Go to Line... (Ctrl+G)",
+            command=self.goto_line,
+            font=("Cascadia Code", 11),
+            activebackground="#3e3e3e",
+            activeforeground="#23c4a4"
+        )
+
+        edit_menu.add_command(
+            label="Find in Files...",
+            command=self.show_find_in_files,
+            font=("Cascadia Code", 11),
+            activebackground="#3e3e3e",
+            activeforeground="#23c4a4"
+        )
+
         edit_menu.add_separator()
         
         # Quick access emoji submenu
@@ -602,20 +1120,96 @@ class NotePad:
         )
 
     def update_status(self, event=None):
-        """Update status bar with cursor position and file info"""
+        """
+        Schedule a status bar refresh.
+
+        Called on every key press and edit, so it only marks the status out of
+        date. flush_status() runs once the Tk loop is idle, so a burst of
+        auto-repeated keys costs a single refresh.
+        """
+        if self._status_idle_id is None:
+            try:
+                self._status_idle_id = self.root.after_idle(self.flush_status)
+            except tk.TclError:
+                pass  # Widget has been destroyed
+
+    def _count_edit(self, operation, start, end, text):
+        """Update the line, word and character counts with one edit"""
+        if self.text_stats.generation != self.watcher.generation:
+            return  # Missed muted edits, flush_status() recounts the document
+        # Only the characters next to the edit decide whether words were joined or split
+        box = self.message_box
+        before = box.get(f"{start}-1c", start)
+        if operation == "insert":
+            after = box.get(end, f"{end}+1c")
+            last_line = start
+        else:
+            after = box.get(start, f"{start}+1c")
+            last_line = end
+        self.text_stats.edit(operation, int(start.split(".")[0]), int(last_line.split(".")[0]),
+                             text, before, after)
+        self.update_status()
+
+    def _schedule_count(self):
+        if self._count_id is None:
+            self._count_id = self.root.after(1, self._count_step)
+
+    def _count_step(self):
+        """Count the next lines of a document replaced at once, a time slice at a time"""
+        self._count_id = None
+        stats = self.text_stats
+        if not stats.counting or stats.generation != self.watcher.generation:
+            return  # flush_status() starts a new count
+        try:
+            started = time.perf_counter()
+            last_line = int(self.message_box.index("end-1c").split('.')[0])
+            while stats.next_line <= last_line and time.perf_counter() - started < textstats.SLICE_SECONDS:
+                following = stats.next_line + textstats.CHUNK_LINES
+                end = f"{following}.0" if following <= last_line else "end-1c"
+                stats.add(self.message_box.get(f"{stats.next_line}.0", end), following)
+            if stats.next_line > last_line:
+                stats.finish()
+                self.update_status()
+            else:
+                self._schedule_count()
+        except tk.TclError:
+            pass  # Widget has been destroyed
+
+    def flush_status(self):
+        """Update status bar with cursor position, counts and file info"""
+        self._status_idle_id = None
+        if self.viewer is not None:
+            self._on_viewer_scroll(self.viewer)
+            return
+        if self.follower is not None:
+            self._on_follow_status(self.follower)
+            return
+        if self.decompressor is not None:
+            self._on_decompress_progress(self.decompressor)
+            return
         try:
             cursor_pos = self.message_box.index(tk.INSERT)
             line, col = cursor_pos.split('.')
-            file_name = self.current_file[0] if self.current_file[0] else "Untitled"
-            # Cross-platform filename extraction
-            try:
-                import os
-                file_name = os.path.basename(file_name)
-            except Exception:
-                # Fallback to previous behavior
-                file_name = file_name.split('/')[-1]
-            status_text = f"Line: {line} | Col: {int(col)+1} | {file_name}"
-            if hasattr(self, 'status_bar') and self.root.winfo_exists():
+            file_name = os.path.basename(self.current_file[0]) if self.current_file[0] else "Untitled"
+            stats = self.text_stats
+            if self.is_loading():
+                total_lines = self.message_box.index("end-1c").split('.')[0]
+                counts = ""
+            else:
+                if stats.generation != self.watcher.generation:
+                    # Replaced without notifications (opened, loaded, cleared), count it in idle time
+                    stats.begin(self.watcher.generation)
+                    self._schedule_count()
+                if stats.counting:
+                    total_lines = self.message_box.index("end-1c").split('.')[0]
+                else:
+                    total_lines = stats.lines
+                counts = f" | {stats.describe()}"
+            status_text = (f"Line: {line} of {total_lines} | Col: {int(col)+1}{counts} | "
+                           f"{file_name} | {self.document.describe()}")
+            # Reconfiguring the label relayouts it, skip it when nothing changed
+            if hasattr(self, 'status_bar') and self.root.winfo_exists() \
+                    and self.status_bar.cget("text") != status_text:
                 self.status_bar.config(text=status_text)
         except tk.TclError:
             # Widget has been destroyed
@@ -624,27 +1218,746 @@ class NotePad:
             if hasattr(self, 'status_bar') and self.root.winfo_exists():
                 self.status_bar.config(text="Ready")
 
-    def save_file(self, content=None):
+    def save_file(self, content=None, autosave=False, on_written=None):
         """
         Save the current content to a file.
-        
+
+        The write is queued on the background writer, the status bar is updated
+        once it finished. Documents over file.STREAM_SAVE_LIMIT characters are
+        streamed to disk in chunks instead of being copied into one string.
+
         Args:
             content (str, optional): Content to save. If None, gets content from message_box.
+            autosave (bool): Use the cheap auto-save fsync policy instead of the durable one.
+            on_written (callable, optional): Called as on_written(latency) once this write
+                succeeded, with its own save time in seconds.
         """
         try:
-            if content is None:
-                content = self.message_box.get("1.0", "end-1c")
+            if self.is_loading():
+                # Saving now would truncate the file to the part loaded so far
+                if hasattr(self, 'status_bar') and self.root.winfo_exists():
+                    self.status_bar.config(text="Cannot save while the document is loading")
+                return
+            if self.is_read_only():
+                if hasattr(self, 'status_bar') and self.root.winfo_exists():
+                    self.status_bar.config(text="Read-only (large file view or follow mode), saving is disabled")
+                return
             if self.current_file[0] is None:
-                file.save_file_as(self.message_box, self.current_file)
+                self._save_file_as()
             else:
-                with open(self.current_file[0], "w", encoding='utf-8') as file_obj:
-                    file_obj.write(content)
-            # Only update status bar if the widget still exists
-            if hasattr(self, 'status_bar') and self.root.winfo_exists():
-                self.status_bar.config(text="File saved successfully")
+                fsync = self.autosave_fsync if autosave else self.save_fsync
+                edit_journal = self._current_journal()
+                if edit_journal is not None:
+                    # The journal is trimmed once the snapshot is on disk, so it must be durable
+                    fsync = saver.stronger_policy(fsync, saver.FSYNC_FILE)
+                # Small documents are snapshotted for the writer thread, large ones are
+                # streamed from the widget in the document's own encoding
+                if file.save_file(self.message_box, self.current_file, content, writer=self.writer,
+                                  callback=self._journal_save_callback(edit_journal, on_written),
+                                  fsync=fsync, document=self.document):
+                    self._schedule_save_poll()
         except tk.TclError:
             # Widget has been destroyed, ignore
             pass
         except Exception as e:
             if hasattr(self, 'status_bar') and self.root.winfo_exists():
                 self.status_bar.config(text=f"Error saving file: {e}")
+
+    def _save_file_as(self):
+        """Prompt for a path and queue the save on the background writer"""
+        if self.is_read_only():
+            self.save_file()  # Reports that the view cannot be saved
+            return
+        self.discard_journal()  # Unsaved edits to the old path are not kept
+        if file.save_file_as(self.message_box, self.current_file, writer=self.writer,
+                             callback=self.on_save_finished, fsync=self.save_fsync,
+                             document=self.document):
+            self.update_syntax()  # The new name may be another file type
+            self._schedule_save_poll()
+
+    def _schedule_save_poll(self):
+        """Poll the writer from the Tk loop until every queued save is reported"""
+        if self._save_poll_id is None:
+            self._save_poll_id = self.root.after(50, self._poll_saves)
+
+    def _poll_saves(self):
+        self._save_poll_id = None
+        try:
+            self.writer.poll()
+            if self.writer.pending():
+                self._schedule_save_poll()
+            else:
+                self.writer.poll()  # Deliver results posted after the first poll
+        except tk.TclError:
+            pass
+
+    def on_save_finished(self, path, error, latency=None):
+        """Report the result of a background save in the status bar"""
+        if isinstance(error, UnicodeEncodeError) and self.document.encoding != 'utf-8':
+            # Text was typed that the file's encoding cannot hold, keep it by switching to UTF-8
+            old_encoding = self.document.encoding
+            self.document.encoding = 'utf-8'
+            if path == self.current_file[0]:
+                self.save_file()
+                if hasattr(self, 'status_bar') and self.root.winfo_exists():
+                    self.status_bar.config(text=f"Saved as UTF-8, the text does not fit {old_encoding}")
+                return
+        try:
+            if hasattr(self, 'status_bar') and self.root.winfo_exists():
+                if error is None and latency is not None:
+                    self.status_bar.config(text=f"File saved successfully ({latency * 1000:.1f} ms)")
+                elif error is None:
+                    self.status_bar.config(text="File saved successfully")
+                else:
+                    self.status_bar.config(text=f"Error saving file: {error}")
+        except tk.TclError:
+            # Widget has been destroyed, ignore
+            pass
+
+    def new_file(self):
+        """Clear the editor for a new, untitled document"""
+        self.cancel_loading()
+        self.stop_follow()
+        self.close_journal()
+        self.close_viewer()
+        with self.watcher.muted():
+            file.new_file(self.message_box, self.current_file)
+        self.document.reset()
+        self.update_syntax()
+
+    def open_file(self, file_path=None):
+        """Open a file through a dialog (or the given path) into the editor"""
+        self.cancel_loading()
+        self.stop_follow()
+        self.close_journal()
+        self.close_viewer()
+        opened = file.open_file(self.message_box, self.current_file, file_path, self.document,
+                                insert_func=self.insert_document,
+                                large_file_func=self.open_large_file,
+                                binary_func=self.open_hex_view)
+        if opened:
+            self.update_syntax()
+            self.update_status()
+        return opened
+
+    def undo(self, event=None):
+        """Undo the last edit of the editor"""
+        self._undo_or_redo(self.undo_manager.undo, "Nothing to undo")
+        return "break"
+
+    def redo(self, event=None):
+        """Redo the last undone edit of the editor"""
+        self._undo_or_redo(self.undo_manager.redo, "Nothing to redo")
+        return "break"
+
+    def _undo_or_redo(self, action, nothing_message):
+        try:
+            if self.is_read_only() or self.is_loading():
+                message = "Undo is not available in this view"
+            elif action():
+                self.update_status()
+                return
+            else:
+                message = nothing_message
+            if hasattr(self, 'status_bar') and self.root.winfo_exists():
+                self.status_bar.config(text=message)
+        except tk.TclError:
+            pass  # Widget has been destroyed
+
+    def update_syntax(self):
+        """Highlight the editable document with the lexer for its file name, if any"""
+        lexer = None
+        if self.viewer is None and self.follower is None:
+            lexer = highlight.lexer_for(self.current_file[0])
+        self.highlighter.set_lexer(lexer)
+
+    def insert_document(self, message_box, content):
+        """
+        Display a freshly loaded document.
+
+        Small documents are inserted at once, large ones are streamed in by a
+        ProgressiveLoader with progress shown in the status bar. The load is not
+        journaled.
+        """
+        if self.is_loading():
+            self.loader.on_done = None  # Replaced by the new document, nothing to report
+            self.loader.cancel()
+        with self.watcher.muted():
+            message_box.delete("1.0", tk.END)
+            if loader.text_length(content) <= loader.SYNC_LIMIT:
+                message_box.insert("1.0", content if isinstance(content, str) else "".join(content))
+                return
+        self.loader = loader.ProgressiveLoader(message_box, content,
+                                               on_progress=self._on_load_progress,
+                                               on_done=self._on_load_done,
+                                               mute=self.watcher.muted)
+        self.loader.start()
+
+    def is_loading(self):
+        """Return True while a document is still being streamed in"""
+        return self.loader is not None and self.loader.active
+
+    def cancel_loading(self, event=None):
+        """
+        Stop streaming the current document in.
+
+        The part already loaded stays visible but is detached from the file, so
+        auto-save can never overwrite the file with a truncated copy.
+        """
+        if self.is_loading():
+            self.loader.cancel()
+            return "break"
+        if self.decompressor is not None:
+            name = os.path.basename(self.decompressor.path)
+            self._cancel_decompress()
+            self.current_file[0] = None
+            try:
+                self.message_box.configure(state=tk.NORMAL)
+                if hasattr(self, 'status_bar') and self.root.winfo_exists():
+                    self.status_bar.config(text=f"Decompressing {name} cancelled")
+            except tk.TclError:
+                pass  # Widget has been destroyed
+            return "break"
+
+    def _on_load_progress(self, fraction):
+        try:
+            name = os.path.basename(self.current_file[0] or "Untitled")
+            self.status_bar.config(text=f"Loading {name}: {fraction:.0%} (Esc to cancel)")
+        except tk.TclError:
+            pass
+
+    def _on_load_done(self, cancelled):
+        try:
+            if cancelled:
+                name = os.path.basename(self.current_file[0] or "Untitled")
+                self.current_file[0] = None
+                self.discard_journal()
+                lines = self.message_box.index("end-1c").split(".")[0]
+                self.status_bar.config(text=f"Loading cancelled, showing the first {lines} lines of {name} (not linked to the file)")
+            else:
+                self.update_status()
+        except tk.TclError:
+            pass
+
+    def open_large_file(self, path):
+        """
+        Show a file too large to edit in the read-only memory-mapped viewer.
+
+        Only a window of lines around the view is held in the editor, so opening
+        takes the same time whatever the file size. Compressed files are first
+        decompressed, chunk by chunk on a background thread, into a temporary
+        file that is mapped instead. The editor stays read-only meanwhile,
+        with the progress in the status bar, and Escape cancels.
+
+        Returns:
+            bool: True if the viewer opened (or the decompression started), False if the
+                file has to be loaded normally (e.g. UTF-16 text, whose line breaks the
+                viewer cannot find).
+        """
+        self.close_viewer()
+        try:
+            compression = document.sniff_compression(path)
+        except OSError as e:
+            print(f"Large file viewer unavailable for {path}: {e}")
+            return False
+        if compression is None:
+            return self._show_large_file(path, path, None)
+        return self._decompress_for_view(path, compression, self._show_large_file)
+
+    def _decompress_for_view(self, path, compression, show):
+        """
+        Decompress a file in the background, then show the copy with show(path, mapped_path, compression).
+
+        The editor is emptied and read-only until the copy is ready.
+
+        Returns:
+            bool: Always True, errors are reported once the decompression finished.
+        """
+        with self.watcher.muted():
+            self.message_box.delete("1.0", tk.END)
+        self.message_box.configure(state=tk.DISABLED)
+        self.document.reset()
+        self.decompressor = document.Decompressor(
+            path, compression, lambda temp_path, error: self._on_decompressed(temp_path, error, show)).start()
+        self._schedule_decompress_poll()
+        self._on_decompress_progress(self.decompressor)
+        return True
+
+    def _schedule_decompress_poll(self):
+        """Poll the decompressor from the Tk loop until it delivered its result"""
+        if self._decompress_poll_id is None:
+            self._decompress_poll_id = self.root.after(100, self._poll_decompress)
+
+    def _poll_decompress(self):
+        self._decompress_poll_id = None
+        decompressor = self.decompressor
+        if decompressor is None:
+            return
+        finished = decompressor.done()  # Checked first, a finished thread has queued its result
+        try:
+            if not decompressor.poll() and not finished:
+                self._on_decompress_progress(decompressor)
+                self._schedule_decompress_poll()
+        except tk.TclError:
+            pass
+
+    def _on_decompress_progress(self, decompressor):
+        try:
+            if hasattr(self, 'status_bar') and self.root.winfo_exists():
+                self.status_bar.config(text=f"Decompressing {os.path.basename(decompressor.path)}: "
+                                            f"{decompressor.fraction:.0%} (Esc to cancel)")
+        except tk.TclError:
+            pass  # Widget has been destroyed
+
+    def _cancel_decompress(self):
+        if self.decompressor is not None:
+            self.decompressor.cancel()
+            self.decompressor = None
+        if self._decompress_poll_id is not None:
+            try:
+                self.root.after_cancel(self._decompress_poll_id)
+            except tk.TclError:
+                pass  # Widget has been destroyed
+            self._decompress_poll_id = None
+
+    def _on_decompressed(self, temp_path, error, show):
+        """Open the decompressed copy of a compressed file in the large file viewer or hex view"""
+        decompressor, self.decompressor = self.decompressor, None
+        path = decompressor.path
+        shown = False
+        if error is None:
+            self._viewer_temp = temp_path
+            shown = show(path, temp_path, decompressor.compression)
+        else:
+            print(f"Error decompressing {path}: {error}")
+            if show == self._show_hex_view:
+                # Looks compressed but is not, show its raw bytes
+                shown = self._show_hex_view(path, path, None)
+        if not shown:
+            self.current_file[0] = None
+            try:
+                self.message_box.configure(state=tk.NORMAL)
+                if hasattr(self, 'status_bar') and self.root.winfo_exists():
+                    self.status_bar.config(text=f"Could not open {os.path.basename(path)}: {error or 'not viewable'}")
+            except tk.TclError:
+                pass  # Widget has been destroyed
+
+    def _show_large_file(self, path, mapped_path, compression):
+        """Show a file, or the decompressed copy of one, in the large file viewer"""
+        try:
+            view = viewer.LargeFileView(self.message_box, self.message_box.vbar, mapped_path,
+                                        on_scroll=self._on_viewer_scroll,
+                                        mute=self.watcher.muted)
+        except (OSError, ValueError, EOFError) as e:
+            print(f"Large file viewer unavailable for {path}: {e}")
+            self._remove_viewer_temp()
+            return False
+        self.viewer = view
+        self.current_file[0] = path
+        self.document.encoding = view.encoding
+        self.document.newline = None
+        self.document.compression = compression
+        self.document.size = None
+        view.show(0)
+        # Index the lines in the background (or load the cached index) for goto-line
+        self.index_builder = lineindex.IndexBuilder(mapped_path, self._on_index_built,
+                                                    cache=compression is None).start()
+        self._schedule_index_poll()
+        self._on_viewer_scroll(view)
+        return True
+
+    def open_hex_view(self, path):
+        """
+        Show a binary file as read-only hex/ASCII rows.
+
+        Only the rows around the view are rendered, straight from a memory map
+        of the file, instead of decoding the whole file into replacement characters.
+        Compressed files were judged binary by their content, so that content is
+        shown: they are decompressed in the background first, as for the large
+        file viewer.
+
+        Returns:
+            bool: True if the hex view opened (or the decompression started).
+        """
+        self.close_viewer()
+        try:
+            compression = document.sniff_compression(path)
+        except OSError as e:
+            print(f"Hex view unavailable for {path}: {e}")
+            return False
+        if compression is not None:
+            return self._decompress_for_view(path, compression, self._show_hex_view)
+        return self._show_hex_view(path, path, None)
+
+    def _show_hex_view(self, path, mapped_path, compression):
+        """Show a file, or the decompressed copy of one, in the hex view"""
+        try:
+            view = hexview.HexView(self.message_box, self.message_box.vbar, mapped_path,
+                                   on_scroll=self._on_viewer_scroll, mute=self.watcher.muted)
+        except (OSError, ValueError) as e:
+            print(f"Hex view unavailable for {path}: {e}")
+            self._remove_viewer_temp()
+            return False
+        self.viewer = view
+        self.current_file[0] = path
+        self.document.reset()
+        self.document.compression = compression
+        view.show(0)
+        self._on_viewer_scroll(view)
+        return True
+
+    def is_read_only(self):
+        """Return True while a large file is shown in the viewer (or decompressed for it) or a file is followed"""
+        return self.viewer is not None or self.follower is not None or self.decompressor is not None
+
+    def close_viewer(self):
+        """Leave the large file viewer and make the editor editable again"""
+        if self.decompressor is not None:
+            self._cancel_decompress()
+            try:
+                self.message_box.configure(state=tk.NORMAL)
+            except tk.TclError:
+                pass  # Widget has been destroyed
+        if self.index_builder is not None:
+            self.index_builder.cancel()
+            self.index_builder = None
+        if self.viewer is not None:
+            view, self.viewer = self.viewer, None
+            view.close()
+        self._remove_viewer_temp()
+
+    def _remove_viewer_temp(self):
+        if self._viewer_temp is not None:
+            try:
+                os.remove(self._viewer_temp)
+            except OSError as e:
+                print(f"Error removing {self._viewer_temp}: {e}")
+            self._viewer_temp = None
+
+    def _on_viewer_scroll(self, view):
+        try:
+            if hasattr(self, 'status_bar') and self.root.winfo_exists():
+                name = os.path.basename(self.current_file[0] or view.path)
+                if isinstance(view, hexview.HexView):
+                    self.status_bar.config(text=f"Offset: 0x{view.top_offset():08x} | {name} | "
+                                                f"Read-only hex view | {self.format_size(view.size)}")
+                    return
+                if view.line_index is not None:
+                    position = f"Line: {view.current_line()} of {view.line_index.line_count()}"
+                else:
+                    position = f"{view.fraction():.0%} (indexing lines...)"
+                self.status_bar.config(text=f"{position} | {name} | Read-only large file view | "
+                                            f"{self.format_size(view.size)}")
+        except tk.TclError:
+            pass
+
+    def _schedule_index_poll(self):
+        """Poll the line index builder from the Tk loop until it delivered its result"""
+        if self._index_poll_id is None:
+            self._index_poll_id = self.root.after(100, self._poll_index)
+
+    def _poll_index(self):
+        self._index_poll_id = None
+        builder = self.index_builder
+        if builder is None:
+            return
+        finished = builder.done()  # Checked first, a finished thread has queued its result
+        try:
+            if not builder.poll() and not finished:
+                self._schedule_index_poll()
+        except tk.TclError:
+            pass
+
+    def _on_index_built(self, index, error):
+        """Attach a finished line index to the large file view"""
+        self.index_builder = None
+        if error is not None:
+            print(f"Error indexing lines: {error}")
+            return
+        if self.viewer is not None and self.viewer.path == index.path:
+            self.viewer.line_index = index
+            self._on_viewer_scroll(self.viewer)
+
+    def goto_line(self, event=None, line=None):
+        """
+        Move the cursor (or the large file view) to a line number.
+
+        Args:
+            line (int, optional): The 1-based line. If None, the user is asked for it.
+        """
+        try:
+            view = self.viewer
+            if isinstance(view, hexview.HexView):
+                if hasattr(self, 'status_bar') and self.root.winfo_exists():
+                    self.status_bar.config(text="Go to line is not available in the hex view")
+                return "break"
+            if view is not None and view.line_index is None:
+                if hasattr(self, 'status_bar') and self.root.winfo_exists():
+                    self.status_bar.config(text="Line index is still being built, try again in a moment")
+                return "break"
+            if view is not None:
+                total = view.line_index.line_count()
+            else:
+                total = int(self.message_box.index("end-1c").split('.')[0])
+            if line is None:
+                line = simpledialog.askinteger("Go to Line", f"Line number (1-{total}):",
+                                               parent=self.root, minvalue=1, maxvalue=total)
+                if line is None:
+                    return "break"
+            line = min(max(line, 1), total)
+            if view is not None:
+                view.goto_line(line)
+            else:
+                self.message_box.mark_set(tk.INSERT, f"{line}.0")
+                self.message_box.see(tk.INSERT)
+                self.message_box.focus_set()
+            self.flush_status()
+        except tk.TclError:
+            pass  # Widget has been destroyed
+        return "break"
+
+    def _forget_loaded_size(self, operation, start, end, text):
+        """The edited text no longer matches the file byte for byte"""
+        self.document.size = None
+
+    def toggle_follow(self):
+        """Start or stop following the current file"""
+        if self.follower is not None:
+            self.stop_follow()
+            self.update_status()
+        else:
+            self.start_follow()
+
+    def start_follow(self, max_lines=None):
+        """
+        Follow the current file as it grows, like tail -F.
+
+        Only the bytes appended since the last check are read and decoded. The
+        editor is read-only meanwhile, and the view stays pinned to the end
+        unless scrolled away from it.
+
+        Args:
+            max_lines (int, optional): Keep at most this many lines, dropping the oldest.
+                Defaults to follow_max_lines.
+
+        Returns:
+            bool: True if following started.
+        """
+        path = self.current_file[0]
+        message = None
+        if path is None:
+            message = "Open a file to follow it"
+        elif self.viewer is not None:
+            message = "Follow mode is not available in the large file view"
+        elif self.document.compression is not None:
+            message = "Compressed files cannot be followed"
+        elif self.is_loading():
+            message = "Cannot follow the file while it is loading"
+        elif self.journal is not None and self.journal.has_records():
+            message = "Save your changes before following the file"
+        if message is not None:
+            if hasattr(self, 'status_bar') and self.root.winfo_exists():
+                self.status_bar.config(text=message)
+            return False
+        try:
+            if self.document.size is None and not self.open_file(path):
+                return False  # The text was edited, reload it so it matches the file again
+            if self.is_loading() or self.viewer is not None:
+                self.status_bar.config(text="The file is too large to follow")
+                return False
+            self.follower = follow.TailReader(path, self.document.size, self.document.encoding)
+        except OSError as e:
+            if hasattr(self, 'status_bar') and self.root.winfo_exists():
+                self.status_bar.config(text=f"Error following file: {e}")
+            return False
+        if max_lines is not None:
+            self.follow_max_lines = max_lines
+        self.message_box.configure(state=tk.DISABLED)
+        self.message_box.see("end")
+        self.update_syntax()  # Appends are not reported edits, so followed files are not highlighted
+        self._poll_follow()
+        return True
+
+    def stop_follow(self):
+        """Stop following the file, the editor becomes editable again"""
+        if self._follow_id is not None:
+            self.root.after_cancel(self._follow_id)
+            self._follow_id = None
+        if self.follower is not None:
+            self.follower.close()
+            self.follower = None
+            self.document.size = None  # Lines may have been dropped, resume with a reload
+            try:
+                self.message_box.configure(state=tk.NORMAL)
+                self.update_syntax()
+            except tk.TclError:
+                pass  # Widget has been destroyed
+
+    def _poll_follow(self):
+        """Append what the followed file gained since the last check"""
+        self._follow_id = None
+        reader = self.follower
+        if reader is None:
+            return
+        try:
+            text, reset, more = reader.read_new()
+            if text or reset:
+                self._append_followed(text, reset)
+            self._on_follow_status(reader)
+            delay = 1 if more else int(follow.FOLLOW_INTERVAL * 1000)
+            self._follow_id = self.root.after(delay, self._poll_follow)
+        except OSError as e:
+            self.stop_follow()
+            if hasattr(self, 'status_bar') and self.root.winfo_exists():
+                self.status_bar.config(text=f"Stopped following: {e}")
+        except tk.TclError:
+            pass  # Widget has been destroyed
+
+    def _append_followed(self, text, reset):
+        box = self.message_box
+        at_end = box.yview()[1] >= 0.999
+        box.configure(state=tk.NORMAL)
+        with self.watcher.muted():
+            if reset:
+                box.delete("1.0", tk.END)  # Truncated, start over
+            box.insert("end-1c", text)
+            if self.follow_max_lines:
+                excess = int(box.index("end-1c").split('.')[0]) - self.follow_max_lines
+                if excess > 0:
+                    box.delete("1.0", f"{excess + 1}.0")
+        box.configure(state=tk.DISABLED)
+        if at_end or reset:
+            box.see("end")
+
+    def _on_follow_status(self, reader):
+        try:
+            if hasattr(self, 'status_bar') and self.root.winfo_exists():
+                lines = self.message_box.index("end-1c").split('.')[0]
+                self.status_bar.config(text=f"Following {os.path.basename(reader.path)} | {lines} lines | "
+                                            f"{self.format_size(reader.offset)} read | {self.document.describe()}")
+        except tk.TclError:
+            pass
+
+    def _current_journal(self):
+        """Return the journal of the current document, starting one if needed"""
+        path = self.current_file[0]
+        if path is None or self.is_read_only():
+            return None
+        if self.journal is not None and self.journal.doc_path != path:
+            self.discard_journal()  # The path changed under the journal (e.g. Save As)
+        if self.journal is None:
+            self.journal = journal.EditJournal(path)
+        return self.journal
+
+    def _journal_edit(self, operation, start, end, text):
+        """Record an edit of the current document in its journal"""
+        edit_journal = self._current_journal()
+        if edit_journal is None:
+            return
+        if operation == "insert":
+            edit_journal.record_insert(start, text)
+        else:
+            edit_journal.record_delete(start, end)
+
+    def _journal_save_callback(self, edit_journal, on_written=None):
+        """Build a save callback that trims the journal and reports the latency once the snapshot is written"""
+        if edit_journal is None and on_written is None:
+            return self.on_save_finished
+        token = edit_journal.checkpoint() if edit_journal is not None else None
+
+        def callback(path, error, latency=None):
+            if error is None and edit_journal is not None:
+                try:
+                    edit_journal.commit(token)
+                except OSError as e:
+                    print(f"Error trimming journal: {e}")
+            self.on_save_finished(path, error, latency)
+            if error is None and latency is not None and on_written is not None:
+                on_written(latency)
+        return callback
+
+    def journal_autosave(self):
+        """
+        Append the pending edits to the journal instead of rewriting the document.
+
+        Returns:
+            bool: True if the edits are safe in the journal, False if a full save is due
+                (no journal for this document, or the journal passed journal_limit).
+        """
+        if self.is_read_only():
+            return True  # Nothing can be edited, nothing to save
+        edit_journal = self._current_journal()
+        if edit_journal is None or edit_journal.size() >= self.journal_limit:
+            return False
+        try:
+            edit_journal.flush()
+            return True
+        except OSError as e:
+            print(f"Error writing journal: {e}")
+            return False
+
+    def close_journal(self):
+        """Save the edits still only in the journal before the document is replaced"""
+        edit_journal = self.journal
+        if edit_journal is None:
+            return
+        if edit_journal.has_records() and self.current_file[0] == edit_journal.doc_path:
+            self.save_file(autosave=True)
+        else:
+            edit_journal.discard()
+        self.journal = None
+
+    def discard_journal(self):
+        """Throw away the current journal"""
+        if self.journal is not None:
+            self.journal.discard()
+            self.journal = None
+
+    def recover_journal(self, doc_path, swap_path):
+        """
+        Open a document and replay the edits left in its journal by a crashed session.
+
+        The replayed edits go through the editor again, so they are journaled anew
+        and saved by the next auto-save.
+
+        Returns:
+            bool: True if the edits were replayed.
+        """
+        try:
+            header, records = journal.read_journal(swap_path)
+        except (OSError, ValueError) as e:
+            print(f"Error reading journal: {e}")
+            return False
+        if not self.open_file(doc_path) and os.path.exists(doc_path):
+            return False
+        self.current_file[0] = doc_path
+        journal.replay(self.message_box, records)
+        self._current_journal().flush()  # Replace the old swap file right away
+        if hasattr(self, 'status_bar') and self.root.winfo_exists():
+            self.status_bar.config(text=f"Recovered {len(records)} edits to {os.path.basename(doc_path)}")
+        return True
+
+    def close(self, timeout=5.0):
+        """Fold the journal into the document, finish pending saves and stop the writer thread"""
+        try:
+            self.cancel_loading()
+            self.stop_follow()
+            self.close_viewer()
+            if self.journal is not None and self.journal.has_records():
+                self.save_file(autosave=True)
+        except tk.TclError:
+            pass  # Widget has been destroyed, the journal is kept for recovery
+        if self.path_index_builder is not None:
+            self.path_index_builder.cancel()
+        if self.find_in_files_dialog is not None:
+            self.find_in_files_dialog.stop()
+        for after_id in (self._tree_refresh_id, self._status_idle_id, self._count_id):
+            if after_id is not None:
+                try:
+                    self.root.after_cancel(after_id)
+                except tk.TclError:
+                    pass  # Widget has been destroyed
+        self._tree_refresh_id = self._status_idle_id = self._count_id = None
+        self.highlighter.set_lexer(None)
+        self.scanner.shutdown()
+        self.writer.close(timeout)
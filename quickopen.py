@@ -0,0 +1,632 @@
+"""
+    Group: TAMUSA Notepad Experts (TNE)
+    Authors: Joshua Ludolf & Luis Morales
+    Class: CSCI 3366 - Programming Languages
+
+    Quick open module for the TAMUSA Notepad application.
+    Indexes every file under the file tree's root on a background thread and
+    finds them by fuzzy name (Ctrl+P). The index is cached on disk and brought
+    up to date by listing again only the directories whose mtime changed.
+    Searches run on their own thread, so typing never waits for one.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import queue
+import re
+import tempfile
+import threading
+import time
+import tkinter as tk
+from array import array
+from itertools import accumulate, repeat
+from operator import add
+from tkinter import Toplevel
+import dirscan
+
+MAX_RESULTS = 50
+MAX_CANDIDATES = 2000   # Matches ranked per tier, the rest of a tier is not looked at
+MAX_NARROW = 50000      # Matches kept for the next keystroke to search, past this it searches everything
+MAX_PATHS = 1000000     # Indexing stops past this many files
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".tne_cache", "quickopen")
+CACHE_MAGIC = "TNEQ1"
+# Hidden directories are skipped as well
+IGNORED_DIRS = {"__pycache__", "node_modules"}
+
+
+class IndexCancelled(Exception):
+    """Raised by walk() when the caller cancels it"""
+
+
+class PathIndex:
+    """
+    The files under a root directory, searchable by fuzzy name.
+
+    The directory records are what the index is built and cached from. The
+    paths are also kept lowercased in one newline-separated string, which
+    find() scans with regular expressions, so matching runs in C instead
+    of a Python loop over every path.
+
+    Attributes:
+        root: The indexed directory
+        dirs: Relative directory ('/'-separated, '' for root) -> (mtime_ns, subdirectories, files)
+        paths: Relative paths of every file, '/'-separated
+        dirs_listed: Number of directories listed to build this index, the others were reused
+    """
+
+    def __init__(self, root, dirs, dirs_listed=0):
+        self.root = root
+        self.dirs = dirs
+        self.dirs_listed = dirs_listed
+        self.paths = [f"{rel}/{name}" if rel else name
+                      for rel, (_, _, files) in dirs.items() for name in files]
+        lowered = [path.lower() for path in self.paths]
+        self._blob = "\n".join(lowered)
+        self._starts = line_starts(lowered)  # Offset of each path in the blob
+
+    def __len__(self):
+        return len(self.paths)
+
+    def absolute(self, path):
+        """Return the full path of an indexed relative path"""
+        return os.path.join(self.root, *path.split("/"))
+
+    def search(self, query, limit=MAX_RESULTS, within=None):
+        """
+        Return the relative paths best matching a query.
+
+        Matches are ranked in tiers: the file name contains the query
+        (starting with it first), the path contains it, the file name
+        contains its characters in order, the path contains its characters
+        in order. Within a tier shorter paths come first.
+
+        Args:
+            query (str): What was typed, case-insensitive. '\\' counts as '/'.
+            limit (int): Maximum number of results.
+            within (Candidates): The paths an earlier query matched. If this
+                query extends it, only those paths are searched.
+
+        Returns:
+            list: Relative paths, best match first.
+        """
+        return self.find(query, limit, within)[0]
+
+    def find(self, query, limit=MAX_RESULTS, within=None):
+        """
+        Search like search(), and also return the paths the query matched.
+
+        Returns:
+            tuple: (paths, candidates), candidates is the Candidates to pass as
+                within for the next query, None if the query matched more than
+                MAX_NARROW paths.
+        """
+        query = normalize_query(query)
+        if not query or not self.paths:
+            return [], None
+        if within is not None and within.covers(self, query):
+            blob, starts, lines = within.blob, within.starts, within.lines
+        else:
+            blob, starts, lines = self._blob, self._starts, None
+        literal = re.escape(query)
+        tiers = [
+            re.compile(literal + r"[^\n/]*$", re.M),                       # In the file name
+            re.compile(literal + r"[^\n]*"),                              # In the path
+            re.compile(fuzzy_pattern(query, "/") + r"[^\n/]*$", re.M),    # Scattered in the file name
+            re.compile(fuzzy_pattern(query, "") + r"[^\n]*"),             # Scattered in the path
+        ]
+        if "/" in query:
+            tiers[0] = tiers[2] = None  # A file name has no '/'
+
+        # The last tier matches everything the others do, and so does every
+        # query typed on top of this one. When it matches few paths, rank
+        # those directly instead of scanning again for each tier.
+        matched = []
+        candidates = None
+        for match in tiers[3].finditer(blob):
+            matched.append(bisect.bisect_right(starts, match.start()) - 1)
+            if len(matched) > MAX_NARROW:
+                break
+        else:
+            candidates = Candidates(self, query, matched if lines is None else [lines[line] for line in matched])
+            if len(matched) <= MAX_CANDIDATES:
+                ranked = sorted(self._rank(tiers, self.paths[line]) for line in candidates.lines)
+                return [key[-1] for key in ranked[:limit]], candidates
+            blob, starts, lines = candidates.blob, candidates.starts, candidates.lines
+
+        results = []
+        taken = set()
+        for number, pattern in enumerate(tiers):
+            if pattern is None:
+                continue
+            ranked = []
+            for match in pattern.finditer(blob):
+                line = bisect.bisect_right(starts, match.start()) - 1
+                if line in taken:
+                    continue
+                taken.add(line)
+                path = self.paths[line if lines is None else lines[line]]
+                prefix = number == 0 and (match.start() == starts[line] or blob[match.start() - 1] == "/")
+                ranked.append((number, not prefix, len(path), path))
+                if len(ranked) >= MAX_CANDIDATES:
+                    break
+            ranked.sort()
+            results.extend(key[-1] for key in ranked[:limit - len(results)])
+            if len(results) >= limit:
+                break
+        return results, candidates
+
+    @staticmethod
+    def _rank(tiers, path):
+        """Return the sort key of one path, as find() ranks it"""
+        lowered = path.lower()
+        for number, pattern in enumerate(tiers):
+            match = pattern.search(lowered) if pattern is not None else None
+            if match is not None:
+                prefix = number == 0 and (match.start() == 0 or lowered[match.start() - 1] == "/")
+                return (number, not prefix, len(path), path)
+        return (len(tiers), True, len(path), path)
+
+
+class Candidates:
+    """
+    The paths a query matched, searched instead of the whole index by a query typed on top of it.
+
+    Any path matching the longer query has the shorter one's characters in
+    order, so it is among these.
+
+    Attributes:
+        index: The PathIndex the paths belong to
+        query: The normalized query that matched them
+        lines: Positions of the paths in index.paths, in index order
+    """
+
+    def __init__(self, index, query, lines):
+        self.index = index
+        self.query = query
+        self.lines = lines
+        lowered = [index.paths[line].lower() for line in lines]
+        self.blob = "\n".join(lowered)
+        self.starts = line_starts(lowered)
+
+    def __len__(self):
+        return len(self.lines)
+
+    def covers(self, index, query):
+        """Return True if every match of query in index is among these paths"""
+        return index is self.index and query.startswith(self.query)
+
+
+def normalize_query(query):
+    """Return a query as the index matches it: stripped, lowercased, with '/' for '\\'"""
+    return query.strip().lower().replace("\\", "/")
+
+
+def line_starts(lines):
+    """Return the offset of each line in "\\n".join(lines), as an array"""
+    # Past the previous line and its '\n'
+    return array('Q', accumulate(map(add, map(len, lines[:-1]), repeat(1)), initial=0))
+
+
+def fuzzy_pattern(query, excluded):
+    """
+    Return a regex matching the characters of query in order, with no '\\n' or excluded between them.
+
+    Each gap stops at the first occurrence of the next character, which is
+    always the best place to continue a subsequence, so the regex engine
+    never backtracks into a gap.
+    """
+    pattern = re.escape(query[0])
+    for character in query[1:]:
+        pattern += f"[^\\n{re.escape(excluded + character)}]*{re.escape(character)}"
+    return pattern
+
+
+def _list_directory(path, mtime_ns):
+    """Return the (mtime_ns, subdirectories, files) record of one directory"""
+    subdirs, files = [], []
+    with os.scandir(path) as listing:
+        for entry in listing:
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if not entry.name.startswith(".") and entry.name not in IGNORED_DIRS:
+                        subdirs.append(entry.name)
+                elif entry.is_file():
+                    files.append(entry.name)
+            except OSError:
+                continue
+    # Entries added within the filesystem's timestamp granularity may not move the
+    # mtime, a recently modified directory is recorded as stale and listed next time
+    if time.time_ns() - mtime_ns <= dirscan.RACY_WINDOW_NS:
+        mtime_ns = 0
+    return (mtime_ns, tuple(sorted(subdirs)), tuple(sorted(files)))
+
+
+def walk(root, previous=None, cancel_event=None, max_paths=MAX_PATHS):
+    """
+    Index the files under root.
+
+    Every directory is stat'ed, but only the ones whose mtime differs from
+    previous are listed again, so updating an index costs about as much as
+    what changed.
+
+    Args:
+        root (str): The directory to index.
+        previous (PathIndex): An older index of the same root to reuse records from.
+        cancel_event (threading.Event): Stops the walk when set.
+        max_paths (int): Stop once this many files are indexed.
+
+    Returns:
+        PathIndex: The index of root.
+
+    Raises:
+        IndexCancelled: If cancel_event was set during the walk.
+    """
+    old = previous.dirs if previous is not None and previous.root == root else {}
+    dirs = {}
+    listed = 0
+    count = 0
+    stack = [""]
+    while stack and count < max_paths:
+        if cancel_event is not None and cancel_event.is_set():
+            raise IndexCancelled(root)
+        rel = stack.pop()
+        path = os.path.join(root, *rel.split("/")) if rel else root
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+            record = old.get(rel)
+            if record is None or record[0] != mtime_ns:
+                record = _list_directory(path, mtime_ns)
+                listed += 1
+        except OSError:
+            continue
+        dirs[rel] = record
+        count += len(record[2])
+        stack.extend(f"{rel}/{name}" if rel else name for name in reversed(record[1]))
+    return PathIndex(root, dirs, listed)
+
+
+def cache_path_for(root):
+    """Return the cache file used for a root's path index"""
+    key = hashlib.sha1(dirscan.path_key(root).encode('utf-8', errors='surrogateescape')).hexdigest()
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+
+def load_cached(root):
+    """Return a root's path index from the on-disk cache, or None if there is none"""
+    try:
+        with open(cache_path_for(root), 'r', encoding='utf-8', errors='surrogateescape') as f:
+            data = json.load(f)
+        if data.get("magic") != CACHE_MAGIC or data.get("root") != root:
+            return None
+        dirs = {rel: (mtime_ns, tuple(subdirs), tuple(files))
+                for rel, (mtime_ns, subdirs, files) in data["dirs"].items()}
+    except (OSError, ValueError, TypeError, KeyError):
+        return None
+    return PathIndex(root, dirs)
+
+
+def save_cached(index):
+    """Write a path index to the on-disk cache, replacing it atomically"""
+    try:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(prefix=".paths.", dir=CACHE_DIR)
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8', errors='surrogateescape') as f:
+                json.dump({"magic": CACHE_MAGIC, "root": index.root, "dirs": index.dirs},
+                          f, separators=(",", ":"))
+            os.replace(temp_path, cache_path_for(index.root))
+        except BaseException:
+            try:
+                os.remove(temp_path)
+            except OSError:
+                pass
+            raise
+    except OSError as e:
+        print(f"Error caching path index: {e}")
+
+
+class PathIndexBuilder:
+    """
+    Loads and updates a path index on a background thread.
+
+    The cached index is delivered first, so searching can start right away,
+    then the walked, up to date one. Results are handed back through a queue
+    and delivered by poll(), which the caller runs from the Tk event loop.
+
+    Attributes:
+        root: The directory being indexed
+    """
+
+    def __init__(self, root, callback, previous=None, cache=True):
+        """
+        Args:
+            root (str): The directory to index.
+            callback (callable): Called as callback(index, error) by poll(), once per index.
+            previous (PathIndex): The index in use, updated instead of the cached one.
+            cache (bool): Use the on-disk cache.
+        """
+        self.root = root
+        self.callback = callback
+        self.previous = previous
+        self.cache = cache
+        self._results = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="TNE-PathIndex", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            index = self.previous
+            if index is None and self.cache:
+                index = load_cached(self.root)
+                if index is not None:
+                    self._results.put((index, None))
+            updated = walk(self.root, index, self._cancel)
+            if self.cache and (updated.dirs_listed or index is None or len(updated.dirs) != len(index.dirs)):
+                save_cached(updated)
+            self._results.put((updated, None))
+        except IndexCancelled:
+            pass
+        except Exception as e:
+            self._results.put((None, e))
+
+    def done(self):
+        """Return True once the thread finished"""
+        return not self._thread.is_alive()
+
+    def poll(self):
+        """Deliver the indexes that are ready"""
+        while True:
+            try:
+                index, error = self._results.get_nowait()
+            except queue.Empty:
+                return
+            if not self._cancel.is_set():
+                self.callback(index, error)
+
+    def cancel(self):
+        """Stop the walk, the callback is not called again"""
+        self._cancel.set()
+
+
+class PathSearcher:
+    """
+    Searches path indexes on a background thread, so typing never waits for a search.
+
+    Only the newest query is searched: a query still waiting when another is
+    submitted is dropped, and the results of a query typed over since are not
+    delivered. The paths the last query matched are kept, a query typed on
+    top of it only searches those. Results are delivered by poll(), which
+    the caller runs from the Tk event loop.
+
+    Attributes:
+        generation: Number of the newest query submitted
+    """
+
+    def __init__(self, callback, limit=MAX_RESULTS):
+        """
+        Args:
+            callback (callable): Called as callback(results, elapsed, error) by poll()
+                for the newest query, elapsed is the search time in seconds.
+            limit (int): Maximum number of results.
+        """
+        self.callback = callback
+        self.limit = limit
+        self.generation = 0
+        self._searched = 0  # Generation of the last query searched
+        self._delivered = 0
+        self._request = None
+        self._candidates = None  # Only used by the thread
+        self._closed = False
+        self._condition = threading.Condition()
+        self._results = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="TNE-PathSearch", daemon=True)
+        self._thread.start()
+
+    def submit(self, index, query):
+        """Search index for query, replacing the query not searched yet"""
+        with self._condition:
+            self.generation += 1
+            self._request = (self.generation, index, query)
+            self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while self._request is None and not self._closed:
+                    self._condition.wait()
+                if self._closed:
+                    return
+                generation, index, query = self._request
+                self._request = None
+            started = time.perf_counter()
+            try:
+                results, self._candidates = index.find(query, self.limit, self._candidates)
+                error = None
+            except Exception as e:
+                results, self._candidates, error = [], None, e
+            self._results.put((generation, results, time.perf_counter() - started, error))
+            with self._condition:
+                self._searched = generation
+                self._condition.notify_all()
+
+    def pending(self):
+        """Return True while the newest query's results were not delivered"""
+        return self._delivered != self.generation
+
+    def wait(self, timeout=None):
+        """Wait until the newest query was searched, return False on timeout"""
+        with self._condition:
+            return self._condition.wait_for(lambda: self._searched == self.generation or self._closed, timeout)
+
+    def poll(self):
+        """Deliver the results of the newest query if they are ready, drop the stale ones"""
+        while True:
+            try:
+                generation, results, elapsed, error = self._results.get_nowait()
+            except queue.Empty:
+                return
+            if generation == self.generation and not self._closed:
+                self._delivered = generation
+                self.callback(results, elapsed, error)
+
+    def close(self):
+        """Stop the thread, the callback is not called again"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+
+
+class QuickOpenDialog:
+    """A popup that finds files of the path index as you type"""
+
+    def __init__(self, parent, open_callback, index=None):
+        """
+        Args:
+            parent (tk.Tk): The main window.
+            open_callback (callable): Called with the full path of the chosen file.
+            index (PathIndex): The index to search, None while it is being built.
+        """
+        self.open_callback = open_callback
+        self.index = index
+        self.results = []
+        self._search_id = None
+        self._poll_id = None
+        self.searcher = PathSearcher(self._show_results)
+        self.window = Toplevel(parent)
+        self.window.title("Quick Open")
+        self.window.geometry("600x400")
+        self.window.configure(bg="#1e1e1e")
+        self.window.transient(parent)
+        self.window.geometry("+%d+%d" % (parent.winfo_rootx() + 50, parent.winfo_rooty() + 50))
+        self.create_widgets()
+
+    def create_widgets(self):
+        self.search_var = tk.StringVar()
+        self.search_entry = tk.Entry(
+            self.window,
+            textvariable=self.search_var,
+            font=("Cascadia Code", 11),
+            bg="#2d2d2d",
+            fg="#d4d4d4",
+            insertbackground="#23c4a4",
+            relief=tk.FLAT,
+            bd=5
+        )
+        self.search_entry.pack(fill=tk.X, padx=10, pady=(10, 5))
+        self.search_var.trace_add('write', self._schedule_search)
+
+        self.listbox = tk.Listbox(
+            self.window,
+            font=("Cascadia Code", 10),
+            bg="#1e1e1e",
+            fg="#d4d4d4",
+            selectbackground="#264f78",
+            selectforeground="#ffffff",
+            relief=tk.FLAT,
+            activestyle="none"
+        )
+        self.listbox.pack(fill=tk.BOTH, expand=True, padx=10)
+
+        self.status_label = tk.Label(self.window, text="", font=("Cascadia Code", 9),
+                                     bg="#1e1e1e", fg="#858585", anchor=tk.W)
+        self.status_label.pack(fill=tk.X, padx=10, pady=(2, 8))
+
+        self.search_entry.bind("<Return>", self.choose)
+        self.search_entry.bind("<Down>", lambda e: self.move(1))
+        self.search_entry.bind("<Up>", lambda e: self.move(-1))
+        self.listbox.bind("<Double-1>", self.choose)
+        self.window.bind("<Escape>", lambda e: self.close())
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
+        self.search_entry.focus_set()
+        self.update_status()
+
+    def set_index(self, index):
+        """Search a newer index, e.g. once the background update finished"""
+        self.index = index
+        self.search()
+
+    def update_status(self, elapsed=None):
+        if self.index is None:
+            text = "Indexing files…"
+        else:
+            text = f"{len(self.results)} of {len(self.index)} files"
+            if elapsed is not None:
+                text += f" ({elapsed * 1000:.0f} ms)"
+        self.status_label.config(text=text)
+
+    def _schedule_search(self, *args):
+        """Search once typing pauses for a moment, not on every keystroke"""
+        if self._search_id is not None:
+            self.window.after_cancel(self._search_id)
+        self._search_id = self.window.after(30, self.search)
+
+    def search(self):
+        """Search the index for the query on the searcher's thread"""
+        self._search_id = None
+        if self.index is None:
+            self.update_status()
+            return
+        self.searcher.submit(self.index, self.search_var.get())
+        self._schedule_poll()
+
+    def _schedule_poll(self):
+        if self._poll_id is None:
+            self._poll_id = self.window.after(10, self._poll_search)
+
+    def _poll_search(self):
+        self._poll_id = None
+        try:
+            self.searcher.poll()
+            if self.searcher.pending():
+                self._schedule_poll()
+        except tk.TclError:
+            pass  # Widget has been destroyed
+
+    def _show_results(self, results, elapsed, error):
+        """List the results of the newest query"""
+        if error is not None:
+            self.status_label.config(text=f"Search failed: {error}")
+            return
+        self.results = results
+        self.listbox.delete(0, tk.END)
+        for path in self.results:
+            self.listbox.insert(tk.END, path)
+        if self.results:
+            self.listbox.selection_set(0)
+        self.update_status(elapsed)
+
+    def move(self, step):
+        """Move the selection while the focus stays in the search field"""
+        if not self.results:
+            return "break"
+        current = self.listbox.curselection()
+        position = min(max((current[0] if current else -1) + step, 0), len(self.results) - 1)
+        self.listbox.selection_clear(0, tk.END)
+        self.listbox.selection_set(position)
+        self.listbox.see(position)
+        return "break"
+
+    def choose(self, event=None):
+        """Open the selected file and close the dialog"""
+        current = self.listbox.curselection()
+        if self.index is not None and current:
+            path = self.index.absolute(self.results[current[0]])
+            self.close()
+            self.open_callback(path)
+        return "break"
+
+    def close(self):
+        if self._search_id is not None:
+            self.window.after_cancel(self._search_id)
+            self._search_id = None
+        if self._poll_id is not None:
+            self.window.after_cancel(self._poll_id)
+            self._poll_id = None
+        self.searcher.close()
+        self.window.destroy()
@@ -0,0 +1,301 @@
+"""
+    Group: TAMUSA Notepad Experts (TNE)
+    Authors: Joshua Ludolf & Luis Morales
+    Class: CSCI 3366 - Programming Languages
+
+    Background save module for the TAMUSA Notepad application.
+    Moves file writes off the Tk main loop so slow disks never freeze the editor,
+    and replaces files atomically so a crash never leaves a truncated document.
+"""
+
+import codecs
+import os
+import queue
+import stat
+import tempfile
+import threading
+import time
+import document
+
+# Durability policies, from cheapest to safest
+FSYNC_NONE = "none"            # Rename only, the OS flushes the data later
+FSYNC_FILE = "file"            # fsync the temp file before the rename
+FSYNC_DIRECTORY = "directory"  # Also fsync the directory so the rename itself is durable
+FSYNC_POLICIES = (FSYNC_NONE, FSYNC_FILE, FSYNC_DIRECTORY)
+
+# A lost auto-save is redone by the next cycle, an explicit Save is what the
+# user relies on after a crash
+AUTOSAVE_FSYNC = FSYNC_NONE
+SAVE_FSYNC = FSYNC_DIRECTORY
+
+
+def stronger_policy(first, second):
+    """Return the more durable of two fsync policies"""
+    return max(first, second, key=FSYNC_POLICIES.index)
+
+
+def _default_mode():
+    """Return the permission bits a newly created file would get"""
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+# Read once at import, os.umask() is process wide and not safe to toggle from the writer thread
+DEFAULT_MODE = _default_mode()
+
+
+def _fsync_directory(directory):
+    """Flush a directory entry to disk (not supported on Windows)"""
+    if os.name == 'nt':
+        return
+    fd = os.open(directory, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+ENCODE_CHUNK = 1024 * 1024  # Characters encoded at a time, bounds the encoded copy of a save
+
+
+def _translate(text, newline):
+    """Apply open()-style newline translation to text holding '\\n' line endings"""
+    if newline is None:
+        newline = os.linesep
+    if newline in ('', '\n'):
+        return text
+    return text.replace('\n', newline)
+
+
+def split_text(content, chunk_size=ENCODE_CHUNK):
+    """Yield a string in slices of chunk_size characters"""
+    for start in range(0, len(content), chunk_size):
+        yield content[start:start + chunk_size]
+
+
+def atomic_write(path, content, encoding='utf-8', newline='', fsync=FSYNC_FILE, compression=None):
+    """
+    Write text content to a file without ever truncating the original.
+
+    The content is written to a temp file in the same directory which is then
+    renamed over the target, so readers see either the old or the new file.
+
+    Args:
+        path (str): The path of the file to write.
+        content (str): The text to write.
+        encoding (str): The encoding used for the file.
+        newline (str): Newline translation, as for open().
+        fsync (str): One of FSYNC_NONE, FSYNC_FILE or FSYNC_DIRECTORY.
+        compression (str): 'gzip', 'bz2' or 'xz' to write the file compressed.
+
+    Returns:
+        float: The time the save took, in seconds.
+    """
+    return atomic_write_chunks(path, split_text(content), encoding=encoding, newline=newline, fsync=fsync,
+                               compression=compression)
+
+
+def atomic_write_chunks(path, chunks, encoding='utf-8', newline='', fsync=FSYNC_FILE, compression=None):
+    """
+    Atomically write text produced piece by piece.
+
+    Each chunk is translated, encoded and written before the next one is
+    requested, so the extra memory a save needs is bounded by the chunk size.
+    An incremental encoder is used so a BOM (UTF-16, UTF-8-SIG) is written once,
+    byte-ordered encodings recorded from a BOM (e.g. 'utf-16-be') get theirs written first.
+
+    Args:
+        path (str): The path of the file to write.
+        chunks (iterable): Strings making up the document, with '\\n' line endings.
+        encoding (str): The encoding used for the file.
+        newline (str): Newline translation, as for open().
+        fsync (str): One of FSYNC_NONE, FSYNC_FILE or FSYNC_DIRECTORY.
+        compression (str): 'gzip', 'bz2' or 'xz' to compress the encoded chunks as they are written.
+
+    Returns:
+        float: The time the save took, in seconds.
+    """
+    if fsync not in FSYNC_POLICIES:
+        raise ValueError(f"Unknown fsync policy: {fsync}")
+    start = time.perf_counter()
+    path = os.path.realpath(path)  # Replace the target of a symlink, not the link
+    directory = os.path.dirname(path)
+    try:
+        mode = stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        mode = DEFAULT_MODE
+
+    encoder = codecs.getincrementalencoder(encoding)()
+    fd, temp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            out = document.wrap_stream(f, compression, 'wb') if compression else f
+            out.write(document.encoding_bom(encoding))
+            for chunk in chunks:
+                out.write(encoder.encode(_translate(chunk, newline)))
+            out.write(encoder.encode('', final=True))
+            if out is not f:
+                out.close()  # Writes the compressor's trailer, f stays open
+            if fsync != FSYNC_NONE:
+                f.flush()
+                os.fsync(f.fileno())
+        os.chmod(temp_path, mode)
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.remove(temp_path)
+        except OSError:
+            pass
+        raise
+    if fsync == FSYNC_DIRECTORY:
+        _fsync_directory(directory)
+    return time.perf_counter() - start
+
+
+class BackgroundWriter:
+    """
+    A dedicated writer thread with a coalescing save queue.
+
+    Only the newest pending snapshot is kept for each path, so a burst of saves
+    to the same file turns into a single write. Results are posted to a
+    thread-safe queue and delivered to their callbacks by poll(), which must be
+    called from the Tk main loop.
+
+    Attributes:
+        writes_performed: Number of snapshots written to disk
+        writes_coalesced: Number of snapshots replaced by a newer one before being written
+        latency: Per fsync policy save latency, as {"count", "total", "max", "last"} in seconds
+    """
+
+    def __init__(self, write_func=atomic_write):
+        self.write_func = write_func
+        self.writes_performed = 0
+        self.writes_coalesced = 0
+        self.latency = {}
+        self._pending = {}  # path -> (content, options, callback), oldest first
+        self._busy = False
+        self._closed = False
+        self._condition = threading.Condition()
+        self._results = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="tne-writer", daemon=True)
+        self._thread.start()
+
+    def submit(self, path, content, callback=None, **options):
+        """
+        Queue a snapshot of a document to be written.
+
+        Args:
+            path (str): The path of the file to write.
+            content (str): The snapshot to write.
+            callback (callable): Called as callback(path, error, latency) from poll()
+                once the write finished. error is None on success, latency is the
+                save time in seconds (None on failure).
+            **options: Extra keyword arguments passed to the write function.
+        """
+        with self._condition:
+            if not self._closed:
+                if path in self._pending:
+                    # Drop the stale snapshot and requeue the path at the back,
+                    # keeping the strongest durability either save asked for
+                    _, old_options, _ = self._pending.pop(path)
+                    if 'fsync' in old_options:
+                        options['fsync'] = stronger_policy(old_options['fsync'],
+                                                           options.get('fsync', FSYNC_FILE))
+                    self.writes_coalesced += 1
+                self._pending[path] = (content, options, callback)
+                self._condition.notify()
+                return
+        # The thread is gone, write synchronously so the data is not lost
+        self._write(path, content, options, callback)
+
+    def _run(self):
+        """Write pending snapshots until the writer is closed"""
+        while True:
+            with self._condition:
+                while not self._pending and not self._closed:
+                    self._condition.wait()
+                if not self._pending:
+                    return
+                path = next(iter(self._pending))
+                content, options, callback = self._pending.pop(path)
+                self._busy = True
+            try:
+                self._write(path, content, options, callback)
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
+
+    def _write(self, path, content, options, callback):
+        """Write one snapshot and post its result"""
+        error = None
+        latency = None
+        try:
+            latency = self.write_func(path, content, **options)
+            self.writes_performed += 1
+            if latency is not None:
+                self._record_latency(options.get('fsync', FSYNC_FILE), latency)
+        except Exception as e:
+            error = e
+        self._results.put((callback, path, error, latency))
+
+    def _record_latency(self, policy, latency):
+        """Accumulate the save latency measured for a fsync policy"""
+        with self._condition:
+            entry = self.latency.setdefault(policy, {"count": 0, "total": 0.0, "max": 0.0, "last": 0.0})
+            entry["count"] += 1
+            entry["total"] += latency
+            entry["max"] = max(entry["max"], latency)
+            entry["last"] = latency
+
+    def latency_report(self):
+        """Return the average and worst save latency per fsync policy, in milliseconds"""
+        with self._condition:
+            return {policy: {"count": entry["count"],
+                             "average_ms": entry["total"] / entry["count"] * 1000,
+                             "max_ms": entry["max"] * 1000}
+                    for policy, entry in self.latency.items()}
+
+    def pending(self):
+        """Return True if snapshots are queued or being written"""
+        with self._condition:
+            return bool(self._pending) or self._busy
+
+    def poll(self):
+        """
+        Deliver finished writes to their callbacks on the calling thread.
+
+        Returns:
+            int: The number of results delivered.
+        """
+        delivered = 0
+        while True:
+            try:
+                callback, path, error, latency = self._results.get_nowait()
+            except queue.Empty:
+                return delivered
+            delivered += 1
+            if callback is not None:
+                try:
+                    callback(path, error, latency)
+                except Exception as e:
+                    print(f"Error in save callback: {e}")
+
+    def flush(self, timeout=None):
+        """
+        Wait until every queued snapshot has been written.
+
+        Returns:
+            bool: True if the queue drained before the timeout.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def close(self, timeout=None):
+        """Write the remaining snapshots and stop the writer thread"""
+        with self._condition:
+            self._closed = True
+            self._condition.notify_all()
+        self._thread.join(timeout)
+        self.poll()
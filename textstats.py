@@ -0,0 +1,114 @@
+"""
+    Group: TAMUSA Notepad Experts (TNE)
+    Authors: Joshua Ludolf & Luis Morales
+    Class: CSCI 3366 - Programming Languages
+
+    Document statistics module for the TAMUSA Notepad application.
+    Keeps the line, word and character counts of the editor up to date from
+    the edits reported by the TextWatcher, so the status bar never recounts
+    the whole document while typing. A document replaced at once (opened,
+    loaded) is counted chunk by chunk in idle time.
+"""
+
+CHUNK_LINES = 5000      # Lines copied out of the widget per counting step
+SLICE_SECONDS = 0.01    # Counting done per idle callback
+
+
+def count_words(text):
+    """Return the number of whitespace separated words in text"""
+    return len(text.split())
+
+
+class TextStats:
+    """
+    Line, word and character counts of a document, updated edit by edit.
+
+    An edit only changes the word count where it meets the text around it,
+    so it needs the inserted or deleted text and the character on each side,
+    never the rest of the line. Edits made while the TextWatcher was muted
+    are not reported, generation records the watcher generation the counts
+    match so the caller knows when to begin() a recount.
+
+    A recount is fed whole lines with add(), first to last. Edits to lines
+    already counted are applied, edits to lines not reached yet are left to
+    the recount, and an edit across the boundary starts it over.
+
+    Attributes:
+        lines: Number of lines
+        words: Number of whitespace separated words
+        chars: Number of characters, newlines included
+        generation: The TextWatcher generation the counts were taken at
+        next_line: First line the recount has not reached, None when not counting
+    """
+
+    def __init__(self):
+        self.lines = 1
+        self.words = 0
+        self.chars = 0
+        self.generation = 0
+        self.next_line = None
+
+    @property
+    def counting(self):
+        return self.next_line is not None
+
+    def begin(self, generation=0):
+        """Start counting a document from its first line"""
+        self.lines = 1
+        self.words = 0
+        self.chars = 0
+        self.generation = generation
+        self.next_line = 1
+
+    def add(self, chunk, next_line):
+        """
+        Count the next whole lines of a recount.
+
+        Args:
+            chunk (str): The lines from next_line up to (not including) the given next_line.
+            next_line (int): The first line after the chunk.
+        """
+        self.lines += chunk.count("\n")
+        self.words += count_words(chunk)
+        self.chars += len(chunk)
+        self.next_line = next_line
+
+    def finish(self):
+        """End a recount, every line was added"""
+        self.next_line = None
+
+    def edit(self, operation, first_line, last_line, text, before, after):
+        """
+        Apply one edit to the counts.
+
+        Args:
+            operation (str): "insert" or "delete", as reported by the TextWatcher.
+            first_line (int): The line the edit starts on.
+            last_line (int): The line a deletion ended on before it was made,
+                first_line for an insert.
+            text (str): The inserted or deleted text.
+            before (str): The character before the edit, "" at the start of the document.
+            after (str): The character after the inserted text, or after the
+                deletion point once the text is gone.
+        """
+        if self.counting:
+            if first_line >= self.next_line:
+                return  # The recount gets there with the edit made
+            if last_line >= self.next_line:
+                self.begin(self.generation)  # Straddles the recount, count again
+                return
+        joined = count_words(before + after)
+        edited = count_words(before + text + after)
+        sign = 1 if operation == "insert" else -1
+        newlines = text.count("\n")
+        self.lines += sign * newlines
+        self.chars += sign * len(text)
+        self.words += sign * (edited - joined)
+        if self.counting:
+            self.next_line += sign * newlines
+
+    def describe(self):
+        """Return the counts for the status bar, e.g. "12 words | 80 chars" """
+        if self.counting:
+            return "counting words..."
+        return f"{self.words} words | {self.chars} chars"
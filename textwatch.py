@@ -0,0 +1,147 @@
+"""
+    Group: TAMUSA Notepad Experts (TNE)
+    Authors: Joshua Ludolf & Luis Morales
+    Class: CSCI 3366 - Programming Languages
+
+    Edit notification module for the TAMUSA Notepad application.
+    Reports every insert and delete made to a Text widget, whether it comes from
+    a key press, a paste or a call from Python.
+"""
+
+import contextlib
+import tkinter as tk
+
+# Tk 8.6 stores text as UTF-16, so a character outside the Basic Multilingual
+# Plane (e.g. an emoji) takes two index positions
+TK_SURROGATES = tk.TkVersion < 8.7
+
+
+def tk_length(text):
+    """Return the length of text in Text widget index units ("+Nc", columns)"""
+    if not TK_SURROGATES or text.isascii():
+        return len(text)
+    return len(text.encode('utf-16-le')) // 2
+
+
+class TextWatcher:
+    """
+    Intercepts the insert, delete and replace commands of a Text widget.
+
+    The widget's Tcl command is renamed and replaced by a Python dispatcher, so
+    the Text class bindings (typing, paste, backspace) and direct method calls all
+    go through it. Listeners are called after each edit as
+    listener(operation, start, end, text):
+
+        insert: start/end delimit the inserted text, text is the inserted string.
+        delete: start/end are the deleted range as it was before the deletion,
+                text is the deleted string if a listener asked for it, else None.
+
+    Attributes:
+        widget: The watched Text widget
+        listeners: The registered listener callables
+        generation: Number of muted() blocks finished, listeners keeping state
+            derived from the text compare it to know they missed edits
+    """
+
+    END_MARK = "tne_watch_end"
+
+    def __init__(self, widget):
+        self.widget = widget
+        self.listeners = []
+        self._capture_deleted = 0
+        self._muted = 0
+        self.generation = 0
+        self._orig = widget._w + "_tne_orig"
+        widget.tk.call("rename", widget._w, self._orig)
+        widget.tk.createcommand(widget._w, self._dispatch)
+
+    def add_listener(self, listener, needs_deleted_text=False):
+        """
+        Register a callable to be notified of edits.
+
+        Args:
+            listener (callable): Called as listener(operation, start, end, text).
+            needs_deleted_text (bool): Fetch the deleted text before each delete.
+        """
+        self.listeners.append(listener)
+        if needs_deleted_text:
+            self._capture_deleted += 1
+
+    @contextlib.contextmanager
+    def muted(self):
+        """Suspend notifications, used for bulk operations such as loading a file"""
+        self._muted += 1
+        try:
+            yield
+        finally:
+            self._muted -= 1
+            self.generation += 1
+
+    def is_muted(self):
+        """Return True while notifications are suspended"""
+        return self._muted > 0
+
+    def call(self, *args):
+        """Run a command on the real widget, bypassing the listeners"""
+        return self.widget.tk.call((self._orig,) + args)
+
+    def index(self, index):
+        """Resolve an index to line.char form"""
+        return str(self.call("index", index))
+
+    def compare(self, index1, op, index2):
+        """Compare two indices with a relational operator such as "<" or "=="."""
+        return self.widget.tk.getboolean(self.call("compare", index1, op, index2))
+
+    def _dispatch(self, operation, *args):
+        if self.listeners and not self._muted:
+            if operation == "insert":
+                return self._insert(*args)
+            if operation == "delete":
+                return self._delete(*args)
+            if operation == "replace":
+                return self._replace(*args)
+        return self.widget.tk.call((self._orig, operation) + args)
+
+    def _insert(self, index, *args):
+        start = self.index(index)
+        if self.compare(start, "==", "end"):
+            start = self.index("end-1c")  # Tk inserts before the final newline
+        self.call("mark", "set", self.END_MARK, start)
+        result = self.call("insert", index, *args)
+        end = self.index(self.END_MARK)
+        self._notify("insert", start, end, "".join(args[0::2]))
+        return result
+
+    def _delete(self, index1, index2=None, *more):
+        if more:
+            # Several ranges: delete them one at a time from the last to the first
+            ranges = [(index1, index2)] + list(zip(more[0::2], more[1::2]))
+            ranges = [(self.index(a), self.index(b)) for a, b in ranges]
+            ranges.sort(key=lambda r: tuple(int(part) for part in r[0].split(".")), reverse=True)
+            for a, b in ranges:
+                self._delete(a, b)
+            return ""
+        start = self.index(index1)
+        end = self.index(index2 if index2 is not None else f"{start}+1c")
+        last = self.index("end-1c")
+        if self.compare(end, ">", last):
+            end = last  # Tk never deletes the final newline
+        if not self.compare(start, "<", end):
+            return self.call("delete", index1, *([index2] if index2 is not None else []))
+        text = self.call("get", start, end) if self._capture_deleted else None
+        result = self.call("delete", start, end)
+        self._notify("delete", start, end, text)
+        return result
+
+    def _replace(self, index1, index2, *args):
+        start = self.index(index1)
+        self._delete(start, index2)
+        return self._insert(start, *args)
+
+    def _notify(self, operation, start, end, text):
+        for listener in self.listeners:
+            try:
+                listener(operation, start, end, text)
+            except Exception as e:
+                print(f"Error in edit listener: {e}")
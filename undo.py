@@ -0,0 +1,304 @@
+"""
+    Group: TAMUSA Notepad Experts (TNE)
+    Authors: Joshua Ludolf & Luis Morales
+    Class: CSCI 3366 - Programming Languages
+
+    Undo module for the TAMUSA Notepad application.
+    Keeps the undo/redo history of the editor as the edits themselves (what
+    was inserted or deleted where), never as copies of the document. Typed
+    characters are merged into one entry per word, and the history is kept
+    under a memory budget by forgetting the oldest entries.
+"""
+
+import collections
+import contextlib
+import tkinter as tk
+import textwatch
+
+UNDO_LIMIT = 32 * 1024 * 1024  # Approximate bytes of history kept, oldest entries go first
+RECORD_OVERHEAD = 100          # Approximate bytes a record costs besides its text
+
+
+def parse_index(index):
+    """Return (line, column) of a "line.column" index"""
+    line, column = index.split(".")
+    return int(line), int(column)
+
+
+class UndoHistory:
+    """
+    Undo and redo stacks of edit entries under a memory budget.
+
+    An entry is a list of [operation, index, text] records, undone in
+    reverse order. A "replace" record holds a list of (offset, old, new)
+    replacements instead of text, see UndoManager.replacing(). Records made before close() go into the same entry, so
+    everything one command changed is undone at once. After close() a typed
+    character can still join the previous entry if it continues the same word,
+    and so can a backspace or delete next to the previous one. An entry that
+    does not fit the budget is dropped whole: its later records are ignored
+    until close(), so undo never reverts only part of a command.
+
+    Attributes:
+        max_bytes: The memory budget, approximate, see RECORD_OVERHEAD
+        memory: Approximate bytes held by both stacks
+    """
+
+    def __init__(self, max_bytes=UNDO_LIMIT):
+        self.max_bytes = max_bytes
+        self.memory = 0
+        self._undo = collections.deque()
+        self._redo = []
+        self._open = False  # The last entry still takes records
+        self._overflow = False  # The entry being recorded was evicted, drop its records
+
+    def can_undo(self):
+        return bool(self._undo)
+
+    def can_redo(self):
+        return bool(self._redo)
+
+    def clear(self):
+        """Forget both stacks, e.g. when the document is replaced"""
+        self._undo.clear()
+        self._redo.clear()
+        self.memory = 0
+        self._open = False
+        self._overflow = False
+
+    def close(self):
+        """End the current entry, the next record starts a new one unless it continues typing"""
+        self._open = False
+        self._overflow = False
+
+    @staticmethod
+    def _record_size(operation, text):
+        if operation == "replace":
+            return sum(RECORD_OVERHEAD + len(old) + len(new) for _, old, new in text)
+        return RECORD_OVERHEAD + len(text)
+
+    @classmethod
+    def _size(cls, entry):
+        return sum(cls._record_size(record[0], record[2]) for record in entry)
+
+    def record(self, operation, index, text):
+        """
+        Add an edit, clearing the redo stack.
+
+        Args:
+            operation (str): "insert", "delete" or "replace".
+            index (str): Where the text was inserted, or where the deleted text started.
+            text (str): The inserted or deleted text, the list of replacements for "replace".
+        """
+        if not text or self._overflow:
+            return
+        if self._redo:
+            self.memory -= sum(self._size(entry) for entry in self._redo)
+            self._redo.clear()
+        last = self._undo[-1] if self._undo else None
+        if last is not None and (self._open or len(last) == 1) \
+                and self._merge(last[-1], operation, index, text):
+            self.memory += len(text)
+        elif last is not None and self._open:
+            last.append([operation, index, text])
+            self.memory += self._record_size(operation, text)
+        else:
+            self._undo.append([[operation, index, text]])
+            self.memory += self._record_size(operation, text)
+        self._open = True
+        self._evict()
+
+    def _merge(self, last, operation, index, text):
+        """Join a one character edit to the previous record if it is of the same kind and adjacent"""
+        if operation == "replace" or len(text) != 1 or text == "\n":
+            return False
+        if last[0] != operation or "\n" in last[2]:
+            return False
+        line, column = parse_index(index)
+        last_line, last_column = parse_index(last[1])
+        if line != last_line:
+            return False
+        if operation == "insert":
+            if column != last_column + textwatch.tk_length(last[2]):
+                return False
+            if text.isspace() and not last[2][-1].isspace():
+                return False  # A new word starts a new entry
+            last[2] += text
+            return True
+        if column == last_column:
+            last[2] += text  # Delete key, the text after the cursor
+            return True
+        if column == last_column - textwatch.tk_length(text):
+            last[1], last[2] = index, text + last[2]  # Backspace, the text before the cursor
+            return True
+        return False
+
+    def _evict(self):
+        """Forget the oldest entries while over the budget"""
+        while self.memory > self.max_bytes and self._undo:
+            self.memory -= self._size(self._undo.popleft())
+        if not self._undo:
+            # The entry being recorded went too, the rest of it must not become an entry of its own
+            self._overflow = self._open
+            self._open = False
+        while self.memory > self.max_bytes and self._redo:
+            self.memory -= self._size(self._redo.pop(0))
+
+    def pop_undo(self):
+        """Return the last entry, moved to the redo stack, or None"""
+        self.close()
+        if not self._undo:
+            return None
+        entry = self._undo.pop()
+        self._redo.append(entry)
+        return entry
+
+    def pop_redo(self):
+        """Return the last undone entry, moved back to the undo stack, or None"""
+        self.close()
+        if not self._redo:
+            return None
+        entry = self._redo.pop()
+        self._undo.append(entry)
+        return entry
+
+
+class UndoManager:
+    """
+    Records the edits of a Text widget and undoes or redoes them.
+
+    Edits are reported by the TextWatcher. Edits made in the same Tk
+    callback form one entry, closed by an idle callback, so a paste over a
+    selection or a Replace All is one undo step. Text replaced while the
+    watcher was muted (opening a file, a new document) is a fresh start:
+    the history is cleared instead of holding a copy of the old text.
+
+    Attributes:
+        text: The Text widget
+        history: The UndoHistory, set history.max_bytes to change the budget
+    """
+
+    def __init__(self, text, watcher, max_bytes=UNDO_LIMIT):
+        self.text = text
+        self.watcher = watcher
+        self.history = UndoHistory(max_bytes)
+        self._generation = watcher.generation
+        self._applying = False
+        self._close_id = None
+        watcher.add_listener(self._on_edit, needs_deleted_text=True)
+
+    def _sync(self):
+        """Clear the history if the document was replaced without notifications"""
+        if self._generation != self.watcher.generation:
+            self._generation = self.watcher.generation
+            self.history.clear()
+
+    def _on_edit(self, operation, start, end, text):
+        if self._applying:
+            return
+        self._sync()
+        self.history.record(operation, start, text)
+        if self._close_id is None:
+            try:
+                self._close_id = self.text.after_idle(self._close)
+            except tk.TclError:
+                pass  # Widget has been destroyed
+
+    def _close(self):
+        self._close_id = None
+        self.history.close()
+
+    @contextlib.contextmanager
+    def replacing(self, index, replacements):
+        """
+        Record the edits made in the block as one entry of replacements only.
+
+        Replace All rewrites a whole span at once. The span is not kept, undo
+        puts back each replaced match instead.
+
+        Args:
+            index (str): Where the span starts.
+            replacements (list): (offset, old, new) per match, offset in Tk index
+                units from index in the text before the edit.
+        """
+        self._sync()
+        self._applying = True
+        try:
+            yield
+        finally:
+            self._applying = False
+        self.history.close()
+        self.history.record("replace", index, replacements)
+        self.history.close()
+
+    def separator(self):
+        """End the current undo entry"""
+        self.history.close()
+
+    def clear(self):
+        self.history.clear()
+
+    def undo(self, event=None):
+        """
+        Undo the last entry.
+
+        Returns:
+            bool: True if something was undone.
+        """
+        self._sync()
+        entry = self.history.pop_undo()
+        if entry is None:
+            return False
+        self._apply(reversed(entry), undo=True)
+        self._place_cursor(entry[0], undo=True)
+        return True
+
+    def redo(self, event=None):
+        """
+        Redo the last undone entry.
+
+        Returns:
+            bool: True if something was redone.
+        """
+        self._sync()
+        entry = self.history.pop_redo()
+        if entry is None:
+            return False
+        self._apply(entry, undo=False)
+        self._place_cursor(entry[-1], undo=False)
+        return True
+
+    def _apply(self, records, undo):
+        """Replay records, inverted when undoing, without recording them again"""
+        self._applying = True
+        try:
+            for operation, index, text in records:
+                if operation == "replace":
+                    self._replace(index, text, undo)
+                elif (operation == "insert") == undo:
+                    self.text.delete(index, f"{index}+{textwatch.tk_length(text)}c")
+                else:
+                    self.text.insert(index, text)
+        finally:
+            self._applying = False
+
+    def _replace(self, index, replacements, undo):
+        """Swap each replacement back (undo) or again (redo), last first so the offsets hold"""
+        shifts = []
+        shift = 0
+        for offset, old, new in replacements:
+            shifts.append(shift)
+            shift += textwatch.tk_length(new) - textwatch.tk_length(old)
+        for (offset, old, new), shift in zip(reversed(replacements), reversed(shifts)):
+            current, wanted = (new, old) if undo else (old, new)
+            position = f"{index}+{offset + shift if undo else offset}c"
+            self.text.delete(position, f"{position}+{textwatch.tk_length(current)}c")
+            self.text.insert(position, wanted)
+
+    def _place_cursor(self, record, undo):
+        operation, index, text = record
+        if operation == "replace":
+            pass  # At the start of the replaced span
+        elif (operation == "insert") != undo:
+            index = self.text.index(f"{index}+{textwatch.tk_length(text)}c")
+        self.text.mark_set(tk.INSERT, index)
+        self.text.see(tk.INSERT)
@@ -7,12 +7,35 @@ import tempfile
 import random
 import string
 import io
+import codecs
+import threading
+import re
+import time
+import gzip
+import bz2
+import lzma
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 sys.stdout = io.TextIOWrapper(sys.stdout.buffer, encoding='utf-8')
 
 from notepad import NotePad
 import file
+import saver
+import journal
+import autosave
+import document
+import viewer
+import lineindex
+import follow
+import hexview
+import dirscan
+import quickopen
+import findfiles
+import findbar
+import textstats
+import highlight
+import textwatch
+import undo
 
 class TestNotepad(unittest.TestCase):
     @classmethod
@@ -51,6 +74,7 @@ class TestNotepad(unittest.TestCase):
     
     def tearDown(self):
         try:
+            self.notepad.close()
             if os.path.exists(self.test_file):
                 os.remove(self.test_file)
             self.root.destroy()
@@ -146,6 +170,495 @@ class TestNotepad(unittest.TestCase):
         self.assertIsInstance(menu_bar, tk.Menu)
         print("✓ Menu bar verified")
 
+    def wait_for_scans(self, timeout=10):
+        """Run the event loop until the file tree's background listings arrived"""
+        deadline = time.time() + timeout
+        while self.notepad.scans_pending() and time.time() < deadline:
+            self.root.update()
+            time.sleep(0.01)
+        self.assertFalse(self.notepad.scans_pending())
+
+    def test_file_tree_lazy_loading(self):
+        """Test that directories are only listed when expanded"""
+        print("Testing lazy file tree...")
+        tree_root = os.path.join(self.test_dir, "tree")
+        for sub in ["alpha", "beta"]:
+            os.makedirs(os.path.join(tree_root, sub, "nested"), exist_ok=True)
+            with open(os.path.join(tree_root, sub, f"{sub}.txt"), 'w') as f:
+                f.write(sub)
+
+        scanned = []
+        real_scandir = os.scandir
+        os.scandir = lambda path=".": scanned.append(path) or real_scandir(path)
+        try:
+            self.notepad.populate_tree(tree_root)
+            self.wait_for_scans()
+            self.assertEqual(scanned, [os.path.abspath(tree_root)])
+            print("✓ First paint listed only the root")
+
+            tree = self.notepad.tree
+            root_node = tree.get_children("")[0]
+            alpha = tree.get_children(root_node)[0]
+            self.assertTrue(self.notepad._is_unlisted(alpha))
+            self.notepad.expand_directory(alpha)
+            self.assertIn("loading", tree.item(tree.get_children(alpha)[0], "tags"))
+            self.wait_for_scans()
+            names = [tree.item(child, "text") for child in tree.get_children(alpha)]
+            self.assertEqual(names, [f"{self.notepad.folder_icon} nested", f"{self.notepad.file_icon} alpha.txt"])
+            self.notepad.expand_directory(alpha)  # Already listed, not scanned again
+            self.assertEqual(len(scanned), 2)
+            print("✓ Directory listed once, on expansion")
+
+            # Settled directories are served from the listing cache
+            alpha_path = os.path.join(tree_root, "alpha")
+            os.utime(alpha_path, (1_000_000_000, 1_000_000_000))
+            self.notepad.add_directory(alpha, alpha_path)
+            self.wait_for_scans()
+            self.notepad.add_directory(alpha, alpha_path)
+            self.wait_for_scans()
+            self.assertEqual(len(scanned), 3)
+            self.assertEqual(len(tree.get_children(alpha)), 2)
+            print("✓ Unchanged directory listed again from the cache")
+        finally:
+            os.scandir = real_scandir
+
+    def test_file_tree_paging(self):
+        """Test that large directories are shown one page at a time"""
+        print("Testing paged file tree...")
+        tree_root = os.path.join(self.test_dir, "paged")
+        os.makedirs(os.path.join(tree_root, "sub"))
+        for number in range(24):
+            with open(os.path.join(tree_root, f"file{number:02d}.txt"), 'w') as f:
+                f.write("x")
+        self.notepad.tree_page_size = 10
+        self.notepad.populate_tree(tree_root)
+        self.wait_for_scans()
+
+        tree = self.notepad.tree
+        root_node = tree.get_children("")[0]
+        children = tree.get_children(root_node)
+        self.assertEqual(len(children), 11)
+        self.assertEqual(tree.item(children[0], "text"), f"{self.notepad.folder_icon} sub")
+        self.assertEqual(tree.item(children[-1], "text"), "... 15 more items (load next 10)")
+        print("✓ First page and a sentinel row shown")
+
+        self.notepad.load_more(root_node)
+        self.notepad.load_more(root_node)
+        names = [tree.item(child, "text") for child in tree.get_children(root_node)]
+        self.assertEqual(len(names), 25)
+        self.assertEqual(names[-1], f"{self.notepad.file_icon} file23.txt")
+        self.assertFalse(self.notepad.scans_pending())
+        print("✓ Later pages sliced from the listing without scanning again")
+
+    def test_file_tree_refresh(self):
+        """Test that a refresh only changes the rows of changed entries"""
+        print("Testing incremental file tree refresh...")
+        tree_root = os.path.join(self.test_dir, "refresh")
+        os.makedirs(os.path.join(tree_root, "keep", "inner"))
+        for name in ["gone.txt", "stays.txt"]:
+            with open(os.path.join(tree_root, name), 'w') as f:
+                f.write(name)
+        self.notepad.populate_tree(tree_root)
+        self.wait_for_scans()
+
+        tree = self.notepad.tree
+        root_node = tree.get_children("")[0]
+        keep, gone, stays = tree.get_children(root_node)
+        self.notepad.expand_directory(keep)
+        tree.item(keep, open=True)
+        self.wait_for_scans()
+
+        os.remove(os.path.join(tree_root, "gone.txt"))
+        with open(os.path.join(tree_root, "new.txt"), 'w') as f:
+            f.write("new")
+        self.notepad.refresh_tree()
+        self.wait_for_scans()
+        children = tree.get_children(root_node)
+        self.assertEqual([tree.item(child, "text") for child in children],
+                         [f"{self.notepad.folder_icon} keep", f"{self.notepad.file_icon} new.txt",
+                          f"{self.notepad.file_icon} stays.txt"])
+        self.assertEqual((children[0], children[2]), (keep, stays))
+        self.assertTrue(tree.item(keep, "open"))
+        self.assertEqual(len(tree.get_children(keep)), 1)
+        print("✓ Changed rows applied, unchanged rows and expansion kept")
+
+    def test_reveal_current_file(self):
+        """Test that the open file is found and selected through the path index"""
+        print("Testing reveal in file tree...")
+        tree_root = os.path.join(self.test_dir, "reveal")
+        deep_dir = os.path.join(tree_root, "one", "two")
+        os.makedirs(deep_dir)
+        target = os.path.join(deep_dir, "target.txt")
+        with open(target, 'w') as f:
+            f.write("found")
+        self.notepad.populate_tree(tree_root)
+        self.wait_for_scans()
+
+        self.notepad.current_file[0] = target
+        self.notepad.reveal_current_file()
+        self.wait_for_scans()
+        tree = self.notepad.tree
+        selected = tree.selection()[0]
+        self.assertEqual(tree.item(selected, "values")[1], target)
+        self.assertTrue(tree.item(tree.parent(selected), "open"))
+        print("✓ Parent directories listed and the file selected")
+
+        self.notepad.add_directory(self.notepad._path_items[dirscan.path_key(tree_root)], tree_root)
+        self.assertNotIn(dirscan.path_key(target), self.notepad._path_items)
+        print("✓ Re-listed subtree removed from the index")
+
+    def test_quick_open(self):
+        """Test that Ctrl+P finds and opens a file under the tree's root"""
+        print("Testing quick open...")
+        tree_root = os.path.join(self.test_dir, "quick")
+        os.makedirs(os.path.join(tree_root, "pkg"))
+        target = os.path.join(tree_root, "pkg", "settings.ini")
+        with open(target, 'w') as f:
+            f.write("[quick]")
+        saved_cache_dir = quickopen.CACHE_DIR
+        quickopen.CACHE_DIR = os.path.join(self.test_dir, "quickopen_cache")
+        try:
+            self.notepad.populate_tree(tree_root)
+            self.wait_for_scans()
+            self.notepad.show_quick_open()
+            deadline = time.time() + 10
+            while self.notepad.path_index_builder is not None and time.time() < deadline:
+                self.root.update()
+                time.sleep(0.01)
+            dialog = self.notepad.quick_open_dialog
+            self.assertIs(dialog.index, self.notepad.path_index)
+            print("✓ Path index built in the background")
+
+            dialog.search_var.set("setini")
+            dialog.search()
+            self.assertTrue(dialog.searcher.wait(5))
+            dialog._poll_search()
+            self.assertEqual(dialog.results, ["pkg/settings.ini"])
+            dialog.choose()
+            self.assertEqual(self.notepad.current_file[0], target)
+            self.assertEqual(self.notepad.message_box.get("1.0", "end-1c"), "[quick]")
+            print("✓ Fuzzy match opened in the editor")
+        finally:
+            quickopen.CACHE_DIR = saved_cache_dir
+
+    def test_find_in_files(self):
+        """Test that Find in Files lists matching lines and opens them"""
+        print("Testing find in files window...")
+        tree_root = os.path.join(self.test_dir, "project")
+        os.makedirs(tree_root)
+        target = os.path.join(tree_root, "settings.conf")
+        with open(target, 'w') as f:
+            f.write("name = demo\ntimeout = 30\nretries = 3\n")
+        self.notepad.populate_tree(tree_root)
+        self.wait_for_scans()
+
+        self.notepad.show_find_in_files()
+        dialog = self.notepad.find_in_files_dialog
+        dialog.search_var.set("timeout")
+        dialog.start()
+        deadline = time.time() + 60
+        while not dialog.search.finished and time.time() < deadline:
+            self.root.update()
+            time.sleep(0.02)
+        self.root.update()
+        self.assertEqual([(hit.path, hit.line) for hit in dialog.hits], [(target, 2)])
+        self.assertEqual(dialog.listbox.get(0), "settings.conf:2: timeout = 30")
+        print("✓ Matching line streamed into the results")
+
+        dialog.listbox.selection_set(0)
+        dialog.choose()
+        self.assertEqual(self.notepad.current_file[0], target)
+        self.assertEqual(self.notepad.message_box.index(tk.INSERT), "2.0")
+        dialog.close()
+        print("✓ Result opened at its line")
+
+    def test_status_bar_counts(self):
+        """Test that status updates are coalesced and counts follow the edits"""
+        print("Testing status bar updates...")
+        box = self.notepad.message_box
+        box.insert("1.0", "one two\nthree")
+        for _ in range(50):
+            self.notepad.update_status()
+        self.assertIsNotNone(self.notepad._status_idle_id)
+        self.root.update_idletasks()
+        self.assertIsNone(self.notepad._status_idle_id)
+        self.assertIn("of 2 |", self.notepad.status_bar.cget("text"))
+        self.assertIn("3 words | 13 chars", self.notepad.status_bar.cget("text"))
+        print("✓ Fifty updates flushed once when idle")
+
+        box.delete("1.7", "2.0")
+        self.root.update_idletasks()
+        self.assertIn("of 1 |", self.notepad.status_bar.cget("text"))
+        self.assertIn("2 words | 12 chars", self.notepad.status_bar.cget("text"))
+        self.notepad.new_file()
+        self.notepad.update_status()
+        self.root.update_idletasks()
+        while self.notepad.text_stats.counting:
+            self.root.update()
+        self.root.update_idletasks()
+        self.assertIn("0 words | 0 chars", self.notepad.status_bar.cget("text"))
+        print("✓ Counts updated by edits and recounted after a new file")
+
+    def test_syntax_highlighting(self):
+        """Test that Python files are highlighted and edits retokenize the following lines"""
+        print("Testing syntax highlighting...")
+        test_file = self.generate_test_file_path(suffix=".py")
+        with open(test_file, 'w') as f:
+            f.write("import os\nvalue = 42\nname = 'tne'\n")
+        self.assertTrue(self.notepad.open_file(test_file))
+        highlighter = self.notepad.highlighter
+        self.assertEqual(highlighter.lexer.name, "Python")
+        while highlighter.pending():
+            self.root.update()
+        box = self.notepad.message_box
+        self.assertEqual([str(index) for index in box.tag_ranges("syntax_keyword")], ["1.0", "1.6"])
+        self.assertEqual([str(index) for index in box.tag_ranges("syntax_number")], ["2.8", "2.10"])
+        print("✓ Keywords and numbers tagged")
+
+        # Opening a triple quoted string turns the following lines into string
+        box.insert("2.0", '"""')
+        while highlighter.pending():
+            self.root.update()
+        self.assertEqual([str(index) for index in box.tag_ranges("syntax_string")],
+                         ["2.0", "2.13", "3.0", "3.12"])
+        self.assertEqual(box.tag_ranges("syntax_number"), ())
+        box.delete("2.0", "2.3")
+        while highlighter.pending():
+            self.root.update()
+        self.assertEqual([str(index) for index in box.tag_ranges("syntax_string")], ["3.7", "3.12"])
+        print("✓ Edit retokenized the lines its state carried to")
+
+        # Tokens after an emoji are tagged in Tk's own column units
+        box.insert("2.0", "'😀' + ")
+        while highlighter.pending():
+            self.root.update()
+        self.assertEqual(box.get("syntax_number.first", "syntax_number.last"), "42")
+        print("✓ Tags placed after an emoji")
+
+        self.notepad.new_file()
+        self.assertIsNone(highlighter.lexer)
+        self.assertEqual(box.tag_ranges("syntax_keyword"), ())
+        print("✓ Highlighting removed for an untitled document")
+
+    def test_highlighting_keystroke_cost(self):
+        """Time the highlighter's idle slices per keystroke on a 100k-line document"""
+        print("Benchmarking highlighting while typing...")
+        test_file = self.generate_test_file_path(suffix=".py")
+        with open(test_file, 'w') as f:
+            f.write("\n".join("def f%d(x):" % i if i % 4 == 0 else "    return x + %d  # n" % i
+                              for i in range(100000)))
+        self.assertTrue(self.notepad.open_file(test_file))
+        highlighter = self.notepad.highlighter
+        box = self.notepad.message_box
+        while self.notepad.is_loading() or highlighter.pending():
+            self.root.update()
+        self.assertEqual(int(box.index("end-1c").split(".")[0]), 100000)
+
+        # Each character is its own Tk callback, followed by the slices it scheduled
+        slice_ms = 0.0
+        slices = 0
+        started = time.perf_counter()
+        for keystroke in range(1000):
+            line = 50000 + keystroke
+            box.see(f"{line}.0")
+            box.insert(f"{line}.end", "x")
+            while highlighter.pending():
+                self.root.update()
+                slice_ms += highlighter.last_slice_ms
+                slices += 1
+        per_keystroke = (time.perf_counter() - started) * 1000 / 1000
+        self.assertEqual(box.get("syntax_comment.first", "syntax_comment.first lineend"), "# n")
+        self.assertEqual([str(index) for index in box.tag_nextrange("syntax_comment", "50002.0")],
+                         ["50002.22", "50002.26"])
+        print(f"✓ {slice_ms / 1000:.3f} ms of highlighting per keystroke in {slices / 1000:.1f} slices "
+              f"({per_keystroke:.3f} ms per keystroke including the widget)")
+
+    def test_find_and_replace(self):
+        """Test the find bar's search, highlighting and replace all"""
+        print("Testing find and replace bar...")
+        self.notepad.message_box.insert("1.0", "alpha beta\nbeta gamma\nalpha beta\n")
+        self.notepad.message_box.mark_set(tk.INSERT, "1.0")
+        bar = self.notepad.find_bar
+        bar.show()
+        bar.find_var.set("beta")
+        bar.search_incremental()
+        self.assertEqual(self.notepad.message_box.tag_ranges(findbar.CURRENT_TAG)[0].string, "1.6")
+        self.assertEqual(len(self.notepad.message_box.tag_ranges(findbar.MATCH_TAG)), 6)
+        print("✓ First match selected, visible matches highlighted")
+
+        bar.find_next()
+        bar.find_next()
+        bar.find_next()
+        self.assertEqual(self.notepad.message_box.tag_ranges(findbar.CURRENT_TAG)[0].string, "1.6")
+        bar.find_previous()
+        self.assertEqual(self.notepad.message_box.tag_ranges(findbar.CURRENT_TAG)[0].string, "3.6")
+        print("✓ Next and previous wrap around the document")
+
+        self.root.update()  # Ends the undo entry of the inserted text
+        memory = self.notepad.undo_manager.history.memory
+        bar.replace_var.set("delta")
+        self.assertEqual(bar.replace_all(), 3)
+        self.assertEqual(self.notepad.message_box.get("1.0", "end-1c"),
+                         "alpha delta\ndelta gamma\nalpha delta\n")
+        bar.hide()
+        self.assertEqual(self.notepad.message_box.tag_ranges(findbar.MATCH_TAG), ())
+        print("✓ Replace all rewrote every match")
+
+        history = self.notepad.undo_manager.history
+        self.assertEqual(history.memory - memory, 3 * (undo.RECORD_OVERHEAD + len("beta") + len("delta")))
+        self.notepad.undo()
+        self.assertEqual(self.notepad.message_box.get("1.0", "end-1c"),
+                         "alpha beta\nbeta gamma\nalpha beta\n")
+        self.notepad.redo()
+        self.assertEqual(self.notepad.message_box.get("1.0", "end-1c"),
+                         "alpha delta\ndelta gamma\nalpha delta\n")
+        self.notepad.undo()
+        print("✓ Replace all undone in one step, only its matches recorded")
+
+        # Columns after an emoji are in Tk index units
+        self.notepad.message_box.delete("1.0", tk.END)
+        self.notepad.message_box.insert("1.0", "😀 cat cat")
+        self.notepad.message_box.mark_set(tk.INSERT, "1.0")
+        bar.show()
+        bar.find_var.set("cat")
+        bar.search_incremental()
+        current = self.notepad.message_box.tag_ranges(findbar.CURRENT_TAG)
+        self.assertEqual(self.notepad.message_box.get(*current), "cat")
+        bar.find_next()
+        current = self.notepad.message_box.tag_ranges(findbar.CURRENT_TAG)
+        self.assertEqual(self.notepad.message_box.get(current[0], "end-1c"), "cat")
+        bar.replace_var.set("🐶")
+        bar.replace_one()
+        self.assertEqual(self.notepad.message_box.get("1.0", "end-1c"), "😀 cat 🐶")
+        current = self.notepad.message_box.tag_ranges(findbar.CURRENT_TAG)
+        self.assertEqual(self.notepad.message_box.get(current[0], "end-1c"), "cat 🐶")
+        bar.hide()
+        print("✓ Matches and replacements after an emoji line up")
+
+        # Lookarounds are checked against the match's context, not the matched text alone
+        bar.regex_var.set(True)
+        for query, content, expected, next_match in [("foo(?=bar)", "foobar foobaz foobar", "Xbar foobaz foobar", "1.14"),
+                                                     ("(?<=a)b", "ab cb ab", "aX cb ab", "1.7")]:
+            self.notepad.message_box.delete("1.0", tk.END)
+            self.notepad.message_box.insert("1.0", content)
+            self.notepad.message_box.mark_set(tk.INSERT, "1.0")
+            bar.show()
+            bar.find_var.set(query)
+            bar.search_incremental()
+            bar.replace_var.set("X")
+            bar.replace_one()
+            self.assertEqual(self.notepad.message_box.get("1.0", "end-1c"), expected)
+            self.assertEqual(self.notepad.message_box.tag_ranges(findbar.CURRENT_TAG)[0].string, next_match)
+            bar.hide()
+        bar.regex_var.set(False)
+        print("✓ Replace replaced lookahead and lookbehind matches")
+
+    def test_undo_redo(self):
+        """Test that typed words are undone one at a time and redone"""
+        print("Testing undo and redo...")
+        box = self.notepad.message_box
+        for character in "hello big world":
+            box.insert(tk.INSERT, character)
+            self.root.update()  # Each key press is its own Tk callback
+        self.notepad.undo()
+        self.assertEqual(box.get("1.0", "end-1c"), "hello big")
+        self.notepad.undo()
+        self.assertEqual(box.get("1.0", "end-1c"), "hello")
+        self.notepad.redo()
+        self.assertEqual(box.get("1.0", "end-1c"), "hello big")
+        self.assertEqual(box.index(tk.INSERT), "1.9")
+        print("✓ Typing undone and redone a word at a time")
+
+        box.delete("1.0", "1.6")
+        self.root.update()
+        self.notepad.undo()
+        self.assertEqual(box.get("1.0", "end-1c"), "hello big")
+        self.assertTrue(self.notepad.undo_manager.history.can_redo())
+        self.notepad.new_file()
+        self.notepad.undo()
+        self.assertEqual(box.get("1.0", "end-1c"), "")
+        self.assertFalse(self.notepad.undo_manager.history.can_undo())
+        print("✓ Deletes undone, history cleared by a new document")
+
+    def test_undo_emoji(self):
+        """Test undo and redo of characters Tk counts as two index positions"""
+        print("Testing undo of emoji...")
+        box = self.notepad.message_box
+        box.insert("1.0", "ab")
+        self.root.update()
+        box.insert("1.1", "😀")
+        self.root.update()
+        self.notepad.undo()
+        self.assertEqual(box.get("1.0", "end-1c"), "ab")
+        self.notepad.redo()
+        self.assertEqual(box.get("1.0", "end-1c"), "a😀b")
+        self.assertEqual(box.get(tk.INSERT, "end-1c"), "b")
+        print("✓ Inserted emoji undone and redone whole")
+
+        box.delete("1.1", f"1.1+{textwatch.tk_length('😀')}c")
+        self.root.update()
+        self.assertEqual(box.get("1.0", "end-1c"), "ab")
+        self.notepad.undo()
+        self.assertEqual(box.get("1.0", "end-1c"), "a😀b")
+        self.notepad.undo()
+        self.notepad.undo()
+        self.assertEqual(box.get("1.0", "end-1c"), "")
+        self.notepad.redo()
+        self.notepad.redo()
+        self.notepad.redo()
+        self.assertEqual(box.get("1.0", "end-1c"), "ab")
+        print("✓ Deleted emoji restored, stacks stay in step with the text")
+
+    def test_autosave_skips_clean_buffer(self):
+        """Test that auto-save only writes when the buffer changed"""
+        print("Testing dirty-tracking auto-save...")
+        import execute
+        execute.app = self.notepad
+        execute.is_running = True
+        execute.is_dirty = False
+        execute.last_saved_fingerprint = None
+        execute.saves_performed = 0
+        execute.saves_skipped = 0
+        execute.saves_deferred = 0
+
+        self.notepad.current_file[0] = self.test_file
+        self.notepad.journal_limit = 0  # Always rewrite the file instead of journaling
+        self.assertFalse(execute.save_if_dirty())
+        self.assertFalse(os.path.exists(self.test_file))
+        print("✓ Clean buffer was not saved")
+
+        self.notepad.message_box.insert("1.0", "Autosave me")
+        execute.on_modified()
+        self.assertTrue(execute.save_if_dirty())
+        self.assertFalse(execute.save_if_dirty())
+        self.assertTrue(self.notepad.writer.flush(timeout=5))
+        with open(self.test_file, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), "Autosave me")
+        self.assertEqual(execute.autosave_stats()["performed"], 1)
+        self.assertEqual(execute.autosave_stats()["skipped"], 2)
+        print("✓ Dirty buffer saved once, then skipped")
+
+        # A scheduled save gets the latency of its own write from the writer callback
+        scheduler = execute.scheduler
+        execute.scheduler = autosave.AutoSaveScheduler(idle_delay=0, min_interval=0)
+        self.notepad.writer.write_func = lambda path, content, **options: 0.5
+        try:
+            self.notepad.message_box.insert("end", " again")
+            execute.on_modified()
+            self.assertTrue(execute.run_scheduled_save())
+            self.assertTrue(self.notepad.writer.flush(timeout=5))
+            self.notepad.writer.poll()
+            self.assertEqual(execute.scheduler.last_cost, 0.5)
+            self.assertIn("next auto-save in 10.0 s", self.notepad.status_bar.cget("text"))
+
+            # Polls with no save due are deferred, not counted as skipped saves
+            self.assertFalse(execute.run_scheduled_save())
+            stats = execute.autosave_stats()
+            self.assertEqual((stats["skipped"], stats["deferred"]), (2, 1))
+        finally:
+            execute.scheduler = scheduler
+        print("✓ Auto-save latency fed back and the interval shown")
+
     def test_large_file_handling(self):
         """Test handling of large files with different sizes"""
         print("Testing large file handling...")
@@ -175,6 +688,235 @@ class TestNotepad(unittest.TestCase):
                 if os.path.exists(test_file):
                     os.remove(test_file)
 
+        # Large files are streamed in by the progressive loader. Files near the viewer
+        # threshold take minutes under Tk, set TNE_HUGE_FILE_TESTS=1 to include them.
+        progressive_sizes = [200000]
+        if os.environ.get("TNE_HUGE_FILE_TESTS"):
+            progressive_sizes += [5000000, 9000000]  # ~65 MB and ~120 MB
+        for size in progressive_sizes:
+            with self.subTest(size=size, progressive=True):
+                print(f"Testing progressive load with {size} lines...")
+                with open(test_file, 'w', encoding='utf-8', newline='') as f:
+                    for start in range(0, size, 100000):
+                        stop = min(start + 100000, size)
+                        f.write("\n".join(f"Line {i+1}" for i in range(start, stop)))
+                        if stop < size:
+                            f.write("\n")
+                print(f"Saved file of {os.path.getsize(test_file) / (1024 * 1024):.1f} MB")
+
+                self.assertTrue(self.notepad.open_file(test_file))
+                # The first screenful is there before the event loop runs
+                self.assertTrue(self.notepad.is_loading())
+                self.assertEqual(self.notepad.message_box.get("1.0", "1.end"), "Line 1")
+                print("✓ First screenful shown immediately")
+
+                while self.notepad.is_loading():
+                    self.root.update()
+                self.assertEqual(self.notepad.message_box.index("end-1c").split(".")[0], str(size))
+                self.assertEqual(self.notepad.message_box.get("end-1c linestart", "end-1c"), f"Line {size}")
+                self.assertEqual(self.notepad.current_file[0], test_file)
+                print(f"✓ Progressive load passed for {size} lines")
+
+                # Cleanup
+                if os.path.exists(test_file):
+                    os.remove(test_file)
+
+        # Cancelling keeps the loaded part but detaches it from the file
+        with open(test_file, 'w', encoding='utf-8', newline='') as f:
+            f.write("\n".join(f"Line {i+1}" for i in range(200000)))
+        self.notepad.open_file(test_file)
+        self.notepad.cancel_loading()
+        self.assertFalse(self.notepad.is_loading())
+        self.assertIsNone(self.notepad.current_file[0])
+        print("✓ Cancelled load detached from the file")
+
+        # Compressed files are streamed in from their decoded chunks
+        gz_file = test_file + ".gz"
+        with gzip.open(gz_file, 'wb') as f:
+            f.write("".join(f"Line {i+1}\r\n" for i in range(200000)).encode('utf-8'))
+        self.assertTrue(self.notepad.open_file(gz_file))
+        self.assertTrue(self.notepad.is_loading())
+        while self.notepad.is_loading():
+            self.root.update()
+        self.assertEqual(self.notepad.message_box.index("end-1c"), "200001.0")
+        self.assertEqual(self.notepad.message_box.get("200000.0", "200000.end"), "Line 200000")
+        self.assertEqual(self.notepad.document.newline, "\r\n")
+        os.remove(gz_file)
+        print("✓ Compressed file streamed in chunk by chunk")
+
+    def test_streaming_save(self):
+        """Test that large documents are saved from the widget in chunks"""
+        print("Testing streaming save...")
+        box = self.notepad.message_box
+        content = "\n".join(f"Line {i+1} ünïcödé" for i in range(10000))
+        box.insert("1.0", content)
+        self.assertEqual(file.text_length(box), len(content))
+        for lines_per_chunk in [1, 7, 4096, 20000]:
+            chunks = list(file.iter_text_chunks(box, lines_per_chunk=lines_per_chunk))
+            self.assertEqual("".join(chunks), content)
+        print("✓ Chunks add up to the full document")
+
+        test_file = self.generate_test_file_path(suffix=".txt")
+        self.notepad.current_file[0] = test_file
+        self.notepad.document.encoding, self.notepad.document.newline = 'utf-16', '\r\n'
+        saved_limit = file.STREAM_SAVE_LIMIT
+        file.STREAM_SAVE_LIMIT = 1000
+        try:
+            results = []
+            self.assertTrue(file.save_file(box, self.notepad.current_file, writer=self.notepad.writer,
+                                           callback=lambda *result: results.append(result),
+                                           document=self.notepad.document))
+            # Written on the spot, without going through the writer thread
+            self.assertEqual(len(results), 1)
+            self.assertIsNone(results[0][1])
+            self.assertEqual(self.notepad.writer.writes_performed, 0)
+        finally:
+            file.STREAM_SAVE_LIMIT = saved_limit
+        with open(test_file, 'rb') as f:
+            self.assertEqual(f.read(), content.replace("\n", "\r\n").encode('utf-16'))
+        print("✓ Streamed save kept UTF-16 and CRLF line endings")
+
+    def test_follow_mode(self):
+        """Test that follow mode appends only what the file gained"""
+        print("Testing follow mode...")
+        test_file = self.generate_test_file_path(suffix=".log")
+        with open(test_file, 'w', encoding='utf-8', newline='') as f:
+            f.write("".join(f"entry {i}\n" for i in range(10)))
+        self.assertTrue(self.notepad.open_file(test_file))
+        self.assertTrue(self.notepad.start_follow(max_lines=20))
+        self.assertTrue(self.notepad.is_read_only())
+
+        with open(test_file, 'a', encoding='utf-8', newline='') as f:
+            f.write("".join(f"entry {i}\n" for i in range(10, 30)))
+        self.notepad._poll_follow()
+        box = self.notepad.message_box
+        lines = box.get("1.0", "end-1c").split("\n")
+        self.assertEqual(lines[-2], "entry 29")
+        self.assertLessEqual(len(lines), 20)
+        print("✓ Appended lines shown, oldest dropped past the cap")
+
+        self.notepad.save_file()
+        self.assertTrue(self.notepad.writer.flush(timeout=5))
+        with open(test_file, 'r', encoding='utf-8') as f:
+            self.assertEqual(len(f.readlines()), 30)
+        print("✓ Followed file is never saved over")
+
+        self.notepad.stop_follow()
+        self.assertFalse(self.notepad.is_read_only())
+        self.assertEqual(box.cget("state"), tk.NORMAL)
+        print("✓ Editor editable again after following")
+
+    def test_binary_file_hex_view(self):
+        """Test that binary files open in the read-only hex view"""
+        print("Testing hex view...")
+        test_file = self.generate_test_file_path(suffix=".bin")
+        with open(test_file, 'wb') as f:
+            f.write(bytes(range(256)) * 64)
+        self.assertTrue(self.notepad.open_file(test_file))
+        self.assertIsInstance(self.notepad.viewer, hexview.HexView)
+        self.assertTrue(self.notepad.is_read_only())
+        box = self.notepad.message_box
+        self.assertEqual(box.get("1.0", "1.end"), hexview.format_row(0, bytes(range(16))))
+        self.assertLessEqual(int(box.index("end-1c").split(".")[0]), hexview.WINDOW_ROWS)
+        print("✓ Binary file shown as hex rows")
+
+        self.notepad.new_file()
+        self.assertEqual(box.cget("wrap"), tk.WORD)
+        print("✓ Editor settings restored after the hex view")
+
+        # A compressed binary file shows the decompressed bytes it was judged by
+        gz_file = test_file + ".gz"
+        with gzip.open(gz_file, 'wb') as f:
+            f.write(bytes(range(256)) * 64)
+        self.assertTrue(self.notepad.open_file(gz_file))
+        while self.notepad.decompressor is not None:
+            self.root.update()
+        self.assertIsInstance(self.notepad.viewer, hexview.HexView)
+        self.assertEqual(self.notepad.current_file[0], gz_file)
+        self.assertEqual(box.get("1.0", "1.end"), hexview.format_row(0, bytes(range(16))))
+        temp_path = self.notepad._viewer_temp
+        self.notepad.new_file()
+        self.assertFalse(os.path.exists(temp_path))
+        print("✓ Compressed binary file shown decompressed, copy removed afterwards")
+
+    def test_large_file_viewer(self):
+        """Test that files past the threshold open in the read-only paged viewer"""
+        print("Testing large file viewer...")
+        test_file = self.generate_test_file_path(suffix=".log")
+        lines = 50000
+        with open(test_file, 'w', encoding='utf-8', newline='') as f:
+            f.write("\n".join(f"Line {i+1}" for i in range(lines)))
+        saved = (viewer.LARGE_FILE_THRESHOLD, viewer.WINDOW_LINES)
+        viewer.LARGE_FILE_THRESHOLD, viewer.WINDOW_LINES = 1024, 200
+        try:
+            self.assertTrue(self.notepad.open_file(test_file))
+            self.assertTrue(self.notepad.is_read_only())
+            self.assertEqual(self.notepad.current_file[0], test_file)
+            box = self.notepad.message_box
+            self.assertEqual(box.get("1.0", "1.end"), "Line 1")
+            self.assertLessEqual(int(box.index("end-1c").split(".")[0]), 200)
+            self.assertEqual(box.cget("state"), tk.DISABLED)
+            print("✓ Only a window of the file is loaded")
+
+            # Dragging the scrollbar to the middle pages in the middle of the file
+            view = self.notepad.viewer
+            view._on_scrollbar("moveto", "0.5")
+            top = view.line_start(view.size // 2)
+            self.assertLessEqual(view.window_start, top)
+            self.assertLess(top, view.window_end)
+            with open(test_file, 'rb') as f:
+                lines_before = f.read(top).count(b"\n")
+            expected = f"Line {lines_before + 1}"
+            self.assertIn(expected, box.get("1.0", "end-1c").split("\n"))
+            print(f"✓ Scrolling to 50% shows {expected}")
+
+            # Goto-line uses the line index built in the background
+            while self.notepad.index_builder is not None:
+                self.root.update()
+            self.assertEqual(view.line_index.line_count(), lines)
+            self.notepad.goto_line(line=40000)
+            self.assertEqual(view.current_line(), 40000)
+            self.assertIn("Line: 40000 of 50000", self.notepad.status_bar.cget("text"))
+            print("✓ Goto-line jumped to line 40000")
+
+            # Saving the partial view would truncate the file
+            self.notepad.save_file()
+            self.assertTrue(self.notepad.writer.flush(timeout=5))
+            self.assertEqual(os.path.getsize(test_file), view.size)
+            print("✓ Save refused in the read-only view")
+
+            self.notepad.new_file()
+            self.assertFalse(self.notepad.is_read_only())
+            self.assertEqual(box.cget("state"), tk.NORMAL)
+            print("✓ Editor editable again after leaving the viewer")
+
+            # A compressed file is decompressed in the background, the editor stays read-only
+            gz_file = test_file + ".gz"
+            with open(test_file, 'rb') as src, gzip.open(gz_file, 'wb') as dst:
+                dst.write(src.read())
+            self.assertTrue(self.notepad.open_file(gz_file))
+            self.assertTrue(self.notepad.is_read_only())
+            while self.notepad.decompressor is not None:
+                self.root.update()
+            self.assertIsNotNone(self.notepad.viewer)
+            self.assertEqual(self.notepad.current_file[0], gz_file)
+            self.assertEqual(box.get("1.0", "1.end"), "Line 1")
+            self.assertEqual(self.notepad.document.compression, 'gzip')
+            print("✓ Compressed file decompressed in the background into the viewer")
+
+            self.notepad.new_file()
+            self.notepad.open_file(gz_file)
+            self.notepad.cancel_loading()
+            self.assertIsNone(self.notepad.decompressor)
+            self.assertIsNone(self.notepad.current_file[0])
+            self.assertFalse(self.notepad.is_read_only())
+            self.assertIn("cancelled", self.notepad.status_bar.cget("text"))
+            os.remove(gz_file)
+            print("✓ Escape cancelled the decompression")
+        finally:
+            viewer.LARGE_FILE_THRESHOLD, viewer.WINDOW_LINES = saved
+            self.notepad.close_viewer()
+
     def test_special_content(self):
         """Test handling of special content types"""
         print("Testing special content handling...")
@@ -207,5 +949,1046 @@ class TestNotepad(unittest.TestCase):
                 if os.path.exists(test_file):
                     os.remove(test_file)
 
+class TestBackgroundWriter(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="notepad_writer_test_")
+        self.path = os.path.join(self.test_dir, "queued.txt")
+
+    def tearDown(self):
+        for name in os.listdir(self.test_dir):
+            os.remove(os.path.join(self.test_dir, name))
+        os.rmdir(self.test_dir)
+
+    def test_burst_of_saves_is_coalesced(self):
+        """Test that only the newest pending snapshot per path is written"""
+        print("Testing coalescing save queue...")
+        release = threading.Event()
+        written = []
+
+        def slow_write(path, content, **options):
+            release.wait(5)
+            written.append(content)
+            return saver.atomic_write(path, content, **options)
+
+        writer = saver.BackgroundWriter(write_func=slow_write)
+        results = []
+        writer.submit(self.path, "first", lambda path, error, latency: results.append(error))
+        # Wait for the thread to pick up the first snapshot, then queue a burst
+        while not writer._busy:
+            threading.Event().wait(0.01)
+        for i in range(10):
+            writer.submit(self.path, f"burst {i}", lambda path, error, latency: results.append(error))
+        release.set()
+        self.assertTrue(writer.flush(timeout=5))
+        writer.close()
+
+        self.assertEqual(written, ["first", "burst 9"])
+        self.assertEqual(writer.writes_coalesced, 9)
+        self.assertEqual(results, [None, None])
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), "burst 9")
+        print("✓ Burst of saves coalesced into one write")
+
+    def test_errors_are_reported_to_callback(self):
+        """Test that a failed write reaches the callback from poll()"""
+        print("Testing save error reporting...")
+        writer = saver.BackgroundWriter()
+        errors = []
+        bad_path = os.path.join(self.test_dir, "missing", "file.txt")
+        writer.submit(bad_path, "data", lambda path, error, latency: errors.append(error))
+        writer.close()
+        self.assertEqual(len(errors), 1)
+        self.assertIsInstance(errors[0], OSError)
+        print("✓ Save error delivered to callback")
+
+    def test_atomic_write_replaces_file(self):
+        """Test atomic saves under every fsync policy"""
+        print("Testing atomic save pipeline...")
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write("old content")
+        os.chmod(self.path, 0o640)
+        for policy in saver.FSYNC_POLICIES:
+            with self.subTest(policy=policy):
+                latency = saver.atomic_write(self.path, f"saved with {policy}", fsync=policy)
+                self.assertGreaterEqual(latency, 0)
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self.assertEqual(f.read(), f"saved with {policy}")
+                if os.name != 'nt':
+                    self.assertEqual(os.stat(self.path).st_mode & 0o777, 0o640)
+                # No temp files are left behind
+                self.assertEqual(os.listdir(self.test_dir), ["queued.txt"])
+                print(f"✓ Atomic save with fsync={policy} passed")
+
+    def test_failed_write_keeps_original(self):
+        """Test that a failing save leaves the original file untouched"""
+        print("Testing crash-safe save...")
+        with open(self.path, 'w', encoding='utf-8') as f:
+            f.write("precious")
+        with self.assertRaises(UnicodeEncodeError):
+            saver.atomic_write(self.path, "caf\u00e9", encoding='ascii')
+        with open(self.path, 'r', encoding='utf-8') as f:
+            self.assertEqual(f.read(), "precious")
+        self.assertEqual(os.listdir(self.test_dir), ["queued.txt"])
+        print("✓ Original file survived a failed save")
+
+class TestEditJournal(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="notepad_journal_test_")
+        self.doc_path = os.path.join(self.test_dir, "doc.txt")
+        with open(self.doc_path, 'w', encoding='utf-8') as f:
+            f.write("base")
+        self.saved_index = journal.RECOVERY_INDEX
+        journal.RECOVERY_INDEX = os.path.join(self.test_dir, "recovery_index")
+
+    def tearDown(self):
+        journal.RECOVERY_INDEX = self.saved_index
+        for name in os.listdir(self.test_dir):
+            os.remove(os.path.join(self.test_dir, name))
+        os.rmdir(self.test_dir)
+
+    def test_records_round_trip(self):
+        """Test that flushed records are found and parsed after a crash"""
+        print("Testing edit journal records...")
+        edit_journal = journal.EditJournal(self.doc_path)
+        edit_journal.record_insert("1.4", " text\nwith 你好")
+        edit_journal.record_delete("1.0", "1.2")
+        self.assertEqual(edit_journal.flush(), edit_journal.size())
+        edit_journal.record_insert("2.0", "lost in the crash")  # Never flushed
+
+        leftovers = journal.find_leftover_journals()
+        self.assertEqual(leftovers, [(self.doc_path, journal.swap_path_for(self.doc_path))])
+        header, records = journal.read_journal(leftovers[0][1])
+        self.assertTrue(journal.base_matches(self.doc_path, header))
+        self.assertEqual(records, [("insert", "1.4", " text\nwith 你好"), ("delete", "1.0", "1.2")])
+        print("✓ Journal records round-tripped")
+
+        # A record cut short by a crash is dropped, the earlier ones are kept
+        with open(leftovers[0][1], 'ab') as f:
+            f.write(b"I 3.0 100\npartial")
+        header, records = journal.read_journal(leftovers[0][1])
+        self.assertEqual(len(records), 2)
+        print("✓ Truncated record ignored")
+
+    def test_commit_trims_saved_records(self):
+        """Test that a committed checkpoint removes the records it covers"""
+        print("Testing journal checkpoints...")
+        edit_journal = journal.EditJournal(self.doc_path)
+        edit_journal.record_insert("1.0", "a")
+        edit_journal.flush()
+        token = edit_journal.checkpoint()
+        edit_journal.record_insert("1.1", "b")  # Made after the snapshot was taken
+        edit_journal.commit(token)
+        header, records = journal.read_journal(edit_journal.swap_path)
+        self.assertEqual(records, [("insert", "1.1", "b")])
+
+        edit_journal.commit(edit_journal.checkpoint())
+        self.assertFalse(edit_journal.has_records())
+        self.assertFalse(os.path.exists(edit_journal.swap_path))
+        self.assertEqual(journal.find_leftover_journals(), [])
+        print("✓ Swap file removed once every edit is saved")
+
+class TestAutoSaveScheduler(unittest.TestCase):
+    def setUp(self):
+        self.now = 100.0
+        self.scheduler = autosave.AutoSaveScheduler(clock=lambda: self.now)
+
+    def test_debounces_on_typing(self):
+        """Test that saving waits for keyboard idle time"""
+        print("Testing auto-save debounce...")
+        self.assertFalse(self.scheduler.should_save())
+        self.scheduler.note_dirty()
+        self.scheduler.note_activity()
+        self.now += 1.0
+        self.scheduler.note_activity()
+        self.now += 0.5
+        self.assertFalse(self.scheduler.should_save())
+        self.now += 0.3
+        self.assertTrue(self.scheduler.should_save())
+        print("✓ Save deferred until typing paused")
+
+    def test_staleness_bound_during_long_burst(self):
+        """Test that changes are saved during non-stop typing once they are too old"""
+        print("Testing auto-save staleness bound...")
+        self.scheduler.note_dirty()
+        for _ in range(int(self.scheduler.max_staleness / 0.1) - 1):
+            self.now += 0.1
+            self.scheduler.note_activity()
+            self.assertFalse(self.scheduler.should_save())
+        self.now += 0.2
+        self.assertTrue(self.scheduler.should_save())
+        print("✓ Save forced by the staleness bound")
+
+    def test_backs_off_on_cost_and_size(self):
+        """Test that the interval grows with save cost and document size"""
+        print("Testing auto-save back-off...")
+        self.assertEqual(self.scheduler.effective_interval(), self.scheduler.min_interval)
+        self.scheduler.note_saved(0.25, 1000)
+        self.assertAlmostEqual(self.scheduler.effective_interval(), 0.25 * self.scheduler.cost_factor)
+        self.scheduler.note_saved(0.01, 64 * 1024 * 1024)
+        self.assertAlmostEqual(self.scheduler.effective_interval(), 16.0)
+        self.scheduler.configure(max_interval=8.0)
+        self.assertEqual(self.scheduler.effective_interval(), 8.0)
+        self.assertEqual(self.scheduler.status()["interval"], 8.0)
+        print("✓ Interval backs off and respects max_interval")
+
+    def test_write_latency_counts_for_its_save_only(self):
+        """Test that a write's latency backs off the next save and is replaced by the following one"""
+        print("Testing auto-save write latency...")
+        self.scheduler.note_saved(0.001, 1000)
+        self.scheduler.note_write_latency(0.5)
+        self.assertAlmostEqual(self.scheduler.effective_interval(), 0.5 * self.scheduler.cost_factor)
+        self.scheduler.note_saved(0.001, 1000)
+        self.assertEqual(self.scheduler.effective_interval(), self.scheduler.min_interval)
+        print("✓ Write latency only counts for the save that queued it")
+
+class TestDocumentLoading(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="notepad_document_test_")
+        self.path = os.path.join(self.test_dir, "doc.txt")
+
+    def tearDown(self):
+        for name in os.listdir(self.test_dir):
+            os.remove(os.path.join(self.test_dir, name))
+        os.rmdir(self.test_dir)
+
+    def test_encoding_detection(self):
+        """Test BOM and fallback encoding detection"""
+        print("Testing encoding detection...")
+        cases = [
+            ("utf-8", "Unicode: 你好, Привет".encode('utf-8'), 'utf-8'),
+            ("utf-8 bom", codecs.BOM_UTF8 + "café".encode('utf-8'), 'utf-8-sig'),
+            ("utf-16 le bom", codecs.BOM_UTF16_LE + "Привет".encode('utf-16-le'), 'utf-16-le'),
+            ("utf-16 be bom", codecs.BOM_UTF16_BE + "Привет".encode('utf-16-be'), 'utf-16-be'),
+            ("utf-32 le bom", codecs.BOM_UTF32_LE + "Привет".encode('utf-32-le'), 'utf-32-le'),
+            ("utf-32 be bom", codecs.BOM_UTF32_BE + "Привет".encode('utf-32-be'), 'utf-32-be'),
+            ("latin-1", "café".encode('latin-1'), 'latin-1'),
+        ]
+        for name, data, expected in cases:
+            with self.subTest(case=name):
+                text, encoding = document.decode_bytes(data)
+                self.assertEqual(encoding, expected)
+                self.assertEqual(text, data[len(document.encoding_bom(expected)):].decode(expected))
+                print(f"✓ {name} detected as {encoding}")
+
+        self.assertNotIn("\ufeff", document.decode_bytes(codecs.BOM_UTF16_BE + "x".encode('utf-16-be'))[0])
+        print("✓ Byte order marks not decoded as text")
+
+        # Invalid UTF-8 past the probed prefix still falls back
+        data = b"a" * 100 + "café".encode('latin-1')
+        self.assertEqual(document.decode_bytes(data, probe_size=10)[1], 'latin-1')
+        print("✓ Late decoding error falls back to the next encoding")
+
+    def test_round_trip_encoding_and_newlines(self):
+        """Test that a document is saved back in its encoding and line endings"""
+        print("Testing encoding and line-ending round trip...")
+        boms = {'utf-16-le': codecs.BOM_UTF16_LE, 'utf-16-be': codecs.BOM_UTF16_BE, 'utf-32-be': codecs.BOM_UTF32_BE}
+        for encoding in ['utf-8', 'utf-16-le', 'utf-16-be', 'utf-32-be', 'latin-1']:
+            for newline in ['\n', '\r\n', '\r']:
+                with self.subTest(encoding=encoding, newline=newline):
+                    original = boms.get(encoding, b"") + newline.join(["first line", "café", "last"]).encode(encoding)
+                    with open(self.path, 'wb') as f:
+                        f.write(original)
+                    info = document.DocumentInfo()
+                    text = document.read_document(self.path, info)
+                    self.assertEqual(text, "first line\ncafé\nlast")
+                    self.assertEqual((info.encoding, info.newline), (encoding, newline))
+
+                    saver.atomic_write(self.path, text, encoding=info.encoding, newline=info.newline)
+                    with open(self.path, 'rb') as f:
+                        self.assertEqual(f.read(), original)
+        print("✓ Encoding and line endings round-tripped")
+
+    def test_compressed_round_trip(self):
+        """Test that gzip, bzip2 and xz files are opened and saved back compressed"""
+        print("Testing compressed files...")
+        text = "".join(f"log line {i} café\r\n" for i in range(20000))
+        for compression, module, extension in [('gzip', gzip, '.gz'), ('bz2', bz2, '.bz2'), ('xz', lzma, '.xz')]:
+            with self.subTest(compression=compression):
+                path = self.path + extension
+                with module.open(path, 'wb') as f:
+                    f.write(text.encode('utf-8'))
+                info = document.DocumentInfo()
+                content = document.read_document(path, info)
+                self.assertEqual(content, text.replace("\r\n", "\n"))
+                self.assertEqual((info.encoding, info.newline, info.compression), ('utf-8', '\r\n', compression))
+
+                saver.atomic_write(path, content + "appended\n", encoding=info.encoding,
+                                   newline=info.newline, compression=info.compression)
+                self.assertEqual(document.sniff_compression(path), compression)
+                with module.open(path, 'rb') as f:
+                    self.assertEqual(f.read(), (text + "appended\r\n").encode('utf-8'))
+
+                with self.assertRaises(document.DocumentTooLarge):
+                    document.read_document(path, max_size=64 * 1024)
+                os.remove(path)
+                print(f"✓ {compression} opened, saved back compressed")
+        self.assertEqual(document.compression_for_path("app.log.GZ"), 'gzip')
+        self.assertIsNone(document.compression_for_path("notes.txt"))
+
+    def test_mixed_newlines_and_chunks(self):
+        """Test that every line-ending style is normalized, also across decoded chunks"""
+        print("Testing mixed line endings...")
+        with open(self.path, 'wb') as f:
+            f.write(b"one\r\ntwo\nthree\rfour\r\n")
+        info = document.DocumentInfo()
+        self.assertEqual(document.read_document(self.path, info), "one\ntwo\nthree\nfour\n")
+        self.assertEqual(info.newline, "\r\n")
+        print("✓ CRLF, LF and CR all converted, the first style kept for saving")
+
+        # A CRLF pair split between two decompressed chunks stays one line break
+        path = self.path + ".gz"
+        with gzip.open(path, 'wb') as f:
+            f.write(b"abc\r\ndef\rghi\n")
+        pieces, encoding, newline, size = document.read_compressed(path, 'gzip', chunk_size=4)
+        self.assertGreater(len(pieces), 1)
+        self.assertEqual("".join(pieces), "abc\ndef\nghi\n")
+        self.assertEqual((encoding, newline, size), ('utf-8', '\r\n', 13))
+        self.assertEqual(document.read_document(path, chunked=True), ["abc\ndef\nghi\n"])
+        os.remove(path)
+        print("✓ Compressed text returned in chunks, split CRLF kept whole")
+
+    def test_background_decompression(self):
+        """Test that large compressed files are decompressed off the Tk thread, with progress and cancel"""
+        print("Testing background decompression...")
+        path = self.path + ".gz"
+        data = b"".join(b"line %d\n" % i for i in range(50000))
+        with gzip.open(path, 'wb') as f:
+            f.write(data)
+        self.assertEqual(document.decompressed_size_hint(path, 'gzip'), len(data))
+        self.assertEqual(document.decompressed_size_hint(path, 'bz2'), 0)
+        print("✓ Decompressed size read from the gzip trailer")
+
+        temp_dir = os.path.join(self.test_dir, "cache")
+        results = []
+        decompressor = document.Decompressor(path, 'gzip', lambda *result: results.append(result),
+                                             directory=temp_dir).start()
+        while not decompressor.poll():
+            time.sleep(0.01)
+        temp_path, error = results[0]
+        self.assertIsNone(error)
+        self.assertEqual(os.path.dirname(temp_path), temp_dir)
+        self.assertEqual(decompressor.fraction, 1.0)
+        with open(temp_path, 'rb') as f:
+            self.assertEqual(f.read(), data)
+        os.remove(temp_path)
+        print("✓ Decompressed into the cache directory")
+
+        cancel = threading.Event()
+        cancel.set()
+        with self.assertRaises(document.DecompressCancelled):
+            document.decompress_to_temp(path, 'gzip', chunk_size=1024, cancel_event=cancel, directory=temp_dir)
+        self.assertEqual(os.listdir(temp_dir), [])
+        os.rmdir(temp_dir)
+        print("✓ Cancelled decompression leaves no temporary file")
+
+    def test_binary_detection(self):
+        """Test that binary files are told apart from text before decoding"""
+        print("Testing binary detection...")
+        self.assertFalse(document.is_binary(b""))
+        self.assertFalse(document.is_binary("plain text\twith tabs\r\n".encode('utf-8')))
+        self.assertFalse(document.is_binary("UTF-16 text".encode('utf-16')))
+        self.assertFalse(document.is_binary(b"\x1b[31mcolored log\x1b[0m\n"))
+        self.assertTrue(document.is_binary(b"\x7fELF\x02\x01\x01\x00\x00"))
+        self.assertTrue(document.is_binary(bytes(range(1, 32)) * 4))
+        with gzip.open(self.path, 'wb') as f:
+            f.write(b"compressed text\n" * 100)
+        self.assertFalse(document.sniff_binary(self.path))
+        print("✓ Text, UTF-16, ANSI colors and compressed text are not binary")
+
+        row = hexview.format_row(0x10, b"Hello\x00\x01World!\xff\n\t")
+        self.assertEqual(row, "00000010  48 65 6c 6c 6f 00 01 57  6f 72 6c 64 21 ff 0a 09  |Hello..World!...|")
+        print("✓ Hex row formatted")
+
+    def test_chunked_write(self):
+        """Test that writing in chunks gives the same bytes as a single write"""
+        print("Testing chunked write...")
+        text = "first line\ncafé\n" * 1000
+        for encoding in ['utf-8', 'utf-8-sig', 'utf-16', 'latin-1']:
+            with self.subTest(encoding=encoding):
+                chunks = saver.split_text(text, chunk_size=7)
+                saver.atomic_write_chunks(self.path, chunks, encoding=encoding, newline='\r\n')
+                with open(self.path, 'rb') as f:
+                    self.assertEqual(f.read(), text.replace("\n", "\r\n").encode(encoding))
+        print("✓ Byte order mark written once, line endings translated")
+
+class TestLineIndex(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="notepad_lineindex_test_")
+        self.path = os.path.join(self.test_dir, "big.log")
+        self.saved_cache_dir = lineindex.CACHE_DIR
+        lineindex.CACHE_DIR = os.path.join(self.test_dir, "cache")
+
+    def tearDown(self):
+        lineindex.CACHE_DIR = self.saved_cache_dir
+        for root, dirs, files in os.walk(self.test_dir, topdown=False):
+            for name in files:
+                os.remove(os.path.join(root, name))
+            for name in dirs:
+                os.rmdir(os.path.join(root, name))
+        os.rmdir(self.test_dir)
+
+    def test_offsets_across_chunks(self):
+        """Test that line offsets are exact whatever the chunk boundaries"""
+        print("Testing line index offsets...")
+        cases = {
+            "lf": b"".join(b"Line %d\n" % i for i in range(5000)),
+            "crlf, no final newline": b"\r\n".join(b"Line %d" % i for i in range(5000)),
+            "empty lines": b"\n\n\nx\n\n",
+            "empty file": b"",
+        }
+        for name, data in cases.items():
+            with open(self.path, 'wb') as f:
+                f.write(data)
+            expected = [0] + [i + 1 for i, byte in enumerate(data) if byte == 10]
+            for chunk_size in [1, 7, 4096, lineindex.CHUNK_SIZE]:
+                with self.subTest(case=name, chunk_size=chunk_size):
+                    index = lineindex.build(self.path, chunk_size=chunk_size)
+                    self.assertEqual(list(index.offsets), expected)
+            self.assertEqual(index.line_count(), data.count(b"\n") + 1)
+            print(f"✓ {name}: {index.line_count()} lines")
+
+        with open(self.path, 'wb') as f:
+            f.write(b"first\nsecond\nthird")
+        index = lineindex.build(self.path)
+        self.assertEqual(index.offset(2), 6)
+        self.assertEqual(index.offset(99), 13)  # Clamped to the last line
+        self.assertEqual(index.line_at(8), 2)
+        print("✓ Line and offset lookups")
+
+    def test_cache_keyed_by_size_and_mtime(self):
+        """Test that a cached index is reused until the file changes"""
+        print("Testing line index cache...")
+        with open(self.path, 'wb') as f:
+            f.write(b"".join(b"Line %d\n" % i for i in range(1000)))
+        self.assertIsNone(lineindex.load_cached(self.path))
+        lineindex.save_cached(lineindex.build(self.path))
+        cached = lineindex.load_cached(self.path)
+        self.assertIsNotNone(cached)
+        self.assertEqual(cached.line_count(), 1001)
+        print("✓ Index loaded from the cache")
+
+        with open(self.path, 'ab') as f:
+            f.write(b"one more\n")
+        self.assertIsNone(lineindex.load_cached(self.path))
+        self.assertEqual(lineindex.get_index(self.path).line_count(), 1002)
+        print("✓ Cache ignored once the file changed")
+
+
+class TestQuickOpen(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="notepad_quickopen_test_")
+        self.root_dir = os.path.join(self.test_dir, "project")
+        self.saved_cache_dir = quickopen.CACHE_DIR
+        quickopen.CACHE_DIR = os.path.join(self.test_dir, "cache")
+        files = ["main.py", "README.md", "src/domain.py", "src/main_window.py",
+                 "src/ui/menu_bar.py", "docs/manual.txt", "scripts.rc", ".git/HEAD"]
+        for name in files:
+            path = os.path.join(self.root_dir, *name.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as f:
+                f.write(name)
+        self.settle()
+
+    def tearDown(self):
+        quickopen.CACHE_DIR = self.saved_cache_dir
+        for root, dirs, files in os.walk(self.test_dir, topdown=False):
+            for name in files:
+                os.remove(os.path.join(root, name))
+            for name in dirs:
+                os.rmdir(os.path.join(root, name))
+        os.rmdir(self.test_dir)
+
+    def settle(self):
+        """Backdate every directory, recently modified ones are never trusted"""
+        for root, dirs, files in os.walk(self.root_dir):
+            os.utime(root, (1_000_000_000, 1_000_000_000))
+
+    def test_fuzzy_ranking(self):
+        """Test that file name matches rank above scattered path matches"""
+        print("Testing quick open ranking...")
+        index = quickopen.walk(self.root_dir)
+        self.assertEqual(len(index), 7)
+        self.assertNotIn(".git/HEAD", index.paths)
+        print("✓ Hidden directories skipped")
+
+        self.assertEqual(index.search("main"), ["main.py", "src/main_window.py", "src/domain.py"])
+        self.assertEqual(index.search("MNW")[0], "src/main_window.py")
+        self.assertEqual(index.search("src/ui"), ["src/ui/menu_bar.py"])
+        self.assertEqual(index.search("src\\ui"), ["src/ui/menu_bar.py"])
+        self.assertEqual(index.search("src"), ["src/domain.py", "src/main_window.py",
+                                               "src/ui/menu_bar.py", "scripts.rc"])
+        self.assertEqual(index.search("zzz"), [])
+        self.assertEqual(index.absolute("src/domain.py"), os.path.join(self.root_dir, "src", "domain.py"))
+        print("✓ Prefix, substring and subsequence matches ranked in that order")
+
+    def test_narrowing_and_search_thread(self):
+        """Test that extended queries search the previous matches and stale queries are dropped"""
+        print("Testing quick open narrowing...")
+        index = quickopen.walk(self.root_dir)
+        results, candidates = index.find("m")
+        self.assertEqual(len(candidates), 6)
+        for query in ["ma", "mai", "main", "mainw"]:
+            results, candidates = index.find(query, within=candidates)
+            self.assertEqual(results, index.search(query))
+        self.assertEqual(candidates.lines, [index.paths.index("src/main_window.py")])
+        self.assertFalse(candidates.covers(index, "menu"))
+        self.assertEqual(index.search("menu", within=candidates), ["src/ui/menu_bar.py"])
+        print("✓ Extended query searched only the previous matches")
+
+        delivered = []
+        searcher = quickopen.PathSearcher(lambda results, elapsed, error: delivered.append(results))
+        try:
+            for query in ["m", "ma", "mai", "main"]:
+                searcher.submit(index, query)
+            self.assertTrue(searcher.wait(5))
+            searcher.poll()
+            self.assertEqual(delivered, [["main.py", "src/main_window.py", "src/domain.py"]])
+            self.assertFalse(searcher.pending())
+        finally:
+            searcher.close()
+        print("✓ Only the newest query's results delivered")
+
+    def test_incremental_update_and_cache(self):
+        """Test that only changed directories are listed again"""
+        print("Testing path index updates...")
+        index = quickopen.walk(self.root_dir)
+        self.assertEqual(index.dirs_listed, 4)
+        self.assertEqual(quickopen.walk(self.root_dir, index).dirs_listed, 0)
+        print("✓ Unchanged tree reused without listing")
+
+        with open(os.path.join(self.root_dir, "docs", "new_notes.txt"), 'w') as f:
+            f.write("new")
+        os.utime(os.path.join(self.root_dir, "docs"), (1_500_000_000, 1_500_000_000))
+        updated = quickopen.walk(self.root_dir, index)
+        self.assertEqual(updated.dirs_listed, 1)
+        self.assertEqual(updated.search("new_notes"), ["docs/new_notes.txt"])
+        print("✓ Changed directory listed again")
+
+        quickopen.save_cached(updated)
+        cached = quickopen.load_cached(self.root_dir)
+        self.assertEqual(sorted(cached.paths), sorted(updated.paths))
+        self.assertEqual(quickopen.walk(self.root_dir, cached).dirs_listed, 0)
+        print("✓ Index restored from the disk cache")
+
+        results = []
+        builder = quickopen.PathIndexBuilder(self.root_dir, lambda index, error: results.append(index)).start()
+        builder._thread.join(10)
+        builder.poll()
+        self.assertEqual([index.dirs_listed for index in results], [0, 0])
+        print("✓ Builder delivers the cached index, then the updated one")
+
+
+class TestFindInFiles(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="notepad_findfiles_test_")
+        files = {
+            "app.conf": "host = alpha\nport = 8080\r\nhost = beta\n".encode('utf-8'),
+            "logs/server.log": "started\nERROR disk full\nerror retrying\n".encode('utf-8'),
+            "logs/latin.log": "caf\xe9 error\n".encode('latin-1'),
+            "image.bin": b"\x00\x01error\x02",
+            ".git/config": b"error in hidden dir\n",
+        }
+        for name, data in files.items():
+            path = os.path.join(self.test_dir, *name.split("/"))
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'wb') as f:
+                f.write(data)
+
+    def tearDown(self):
+        for root, dirs, files in os.walk(self.test_dir, topdown=False):
+            for name in files:
+                os.remove(os.path.join(root, name))
+            for name in dirs:
+                os.rmdir(os.path.join(root, name))
+        os.rmdir(self.test_dir)
+
+    def test_search_file(self):
+        """Test matching lines, encodings and skipped files"""
+        print("Testing single file search...")
+        conf = os.path.join(self.test_dir, "app.conf")
+        hits = findfiles.search_file(conf, "host")
+        self.assertEqual([(hit.line, hit.column, hit.text) for hit in hits],
+                         [(1, 1, "host = alpha"), (3, 1, "host = beta")])
+        self.assertEqual([hit.line for hit in findfiles.search_file(conf, r"\d{4}$", regex=True)], [2])
+        self.assertEqual(findfiles.search_file(conf, "HOST", match_case=True), [])
+        print("✓ Literal, regex and case-sensitive matches")
+
+        latin = findfiles.search_file(os.path.join(self.test_dir, "logs", "latin.log"), "café")
+        self.assertEqual(latin[0].text, "café error")
+        self.assertIsNone(findfiles.search_file(os.path.join(self.test_dir, "image.bin"), "error"))
+        self.assertIsNone(findfiles.search_file(conf, "host", max_size=10))
+        print("✓ Detected encoding used, binary and oversized files skipped")
+
+    def test_search_streams_and_cancels(self):
+        """Test a search across the tree on worker processes"""
+        print("Testing find in files...")
+        search = findfiles.FileSearch(self.test_dir, "error", max_workers=2, batch_files=1).start()
+        hits = []
+        deadline = time.time() + 60
+        while not search.finished and time.time() < deadline:
+            hits.extend(search.poll())
+            time.sleep(0.02)
+        found = sorted((os.path.relpath(hit.path, self.test_dir), hit.line) for hit in hits)
+        self.assertEqual(found, [(os.path.join("logs", "latin.log"), 1),
+                                 (os.path.join("logs", "server.log"), 2),
+                                 (os.path.join("logs", "server.log"), 3)])
+        self.assertEqual((search.files_searched, search.files_skipped), (3, 1))
+        print("✓ Hits streamed back, binary file and hidden directory skipped")
+
+        with self.assertRaises(re.error):
+            findfiles.FileSearch(self.test_dir, "(", regex=True)
+        search = findfiles.FileSearch(self.test_dir, "error", max_workers=1, batch_files=1).start()
+        search.cancel()
+        deadline = time.time() + 60
+        while not search.finished and time.time() < deadline:
+            self.assertEqual(search.poll(), [])
+            time.sleep(0.02)
+        self.assertTrue(search.finished and search.cancelled)
+        print("✓ Cancelled search finishes without more hits")
+
+class TestFindReplace(unittest.TestCase):
+    def test_match_helpers(self):
+        """Test offsets to widget indices and forward/backward matching"""
+        print("Testing find helpers...")
+        text = "one two\ntwo three\n"
+        self.assertEqual(findbar.line_col(text, 0), "1.0")
+        self.assertEqual(findbar.line_col(text, 12), "2.4")
+        self.assertEqual(findbar.line_col(text, 12, first_line=40), "41.4")
+        self.assertEqual(findbar.line_col("x\n😀ab", 4), f"2.{textwatch.tk_length('😀a')}")
+        pattern = findfiles.compile_query("two", False, False)
+        self.assertEqual(findbar.first_match(pattern, text, 5).start(), 8)
+        self.assertIsNone(findbar.first_match(pattern, text, 9, 12))
+        self.assertEqual(findbar.last_match(pattern, text).start(), 8)
+        self.assertEqual(findbar.last_match(pattern, text, 8).start(), 4)
+        self.assertIsNone(findbar.first_match(findfiles.compile_query("x*", True, False), text))
+        print("✓ Indices, first and last matches, empty matches ignored")
+
+    def test_replace_span(self):
+        """Test that replace all rewrites only the span between the matches"""
+        print("Testing replace span...")
+        pattern = findfiles.compile_query("cat", False, False)
+        self.assertEqual(findbar.replace_span(pattern, "a Cat and a cat!", r"d\g"),
+                         (2, 15, r"d\g and a d\g", [(0, "Cat", r"d\g"), (10, "cat", r"d\g")]))
+        self.assertIsNone(findbar.replace_span(pattern, "no match", "dog"))
+        pattern = findfiles.compile_query(r"^(\w+)=(\w+)$", True, True)
+        self.assertEqual(findbar.replace_span(pattern, "# c\na=1\nb=2\n", r"\2=\1", regex=True),
+                         (4, 11, "1=a\n2=b", [(0, "a=1", "1=a"), (4, "b=2", "2=b")]))
+        print("✓ Literal and group replacements, anchors see the whole text")
+
+        # Offsets of the undo record are in Tk index units
+        text = "x cat 😀 cat"
+        start, end, new_text, replacements = findbar.replace_span(findfiles.compile_query("cat", False, False),
+                                                                  text, "dog")
+        width = textwatch.tk_length("😀")
+        self.assertEqual(findbar.tk_replacements(text, start, replacements),
+                         [(0, "cat", "dog"), (5 + width, "cat", "dog")])
+        print("✓ Replacement offsets converted to Tk units")
+
+class TestTextStats(unittest.TestCase):
+    def test_incremental_counts(self):
+        """Test that edits keep the counts equal to a full recount"""
+        print("Testing incremental document counts...")
+        stats = textstats.TextStats()
+        stats.begin()
+        stats.add("alpha beta\n", 2)
+        stats.add("gamma", 3)
+        stats.finish()
+        self.assertEqual((stats.lines, stats.words, stats.chars), (2, 3, 16))
+
+        # Typing "x" inside "beta" leaves the word count, a space splits it
+        stats.edit("insert", 1, 1, "x", "e", "t")
+        self.assertEqual((stats.lines, stats.words, stats.chars), (2, 3, 17))
+        stats.edit("insert", 1, 1, " \n", "e", "x")
+        self.assertEqual((stats.lines, stats.words, stats.chars), (3, 4, 19))
+        print("✓ Inserts counted from the neighbouring characters")
+
+        # Joining the lines again merges "be" and "xta"
+        stats.edit("delete", 1, 2, " \n", "e", "x")
+        self.assertEqual((stats.lines, stats.words, stats.chars), (2, 3, 17))
+        stats.edit("delete", 1, 2, "alpha bexta\n", "", "g")
+        self.assertEqual((stats.lines, stats.words, stats.chars), (1, 1, 5))
+        print("✓ Deletes counted from the deleted text")
+
+    def test_edits_during_recount(self):
+        """Test edits made while a replaced document is still being counted"""
+        print("Testing edits during a recount...")
+        stats = textstats.TextStats()
+        stats.begin(generation=4)
+        stats.add("one two\n", 2)
+        self.assertEqual(stats.describe(), "counting words...")
+
+        # Counted line: applied and the recount moves down, uncounted line: left to the recount
+        stats.edit("insert", 1, 1, "\nsix", "o", "\n")
+        self.assertEqual(stats.next_line, 3)
+        stats.edit("insert", 3, 3, "zero ", "\n", "t")
+        stats.add("zero three\n", 4)
+        stats.add("four", 5)
+        stats.finish()
+        self.assertEqual((stats.lines, stats.words, stats.chars), (4, 6, 27))
+        print("✓ Edits before the recount applied, edits after it left to it")
+
+        stats.begin(generation=5)
+        stats.add("one\n", 2)
+        stats.edit("delete", 1, 2, "e\nt", "n", "w")
+        self.assertEqual((stats.next_line, stats.words), (1, 0))
+        print("✓ An edit across the recount starts it over")
+
+class TestHighlighting(unittest.TestCase):
+    def tokens(self, lexer, line, state=None):
+        tokens, state = lexer.tokenize_line(line, state)
+        return [(line[start:end], tag) for start, end, tag in tokens], state
+
+    def test_lexers(self):
+        """Test the Python, JSON, YAML and log lexers"""
+        print("Testing lexers...")
+        python = highlight.PythonLexer()
+        self.assertEqual(self.tokens(python, "def run(x=0x1F):  # go"),
+                         ([("def", "syntax_keyword"), ("run", "syntax_definition"),
+                           ("0x1F", "syntax_number"), ("# go", "syntax_comment")], None))
+        tokens, state = self.tokens(python, "doc = r'''start")
+        self.assertEqual(tokens[-1], ("r'''start", "syntax_string"))
+        self.assertEqual(self.tokens(python, "still in it", state)[0], [("still in it", "syntax_string")])
+        self.assertEqual(self.tokens(python, "end''' + None", state),
+                         ([("end'''", "syntax_string"), ("None", "syntax_constant")], None))
+        print("✓ Python tokens, triple quoted strings carried across lines")
+
+        self.assertEqual(self.tokens(highlight.JsonLexer(), '{"a": [1, true, "x"]}')[0],
+                         [('"a"', "syntax_key"), ("1", "syntax_number"),
+                          ("true", "syntax_constant"), ('"x"', "syntax_string")])
+        self.assertEqual(self.tokens(highlight.YamlLexer(), "- name: 'x' # note")[0],
+                         [("name", "syntax_key"), ("'x'", "syntax_string"), ("# note", "syntax_comment")])
+        self.assertEqual(self.tokens(highlight.LogLexer(), "2024-05-01 10:00:00 ERROR disk")[0],
+                         [("2024-05-01 10:00:00", "syntax_number"), ("ERROR", "syntax_error")])
+        self.assertEqual(highlight.lexer_for("logs/app.LOG.gz").name, "Log")
+        self.assertIsNone(highlight.lexer_for("notes.txt"))
+        print("✓ JSON, YAML and log tokens, lexers picked by extension")
+
+    def test_retokenizes_only_changed_lines(self):
+        """Test dirty-region retokenization on a 100k-line document and time it per keystroke"""
+        print("Testing incremental retokenization...")
+        lines = ["def f%d(x):" % i if i % 4 == 0 else "    return x + %d  # n" % i for i in range(100000)]
+        retokenizer = highlight.Retokenizer(highlight.PythonLexer(), len(lines))
+
+        def run():
+            tokenized = 0
+            while retokenizer.pending():
+                first, count = retokenizer.batch()
+                tokenized += len(retokenizer.tokenize(first, lines[first - 1:first - 1 + count]))
+            return tokenized
+
+        self.assertEqual(run(), 100000)
+
+        # Typing on a line only retokenizes it and checks the next state
+        started = time.perf_counter()
+        for keystroke in range(1000):
+            line = 50000 + keystroke
+            lines[line - 1] += "x"
+            retokenizer.edit(line, 0, 0)
+            self.assertEqual(run(), 1)
+        per_keystroke = (time.perf_counter() - started) * 1000 / 1000
+        print(f"✓ Typing retokenizes one line ({per_keystroke:.3f} ms per keystroke)")
+
+        # An opened string runs until it is closed, then the states match again
+        lines[9] = "s = '''"
+        retokenizer.edit(10, 0, 0)
+        self.assertEqual(run(), 100000 - 9)
+        lines[19] = "'''"
+        retokenizer.edit(20, 0, 0)
+        self.assertEqual(run(), 100000 - 19)
+        lines[1:1] = ["x = 1", "y = 2"]
+        retokenizer.edit(1, 0, 2)
+        self.assertEqual(run(), 3)
+        self.assertEqual(retokenizer.line_count, 100002)
+        print("✓ Retokenizing stops once the carried state converges")
+
+class TestUndoHistory(unittest.TestCase):
+    def test_coalescing(self):
+        """Test that typing, backspace and delete runs are merged into single entries"""
+        print("Testing undo coalescing...")
+        history = undo.UndoHistory()
+        for column, character in enumerate("ab cd"):
+            history.record("insert", f"1.{column}", character)
+            history.close()
+        self.assertEqual(history.pop_undo(), [["insert", "1.2", " cd"]])
+        self.assertEqual(history.pop_undo(), [["insert", "1.0", "ab"]])
+        self.assertIsNone(history.pop_undo())
+        self.assertEqual(history.pop_redo(), [["insert", "1.0", "ab"]])
+
+        # Backspaces then a delete somewhere else
+        history.record("delete", "1.1", "b")
+        history.close()
+        history.record("delete", "1.0", "a")
+        history.close()
+        history.record("delete", "2.0", "x")
+        self.assertFalse(history.can_redo())
+        self.assertEqual(history.pop_undo(), [["delete", "2.0", "x"]])
+        self.assertEqual(history.pop_undo(), [["delete", "1.0", "ab"]])
+        print("✓ Runs merged, redo cleared by a new edit")
+
+        # Records before close() share an entry, e.g. a paste over a selection
+        history.clear()
+        history.record("delete", "3.0", "old")
+        history.record("insert", "3.0", "new\ntext")
+        history.close()
+        history.record("insert", "4.4", "!")
+        self.assertEqual(len(history.pop_undo()), 1)
+        self.assertEqual(history.pop_undo(), [["delete", "3.0", "old"], ["insert", "3.0", "new\ntext"]])
+        print("✓ One command is one entry")
+
+        # Columns are Tk index units, an emoji may count as two
+        history.clear()
+        width = textwatch.tk_length("😀")
+        history.record("insert", "1.0", "😀")
+        history.close()
+        history.record("insert", f"1.{width}", "x")
+        history.close()
+        history.record("delete", f"1.{width}", "x")
+        history.close()
+        history.record("delete", "1.0", "😀")
+        self.assertEqual(history.pop_undo(), [["delete", "1.0", "😀x"]])
+        self.assertEqual(history.pop_undo(), [["insert", "1.0", "😀x"]])
+        print("✓ Runs after an emoji merged at its Tk width")
+
+    def test_memory_budget(self):
+        """Test that the oldest entries are evicted past the memory budget"""
+        print("Testing undo memory budget...")
+        history = undo.UndoHistory(max_bytes=10 * (undo.RECORD_OVERHEAD + 1000))
+        for line in range(1, 31):
+            history.record("insert", f"{line}.0", "x" * 999 + "\n")
+            history.close()
+        self.assertLessEqual(history.memory, history.max_bytes)
+        entries = []
+        while history.can_undo():
+            entries.append(history.pop_undo())
+        self.assertEqual([entry[0][1] for entry in entries], [f"{line}.0" for line in range(30, 20, -1)])
+        print("✓ Ten newest entries kept")
+
+        history.record("insert", "1.0", "y" * 20 * 1000)
+        self.assertFalse(history.can_undo())
+        self.assertEqual(history.memory, 0)
+        print("✓ An edit larger than the budget is not kept")
+
+        # A command larger than the budget is dropped whole, not its first records only
+        history = undo.UndoHistory(max_bytes=1000)
+        history.record("insert", "1.0", "old")
+        history.close()
+        history.record("delete", "1.0", "y" * 2000)
+        history.record("insert", "1.0", "z" * 10)
+        self.assertFalse(history.can_undo())
+        self.assertEqual(history.memory, 0)
+        history.close()
+        history.record("insert", "1.10", "!")
+        self.assertEqual(history.pop_undo(), [["insert", "1.10", "!"]])
+        print("✓ Oversized entry dropped with the rest of its records")
+
+        # Replace All records only its matches, never merged with typing
+        history = undo.UndoHistory()
+        history.record("replace", "1.0", [(0, "a", "b")])
+        history.record("insert", "1.1", "c")
+        self.assertEqual(history.memory, 2 * undo.RECORD_OVERHEAD + 3)
+        self.assertEqual(len(history.pop_undo()), 2)
+        print("✓ Replace record sized by its matches")
+
+class TestTailReader(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="notepad_follow_test_")
+        self.path = os.path.join(self.test_dir, "app.log")
+
+    def tearDown(self):
+        for name in os.listdir(self.test_dir):
+            os.remove(os.path.join(self.test_dir, name))
+        os.rmdir(self.test_dir)
+
+    def append(self, data, path=None):
+        with open(path or self.path, 'ab') as f:
+            f.write(data)
+
+    def test_reads_only_appended_bytes(self):
+        """Test that split characters and CRLF pairs come out whole"""
+        print("Testing tail reads...")
+        self.append(b"loaded\r\n")
+        reader = follow.TailReader(self.path, offset=8)
+        self.assertEqual(reader.read_new(), ("", False, False))
+        self.append(b"caf\xc3")
+        first = reader.read_new()[0]
+        self.append(b"\xa9\r")
+        second = reader.read_new()[0]
+        self.append(b"\nnext\r\n")
+        third = reader.read_new()[0]
+        self.assertEqual(first + second + third, "café\nnext\n")
+        print("✓ Split UTF-8 character and CRLF decoded across reads")
+
+        # Reads are capped, the rest is reported as waiting
+        self.append(b"x" * 100)
+        text, reset, more = reader.read_new(max_read=60)
+        self.assertTrue(more)
+        self.assertEqual(len(text) + len(reader.read_new(max_read=60)[0]), 100)
+        reader.close()
+        print("✓ Large appends read in capped steps")
+
+    def test_truncation_and_rotation(self):
+        """Test that truncated and rotated logs are followed from their new start"""
+        print("Testing truncation and rotation...")
+        self.append(b"old line 1\nold line 2\n")
+        reader = follow.TailReader(self.path, offset=22)
+        with open(self.path, 'wb') as f:
+            f.write(b"fresh\n")
+        self.assertEqual(reader.read_new(), ("fresh\n", True, False))
+        self.assertEqual(reader.truncations, 1)
+        print("✓ Truncation restarts from the top")
+
+        rotated = self.path + ".1"
+        os.rename(self.path, rotated)
+        self.append(b"late write\n", rotated)
+        self.append(b"new file\n")
+        self.assertEqual(reader.read_new(), ("late write\nnew file\n", False, False))
+        self.assertEqual(reader.rotations, 1)
+        print("✓ Rotation finishes the old file, then follows the new one")
+
+        # The rest of a rotated file is drained max_read bytes at a time
+        os.rename(self.path, rotated)
+        self.append(b"x" * 100, rotated)
+        self.append(b"after\n")
+        steps = []
+        while not steps or steps[-1][2]:
+            steps.append(reader.read_new(max_read=40))
+        self.assertEqual([len(text) for text, _, _ in steps], [40, 40, 26])
+        self.assertEqual(steps[-1][0], "x" * 20 + "after\n")
+        self.assertEqual(reader.rotations, 2)
+        print("✓ Rotated file drained in capped steps")
+
+        # Rewritten in place with the same size, only the mtime tells
+        self.assertEqual(reader.read_new(), ("", False, False))
+        with open(self.path, 'r+b') as f:
+            f.write(b"AFTER\n")
+        os.utime(self.path, ns=(1_100_000_000_000_000_000, 1_100_000_000_000_000_000))
+        self.assertEqual(reader.read_new(), ("AFTER\n", True, False))
+        self.assertEqual(reader.truncations, 2)
+        reader.close()
+        print("✓ Same-size rewrite shown again from the top")
+
+
+class TestDirectoryScanner(unittest.TestCase):
+    def setUp(self):
+        self.test_dir = tempfile.mkdtemp(prefix="notepad_scan_test_")
+        os.makedirs(os.path.join(self.test_dir, "Zeta"))
+        os.makedirs(os.path.join(self.test_dir, "alpha"))
+        for name in ["b.txt", "A.txt"]:
+            with open(os.path.join(self.test_dir, name), 'w') as f:
+                f.write(name)
+
+    def tearDown(self):
+        for name in os.listdir(self.test_dir):
+            path = os.path.join(self.test_dir, name)
+            if os.path.isdir(path):
+                os.rmdir(path)
+            else:
+                os.remove(path)
+        os.rmdir(self.test_dir)
+
+    def wait_for(self, scanner, count, timeout=10):
+        results = []
+        deadline = time.time() + timeout
+        while len(results) < count and time.time() < deadline:
+            results.extend(scanner.poll())
+            time.sleep(0.01)
+        return results
+
+    def test_scan_directory(self):
+        """Test that listings put directories first and carry file sizes"""
+        print("Testing directory scan...")
+        entries = dirscan.scan_directory(self.test_dir)
+        self.assertEqual([entry.name for entry in entries], ["alpha", "Zeta", "A.txt", "b.txt"])
+        self.assertEqual([entry.size for entry in entries], [None, None, 5, 5])
+        print("✓ Directories first, sorted case-insensitively")
+
+        cancel = threading.Event()
+        cancel.set()
+        with self.assertRaises(dirscan.ScanCancelled):
+            dirscan.scan_directory(self.test_dir, cancel)
+        print("✓ Cancelled scan stops")
+
+    def test_listing_cache(self):
+        """Test that listings are reused until the directory's mtime changes"""
+        print("Testing listing cache...")
+        calls = []
+
+        def counting_scan(path, cancel_event=None):
+            calls.append(path)
+            return dirscan.scan_directory(path, cancel_event)
+
+        settled = (1_000_000_000, 1_000_000_000)
+        os.utime(self.test_dir, settled)
+        cache = dirscan.ListingCache(max_entries=1)
+        first = dirscan.cached_listing(self.test_dir, cache, scan_func=counting_scan)
+        self.assertEqual(dirscan.cached_listing(self.test_dir, cache, scan_func=counting_scan), first)
+        self.assertEqual((len(calls), cache.hits, cache.misses), (1, 1, 1))
+        print("✓ Unchanged directory served from the cache")
+
+        with open(os.path.join(self.test_dir, "c.txt"), 'w') as f:
+            f.write("c")
+        os.utime(self.test_dir, (1_500_000_000, 1_500_000_000))
+        entries = dirscan.cached_listing(self.test_dir, cache, scan_func=counting_scan)
+        self.assertEqual(len(entries), 5)
+        self.assertEqual(len(calls), 2)
+        self.assertIsNotNone(cache.get(self.test_dir, os.stat(self.test_dir).st_mtime_ns))
+        print("✓ Changed mtime lists the directory again")
+
+        # Writing a file in place keeps the directory's mtime, a restat sees the new size
+        mtime = os.stat(self.test_dir).st_mtime_ns
+        entries = dirscan.cached_listing(self.test_dir, cache)
+        self.assertIs(dirscan.cached_listing(self.test_dir, cache, restat=True), entries)
+        with open(os.path.join(self.test_dir, "c.txt"), 'a') as f:
+            f.write("more")
+        os.utime(self.test_dir, ns=(mtime, mtime))
+        self.assertIs(dirscan.cached_listing(self.test_dir, cache), entries)
+        restated = dirscan.cached_listing(self.test_dir, cache, restat=True)
+        sizes = {entry.name: entry.size for entry in restated}
+        self.assertEqual(sizes["c.txt"], 5)
+        self.assertIs(dirscan.cached_listing(self.test_dir, cache), restated)
+        self.assertEqual(len(calls), 2)
+        print("✓ Restat updated the size of a file written in place, without listing")
+
+        alpha = os.path.join(self.test_dir, "alpha")
+        os.utime(alpha, settled)
+        dirscan.cached_listing(alpha, cache, scan_func=counting_scan)
+        self.assertEqual(len(cache), 1)
+        self.assertIsNone(cache.get(self.test_dir, os.stat(self.test_dir).st_mtime_ns))
+        print("✓ Least recently used listing evicted")
+
+        # Freshly modified directories are listed but not trusted yet
+        os.utime(alpha, None)
+        dirscan.cached_listing(alpha, cache, scan_func=counting_scan)
+        dirscan.cached_listing(alpha, cache, scan_func=counting_scan)
+        self.assertEqual(len(calls), 5)
+        print("✓ Recently modified directory not cached")
+
+    def test_scanner_delivers_and_cancels(self):
+        """Test that scans are delivered through poll() unless cancelled"""
+        print("Testing background scanner...")
+        release = threading.Event()
+
+        def slow_scan(path, cancel_event):
+            release.wait(5)
+            return dirscan.scan_directory(path, cancel_event)
+
+        scanner = dirscan.DirectoryScanner(scan_func=slow_scan)
+        try:
+            scanner.submit(1, self.test_dir)
+            scanner.submit(2, os.path.join(self.test_dir, "missing"))
+            scanner.submit(3, self.test_dir)
+            scanner.cancel(3)
+            self.assertEqual(scanner.poll(), [])
+            release.set()
+            results = sorted(self.wait_for(scanner, 2))
+            self.assertEqual([result[0] for result in results], [1, 2])
+            self.assertEqual(len(results[0][2]), 4)
+            self.assertIsInstance(results[1][3], FileNotFoundError)
+            self.assertEqual(scanner.pending(), 0)
+            self.assertEqual(scanner.scans_cancelled, 1)
+            print("✓ Finished scans delivered, errors reported, cancelled scan dropped")
+        finally:
+            scanner.shutdown()
+
 if __name__ == '__main__':
     unittest.main(verbosity=2)
\ No newline at end of file
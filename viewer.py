@@ -0,0 +1,235 @@
+"""
+    Group: TAMUSA Notepad Experts (TNE)
+    Authors: Joshua Ludolf & Luis Morales
+    Class: CSCI 3366 - Programming Languages
+
+    Large file viewer module for the TAMUSA Notepad application.
+    Memory-maps files too big to edit and shows only a window of lines around
+    the viewport, paging in more as the user scrolls, so resident memory stays
+    bounded no matter how large the file is.
+"""
+
+import bisect
+import contextlib
+import mmap
+import os
+import tkinter as tk
+import document
+
+LARGE_FILE_THRESHOLD = 128 * 1024 * 1024  # Files from this size on open in the viewer
+WINDOW_LINES = 2000                       # Lines kept in the Text widget
+MAX_WINDOW_BYTES = 4 * 1024 * 1024        # Cap for files with very long lines
+REPAGE_MARGIN = 0.1                       # Repage when the view is this close to a window edge
+
+
+def is_large_file(path, threshold=None):
+    """Return True if a file should open in the read-only large file viewer"""
+    return os.path.getsize(path) >= (LARGE_FILE_THRESHOLD if threshold is None else threshold)
+
+
+class LargeFileView:
+    """
+    A read-only, paged view of a memory-mapped file inside a Text widget.
+
+    The widget holds at most WINDOW_LINES lines (and MAX_WINDOW_BYTES bytes) of
+    the file. The scrollbar is rewired to represent the whole file, and the
+    window slides as the view approaches one of its edges.
+
+    Attributes:
+        path: The file being viewed
+        size: The file size in bytes
+        encoding: The encoding used to decode the window
+        window_start: File offset of the first line in the widget
+        window_end: File offset just past the last line in the widget
+        line_index: The file's lineindex.LineIndex once built, None until then
+    """
+
+    def __init__(self, text_widget, scrollbar, path, on_scroll=None, mute=None):
+        """
+        Args:
+            text_widget (tk.Text): The widget to show the window in.
+            scrollbar (tk.Scrollbar): The widget's vertical scrollbar.
+            path (str): The file to view.
+            on_scroll (callable): Called as on_scroll(view) after the view moved.
+            mute (callable): Returns a context manager that silences edit listeners
+                while the window is replaced (e.g. TextWatcher.muted).
+
+        Raises:
+            ValueError: If the file is empty or its encoding has multi-byte line breaks
+                (UTF-16/UTF-32), which the byte-level paging cannot handle.
+        """
+        self.text_widget = text_widget
+        self.scrollbar = scrollbar
+        self.path = path
+        self.on_scroll = on_scroll
+        self.mute = mute or contextlib.nullcontext
+        self._file = open(path, 'rb')
+        try:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (ValueError, OSError):
+            self._file.close()
+            raise
+        self.size = len(self._map)
+        try:
+            self.encoding = self._detect_encoding()
+        except ValueError:
+            self._map.close()
+            self._file.close()
+            raise
+        self.window_start = 0
+        self.window_end = 0
+        self.line_offsets = []  # File offset of each line in the window
+        self.line_index = None
+        self._repage_id = None
+        self._saved_yscroll = text_widget.cget("yscrollcommand")
+        self._saved_command = scrollbar.cget("command")
+        text_widget.configure(yscrollcommand=self._on_text_scroll)
+        scrollbar.configure(command=self._on_scrollbar)
+
+    def _detect_encoding(self):
+        encoding = document.sniff_encoding(self._map[:document.PROBE_SIZE])
+        if not document.is_ascii_compatible(encoding):
+            raise ValueError(f"The large file viewer does not support {encoding}")
+        return encoding
+
+    def line_start(self, offset):
+        """Return the offset of the start of the line containing offset"""
+        if offset <= 0:
+            return 0
+        return self._map.rfind(b"\n", 0, min(offset, self.size)) + 1
+
+    def lines_back(self, offset, count):
+        """Return the offset of the line count lines before the one starting at offset"""
+        if self.line_index is not None:
+            return self.line_index.offset(self.line_index.line_at(offset) - count)
+        for _ in range(count):
+            if offset <= 0:
+                return 0
+            offset = self._map.rfind(b"\n", 0, offset - 1) + 1
+        return offset
+
+    def show(self, offset, top_offset=None):
+        """
+        Load the window starting at the line containing offset.
+
+        Args:
+            offset (int): File offset the window should start at.
+            top_offset (int): File offset of the line to scroll to the top of the view,
+                defaults to the start of the window.
+        """
+        start = self.line_start(offset)
+        if top_offset is not None and top_offset - start > MAX_WINDOW_BYTES // 2:
+            start = top_offset  # Very long lines, keep the requested line in the window
+        offsets, position = self._scan_window(start)
+        self.window_start, self.window_end, self.line_offsets = start, position, offsets
+        text = self._render(start, position)
+        widget = self.text_widget
+        widget.configure(state=tk.NORMAL)
+        with self.mute():
+            widget.delete("1.0", tk.END)
+            widget.insert("1.0", text)
+        widget.configure(state=tk.DISABLED)
+        widget.mark_set(tk.INSERT, "1.0")
+        widget.yview(f"{self.line_number_in_window(top_offset if top_offset is not None else start)}.0")
+
+    def window_lines(self):
+        """Return the number of lines the window holds"""
+        return WINDOW_LINES
+
+    def _scan_window(self, start):
+        """Return the line offsets of the window starting at start, and the offset past its end"""
+        offsets = []
+        position = start
+        limit = min(self.size, start + MAX_WINDOW_BYTES)
+        while len(offsets) < WINDOW_LINES and position < limit:
+            offsets.append(position)
+            newline = self._map.find(b"\n", position, limit)
+            position = newline + 1 if newline != -1 else limit
+        return offsets, position
+
+    def _render(self, start, end):
+        """Return the text shown for the bytes of the window"""
+        text = self._map[start:end].decode(self.encoding, errors='replace')
+        text = text.replace('\r\n', '\n')
+        if text.endswith('\n'):
+            text = text[:-1]  # The Text widget adds its own final newline
+        return text
+
+    def line_number_in_window(self, offset):
+        """Return the 1-based widget line showing the file line that starts at offset"""
+        return max(1, bisect.bisect_right(self.line_offsets, offset))
+
+    def top_offset(self):
+        """Return the file offset of the first visible line"""
+        line = int(self.text_widget.index("@0,0").split(".")[0])
+        if not self.line_offsets:
+            return 0
+        return self.line_offsets[min(line, len(self.line_offsets)) - 1]
+
+    def _on_text_scroll(self, first, last):
+        """Map the widget's scroll position onto the whole file for the scrollbar"""
+        first, last = float(first), float(last)
+        span = self.window_end - self.window_start
+        if self.size:
+            top = (self.window_start + first * span) / self.size
+            bottom = (self.window_start + last * span) / self.size
+        else:
+            top, bottom = 0.0, 1.0
+        self.scrollbar.set(top, bottom)
+        near_end = last > 1 - REPAGE_MARGIN and self.window_end < self.size
+        near_start = first < REPAGE_MARGIN and self.window_start > 0
+        if (near_end or near_start) and self._repage_id is None:
+            # Never reload the widget from inside its own scroll callback
+            self._repage_id = self.text_widget.after_idle(self._repage)
+        if self.on_scroll is not None:
+            self.on_scroll(self)
+
+    def _repage(self):
+        """Slide the window so the visible lines sit in its middle"""
+        self._repage_id = None
+        top = self.top_offset()
+        self.show(self.lines_back(top, self.window_lines() // 2), top_offset=top)
+
+    def _on_scrollbar(self, *args):
+        """Handle scrollbar drags and clicks in whole-file coordinates"""
+        if args[0] == "moveto":
+            offset = int(float(args[1]) * self.size)
+            top = self.line_start(offset)
+            self.show(self.lines_back(top, self.window_lines() // 4), top_offset=top)
+        else:
+            self.text_widget.yview(*args)
+
+    def goto_line(self, line):
+        """
+        Scroll a 1-based line of the file to the top of the view.
+
+        Raises:
+            RuntimeError: If the line index has not been built yet.
+        """
+        if self.line_index is None:
+            raise RuntimeError("The line index is still being built")
+        top = self.line_index.offset(line)
+        self.show(self.lines_back(top, self.window_lines() // 4), top_offset=top)
+
+    def current_line(self):
+        """Return the 1-based file line at the top of the view, or None without a line index"""
+        if self.line_index is None:
+            return None
+        return self.line_index.line_at(self.top_offset())
+
+    def fraction(self):
+        """Return the position of the view in the file, from 0.0 to 1.0"""
+        return self.top_offset() / self.size if self.size else 0.0
+
+    def close(self):
+        """Release the mapping and give the widget and scrollbar back their normal behavior"""
+        if self._repage_id is not None:
+            self.text_widget.after_cancel(self._repage_id)
+            self._repage_id = None
+        try:
+            self.text_widget.configure(yscrollcommand=self._saved_yscroll, state=tk.NORMAL)
+            self.scrollbar.configure(command=self._saved_command)
+        except tk.TclError:
+            pass  # Widget has been destroyed
+        self._map.close()
+        self._file.close()